@@ -3,69 +3,144 @@ Fusion Engine · Full AI Version (Async)
 
 Combines Google Maps POI data with Xiaohongshu reviews and OpenAI highlights
 to produce full Tinder-style recommendation cards.
+
+Reviews are crawled once upstream by `crawler/review_stage.py`; fusion only
+consumes the resulting `ReviewRecord`s and never calls a crawler itself.
 """
 
-from typing import List, Dict
-import uuid
+from typing import AsyncIterator, List, Dict, Tuple
 import asyncio
-from agent.highlight_llm import extract_highlights_async
-from crawler.xiaohongshu import fetch_reviews_for_poi
+from agent.highlight_llm import (
+    extract_highlights_async, extract_highlights_batch_async, HIGHLIGHT_BATCH_SIZE
+)
+from crawler.review_stage import ReviewRecord, review_key
+from maps.poi_identity import make_poi_id
 
-async def fuse_cards_async(maps_pois: List[Dict], review_lookup: Dict[str, Dict] = {}) -> List[Dict]:
+async def fuse_cards_async(maps_pois: List[Dict], reviews: Dict[str, ReviewRecord] = {}) -> List[Dict]:
     """
     Asynchronously combines POI info with human-style descriptions and tags from reviews or LLM.
 
+    Highlights for all POIs are extracted in batches (see `HIGHLIGHT_BATCH_SIZE`)
+    instead of one LLM call per POI.
+
     Args:
         maps_pois (List[Dict]): POI list from maps.fetcher
-        review_lookup (Dict): Optional override for review data {poi_name: {...}}
+        reviews (Dict[str, ReviewRecord]): Output of `gather_reviews_async`, keyed by `review_key(poi)`
 
     Returns:
         List[Dict]: Full Tinder card objects with LLM-generated summaries
     """
 
-    async def build_card(poi: Dict) -> Dict:
+    # TODO Step 1️⃣：为每个 POI 准备原始文本（爬虫内容或 fallback 模板）
+    texts_to_summarize, card_reviews = _prepare_review_texts(maps_pois, reviews)
+
+    # TODO Step 2️⃣：批量调用 LLM 提取亮点
+    highlights = await _summarize(texts_to_summarize)
+    _apply_highlights(card_reviews, highlights)
+
+    # TODO Step 3️⃣：构造卡片结构
+    return [build_card(poi, review) for poi, review in zip(maps_pois, card_reviews)]
+
+
+async def fuse_cards_stream(maps_pois: List[Dict], reviews: Dict[str, ReviewRecord] = {}, chunk_size: int = HIGHLIGHT_BATCH_SIZE) -> AsyncIterator[List[Tuple[int, Dict]]]:
+    """
+    Streaming variant of `fuse_cards_async`: yields cards chunk by chunk as soon as
+    each chunk's highlights are ready (fastest chunk first).
+
+    Args:
+        maps_pois (List[Dict]): POI list from maps.fetcher
+        reviews (Dict[str, ReviewRecord]): Output of `gather_reviews_async`
+        chunk_size (int): POIs summarized together (one LLM batch per chunk)
+
+    Yields:
+        List[Tuple[int, Dict]]: (index in `maps_pois`, fully built card) for one finished chunk
+    """
+    texts_to_summarize, card_reviews = _prepare_review_texts(maps_pois, reviews)
+
+    keys = list(texts_to_summarize)
+    size = max(1, chunk_size)
+    tasks = [
+        asyncio.ensure_future(_summarize({key: texts_to_summarize[key] for key in keys[i:i + size]}))
+        for i in range(0, len(keys), size)
+    ]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            highlights = await next_done
+            _apply_highlights(card_reviews, highlights)
+            yield [(int(key), build_card(maps_pois[int(key)], card_reviews[int(key)])) for key in highlights]
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _prepare_review_texts(maps_pois: List[Dict], reviews: Dict[str, ReviewRecord]) -> Tuple[Dict[str, str], List[Dict]]:
+    """
+    Picks the text to summarize for each POI (crawled review or fallback template).
+
+    Returns:
+        Tuple: ({str(index): raw_text}, [per-POI review dict with "links"])
+    """
+    card_reviews = []
+    texts_to_summarize = {}
+    for idx, poi in enumerate(maps_pois):
         name = poi["name"]
         city = poi.get("city", "")
-        review = review_lookup.get(name, {})
-
-        # TODO Step 1️⃣：尝试用爬虫模拟内容（或真实后续补上）
-        if not review.get("description"):
-            scraped = fetch_reviews_for_poi(name, city)
-            if scraped["raw_texts"]:
-                highlight = await extract_highlights_async(scraped["raw_texts"][0])
-                review = {
-                    "description": highlight["description"],
-                    "tags": highlight["tags"],
-                    "links": scraped.get("links", [])
-                }
-
-        # TODO Step 2️⃣：如果依然失败，则 fallback 模板生成（兜底）
-        if not review.get("description"):
-            fallback_text = f"This is a place called {name} in {city}. It is a tourist spot with a rating of {poi.get('rating', '?')}."
-            highlight = await extract_highlights_async(fallback_text)
-            review = {
-                "description": highlight["description"],
-                "tags": highlight["tags"],
-                "links": []
-            }
-
-        # TODO 构造卡片结构
-        return {
-            "id": f"poi_{uuid.uuid4().hex[:8]}",
-            "name": name,
-            "city": city,
-            "lat": poi["lat"],
-            "lng": poi["lng"],
-            "rating": poi.get("rating"),
-            "image_url": poi.get("image_url", "https://via.placeholder.com/400x300.png?text=No+Image"),
-            "description": review["description"],
-            "highlight_tags": review["tags"],
-            "opening_hours": poi.get("opening_hours", []),
-            "source": {
-                "google_maps_url": poi.get("maps_url", f"https://www.google.com/maps/search/{name.replace(' ', '+')}"),
-                "review_links": review["links"]
-            }
-        }
+        record = reviews.get(review_key(poi))
+
+        if record:
+            texts_to_summarize[str(idx)] = record["raw_text"]
+            links = record["links"]
+        else:
+            texts_to_summarize[str(idx)] = f"This is a place called {name} in {city}. It is a tourist spot with a rating of {poi.get('rating', '?')}."
+            links = []
+        card_reviews.append({"links": links})
+
+    return texts_to_summarize, card_reviews
+
+
+async def _summarize(texts: Dict[str, str]) -> Dict[str, Dict]:
+    """
+    Extracts highlights in batches, or one call per text when batching is disabled.
+    """
+    if HIGHLIGHT_BATCH_SIZE > 1:
+        return await extract_highlights_batch_async(texts)
 
-    # TODO 并发构造所有卡片
-    return await asyncio.gather(*(build_card(poi) for poi in maps_pois))
+    keys = list(texts)
+    singles = await asyncio.gather(*(extract_highlights_async(texts[k]) for k in keys))
+    return dict(zip(keys, singles))
+
+
+def _apply_highlights(card_reviews: List[Dict], highlights: Dict[str, Dict]):
+    for key, highlight in highlights.items():
+        card_reviews[int(key)].update({
+            "description": highlight["description"],
+            "tags": highlight["tags"]
+        })
+
+
+def build_card(poi: Dict, review: Dict) -> Dict:
+    """
+    Builds one Tinder card from a POI and its resolved review highlight.
+    """
+    name = poi["name"]
+    city = poi.get("city", "")
+
+    return {
+        "id": poi.get("id") or make_poi_id(poi),
+        "place_id": poi.get("place_id"),
+        "name": name,
+        "city": city,
+        "lat": poi["lat"],
+        "lng": poi["lng"],
+        "rating": poi.get("rating"),
+        "user_ratings_total": poi.get("user_ratings_total"),
+        "photo_reference": poi.get("photo_reference"),  # image_url is added at render time (maps/photos.py)
+        "description": review["description"],
+        "highlight_tags": review.get("tags", []),
+        "opening_hours": poi.get("opening_hours", []),
+        "source": {
+            "google_maps_url": poi.get("maps_url", f"https://www.google.com/maps/search/{name.replace(' ', '+')}"),
+            "review_links": review.get("links", [])
+        }
+    }
@@ -0,0 +1,87 @@
+"""
+highlight_cache.py · Content-Addressed Highlight Cache
+
+This module caches LLM highlight summaries by a hash of
+(model, prompt version, raw text). Highlight extraction is a pure function of
+those inputs, so the same review snippet or fallback template never needs to be
+summarized twice — across requests, restarts and worker processes.
+
+Main Use Case:
+--------------
+Used by `agent/highlight_llm.py` before any OpenAI call
+(both single and batched extraction).
+
+Key Features:
+-------------
+✅ SHA-256 content key (model + prompt version + text)
+✅ Bumping the prompt version invalidates old summaries automatically
+✅ Size-bounded SQLite store shared by all workers (LRU eviction)
+✅ Hot entries kept in an in-process LRU tier
+✅ Counters via `get_highlight_cache_stats()`
+
+Author: Tripllery AI Backend
+"""
+
+import os
+import hashlib
+from typing import Dict, Optional
+
+from services.utils.config import CACHE_DIR
+from services.utils.kv_cache import TieredCache
+
+HIGHLIGHT_CACHE_TTL = float(os.getenv("HIGHLIGHT_CACHE_TTL", str(30 * 24 * 3600)))
+HIGHLIGHT_CACHE_MEMORY_ENTRIES = int(os.getenv("HIGHLIGHT_CACHE_MEMORY_ENTRIES", "2048"))
+HIGHLIGHT_CACHE_DISK_ENTRIES = int(os.getenv("HIGHLIGHT_CACHE_DISK_ENTRIES", "50000"))
+HIGHLIGHT_CACHE_ENABLED = os.getenv("HIGHLIGHT_CACHE_ENABLED", "1") != "0"
+
+highlight_cache = TieredCache(
+    name="highlights",
+    ttl_seconds=HIGHLIGHT_CACHE_TTL,
+    max_memory_entries=HIGHLIGHT_CACHE_MEMORY_ENTRIES,
+    db_path=os.path.join(CACHE_DIR, "highlights.sqlite3"),
+    max_disk_entries=HIGHLIGHT_CACHE_DISK_ENTRIES
+)
+
+
+def make_highlight_key(model: str, prompt_version: str, raw_text: str) -> str:
+    """
+    Builds the content-addressed key for a highlight summary.
+
+    Args:
+        model (str): LLM model name
+        prompt_version (str): Version tag of the highlight prompt
+        raw_text (str): Input text being summarized
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, raw_text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def get_cached_highlight(model: str, prompt_version: str, raw_text: str) -> Optional[Dict]:
+    """
+    Returns a cached {"description", "tags"} dict, or None on miss.
+    """
+    if not HIGHLIGHT_CACHE_ENABLED:
+        return None
+    return highlight_cache.get(make_highlight_key(model, prompt_version, raw_text))
+
+
+def store_highlight(model: str, prompt_version: str, raw_text: str, highlight: Dict):
+    """
+    Stores a successfully extracted highlight.
+    """
+    if not HIGHLIGHT_CACHE_ENABLED:
+        return
+    highlight_cache.set(make_highlight_key(model, prompt_version, raw_text), highlight)
+
+
+def get_highlight_cache_stats() -> Dict:
+    """
+    Returns hit/miss counters of the highlight cache.
+    """
+    return highlight_cache.stats()
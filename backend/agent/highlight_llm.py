@@ -18,7 +18,10 @@ Key Features:
 ✅ Supports async calls for concurrent processing  
 ✅ Gracefully handles empty input or API failures with fallback defaults  
 ✅ Unified OpenAI model config (via `MODEL_NAME` in config module)  
-✅ Output is always in JSON: {"description": "...", "tags": ["...", "..."]}
+✅ Output is always in JSON: {"description": "...", "tags": ["...", "..."]}  
+✅ Batch mode: many texts per prompt, keyed by id, with split-and-retry  
+✅ Upstream errors (timeouts, 429, 5xx) back off once instead of splitting into more calls  
+✅ Content-addressed cache: a text is only ever summarized once per model / prompt version
 
 Example:
 --------
@@ -36,15 +39,35 @@ Author: Tripllery AI Backend
 
 import os
 import json
+import asyncio
+from typing import Dict, List, Optional
+
 import httpx
-from typing import Dict
+
+from services.utils.http_client import request as http_request
 
 # ✅ Load unified model config from shared config
 from services.utils.config import MODEL_NAME
+from agent.highlight_cache import get_cached_highlight, store_highlight
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
 
+# ⚙️ Number of texts packed into one batched prompt (≤ 1 disables batching)
+HIGHLIGHT_BATCH_SIZE = int(os.getenv("HIGHLIGHT_BATCH_SIZE", "10"))
+
+# ⏳ Seconds to wait before retrying a batch the upstream rejected (timeout, 429, 5xx); Retry-After wins up to the max
+HIGHLIGHT_RETRY_BACKOFF = float(os.getenv("HIGHLIGHT_RETRY_BACKOFF", "2"))
+HIGHLIGHT_RETRY_BACKOFF_MAX = float(os.getenv("HIGHLIGHT_RETRY_BACKOFF_MAX", "10"))
+
+# HTTP statuses where a smaller prompt may succeed (request too large) → split like a parse failure
+_SPLITTABLE_STATUSES = (400, 413)
+
+# 🏷️ Bump whenever the highlight prompts change, so cached summaries are invalidated
+HIGHLIGHT_PROMPT_VERSION = "v1"
+
+FAILED_HIGHLIGHT = {"description": "Failed to extract highlights.", "tags": []}
+
 HEADERS = {
     "Authorization": f"Bearer {OPENAI_API_KEY}",
     "Content-Type": "application/json"
@@ -65,6 +88,10 @@ async def extract_highlights_async(raw_text: str) -> Dict:
     if not raw_text.strip():
         return {"description": "No summary available.", "tags": []}
 
+    cached = get_cached_highlight(MODEL_NAME, HIGHLIGHT_PROMPT_VERSION, raw_text)
+    if cached is not None:
+        return cached
+
     prompt = f"""
 You're a smart travel assistant.
 
@@ -86,15 +113,194 @@ Output JSON only:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            response = await client.post(OPENAI_API_URL, headers=HEADERS, json=payload)
-            data = response.json()
-            if "choices" not in data:
-                raise ValueError("OpenAI missing choices")
-            content = data["choices"][0]["message"]["content"]
-            highlight_result = json.loads(content)
-            return highlight_result
+        response = await http_request("openai", "POST", OPENAI_API_URL, headers=HEADERS, json=payload)
+        data = response.json()
+        if "choices" not in data:
+            raise ValueError("OpenAI missing choices")
+        content = data["choices"][0]["message"]["content"]
+        highlight_result = json.loads(content)
+        if _is_valid_highlight(highlight_result):
+            store_highlight(MODEL_NAME, HIGHLIGHT_PROMPT_VERSION, raw_text, highlight_result)
+        return highlight_result
 
     except Exception as e:
         print(f"⚠️ extract_highlights_async fallback because: {e}")
-        return {"description": "Failed to extract highlights.", "tags": []}
+        return dict(FAILED_HIGHLIGHT)
+
+
+def _is_valid_highlight(value) -> bool:
+    return (
+        isinstance(value, dict)
+        and isinstance(value.get("description"), str)
+        and isinstance(value.get("tags"), list)
+    )
+
+
+async def _extract_batch_once(items: Dict[str, str]) -> Dict[str, Dict]:
+    """
+    Sends one batched prompt and returns the valid per-id results it contained.
+
+    Raises:
+        httpx.TransportError: Timeout / connection failure
+        httpx.HTTPStatusError: Non-2xx response (e.g. 429 rate limit)
+        ValueError: If the response is missing or is not a JSON object.
+    """
+    prompt = f"""
+You're a smart travel assistant.
+
+For EACH entry below, extract:
+- One-sentence summary
+- 3-5 English tags
+
+Input (JSON object, id → text):
+{json.dumps(items, ensure_ascii=False)}
+
+Output JSON only, keyed by the same ids:
+{{"<id>": {{"description": "...", "tags": ["...", "..."]}}}}
+"""
+
+    payload = {
+        "model": MODEL_NAME,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7
+    }
+
+    response = await http_request("openai", "POST", OPENAI_API_URL, headers=HEADERS, json=payload)
+    response.raise_for_status()
+    data = response.json()
+    if "choices" not in data:
+        raise ValueError("OpenAI missing choices")
+    content = data["choices"][0]["message"]["content"]
+    batch_result = json.loads(content)
+    if not isinstance(batch_result, dict):
+        raise ValueError("Batch output is not a JSON object")
+
+    return {
+        item_id: batch_result[item_id]
+        for item_id in items
+        if _is_valid_highlight(batch_result.get(item_id))
+    }
+
+
+def _is_upstream_error(error: Exception) -> bool:
+    """
+    True for failures a smaller prompt would not fix (timeouts, connection errors, 429, 5xx, auth).
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code not in _SPLITTABLE_STATUSES
+    return isinstance(error, httpx.TransportError)
+
+
+def _backoff_seconds(error: Exception) -> float:
+    """
+    Wait before the single retry: the response's Retry-After if given, else HIGHLIGHT_RETRY_BACKOFF.
+    """
+    retry_after: Optional[str] = None
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("retry-after")
+    try:
+        seconds = float(retry_after) if retry_after else HIGHLIGHT_RETRY_BACKOFF
+    except ValueError:
+        seconds = HIGHLIGHT_RETRY_BACKOFF
+    return min(max(seconds, 0.0), HIGHLIGHT_RETRY_BACKOFF_MAX)
+
+
+async def _extract_batch_with_retry(items: Dict[str, str], backed_off: bool = False) -> Dict[str, Dict]:
+    """
+    Extracts a batch; on parse failure or missing ids, splits the remainder in half and retries.
+    A single leftover item falls back to `extract_highlights_async`.
+
+    Upstream errors (timeouts, 429, 5xx) are not split (that would only multiply failing
+    calls): the whole batch is retried once after a backoff, then left to the failed default.
+    """
+    if len(items) == 1:
+        item_id, raw_text = next(iter(items.items()))
+        return {item_id: await extract_highlights_async(raw_text)}
+
+    try:
+        results = await _extract_batch_once(items)
+    except Exception as e:
+        if _is_upstream_error(e):
+            if backed_off:
+                print(f"⚠️ Highlight batch of {len(items)} failed again, using fallback because: {e}")
+                return {}
+            delay = _backoff_seconds(e)
+            print(f"⚠️ Highlight batch of {len(items)} hit an upstream error, retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+            return await _extract_batch_with_retry(items, backed_off=True)
+
+        print(f"⚠️ Highlight batch of {len(items)} failed, splitting because: {e}")
+        results = {}
+
+    missing_ids = [item_id for item_id in items if item_id not in results]
+    if not missing_ids:
+        return results
+
+    half = (len(missing_ids) + 1) // 2
+    halves = [missing_ids[:half], missing_ids[half:]]
+    retried = await asyncio.gather(*(
+        _extract_batch_with_retry({item_id: items[item_id] for item_id in ids}, backed_off)
+        for ids in halves if ids
+    ))
+    for part in retried:
+        results.update(part)
+    return results
+
+
+async def extract_highlights_batch_async(items: Dict[str, str], batch_size: int = HIGHLIGHT_BATCH_SIZE) -> Dict[str, Dict]:
+    """
+    Extracts summaries and tags for many texts using as few LLM calls as possible.
+
+    Texts are packed `batch_size` at a time into one structured prompt. Identical
+    texts are sent once. A batch that fails to parse (or drops ids) is split in
+    half and retried, down to single-text calls. A batch the upstream rejects
+    (timeout, 429, 5xx) is retried whole once after a backoff; if that fails too,
+    its texts get the failed default (not cached).
+
+    Args:
+        items (Dict[str, str]): id → raw text
+        batch_size (int): Texts per prompt (≤ 1 means one call per text)
+
+    Returns:
+        Dict[str, Dict]: id → {"description": str, "tags": List[str]} for every input id
+    """
+    # Step 1️⃣ De-duplicate identical texts (empty or cached texts need no LLM call)
+    text_to_ids: Dict[str, List[str]] = {}
+    results = {}
+    cache_hits = 0
+    for item_id, raw_text in items.items():
+        if not raw_text.strip():
+            results[item_id] = {"description": "No summary available.", "tags": []}
+            continue
+
+        cached = get_cached_highlight(MODEL_NAME, HIGHLIGHT_PROMPT_VERSION, raw_text)
+        if cached is not None:
+            results[item_id] = cached
+            cache_hits += 1
+        else:
+            text_to_ids.setdefault(raw_text, []).append(item_id)
+
+    unique_texts = {str(idx): text for idx, text in enumerate(text_to_ids)}
+    if not unique_texts:
+        print(f"🧾 Highlights: {len(items)} texts, all served from cache ({cache_hits} hits)")
+        return results
+
+    # Step 2️⃣ Pack into batches and run them concurrently
+    keys = list(unique_texts)
+    size = max(1, batch_size)
+    batches = [{k: unique_texts[k] for k in keys[i:i + size]} for i in range(0, len(keys), size)]
+    batch_results = await asyncio.gather(*(_extract_batch_with_retry(batch) for batch in batches))
+
+    # Step 3️⃣ Fan results back out to every id sharing the same text
+    extracted = {}
+    for part in batch_results:
+        extracted.update(part)
+    for key, text in unique_texts.items():
+        highlight = extracted.get(key, dict(FAILED_HIGHLIGHT))
+        if highlight != FAILED_HIGHLIGHT:
+            store_highlight(MODEL_NAME, HIGHLIGHT_PROMPT_VERSION, text, highlight)
+        for item_id in text_to_ids[text]:
+            results[item_id] = highlight
+
+    print(f"🧾 Highlights: {len(items)} texts ({cache_hits} cached) → {len(unique_texts)} unique in {len(batches)} batch(es)")
+    return results
@@ -17,7 +17,9 @@ Key Features:
 ✅ Extracts meaningful travel keywords from free-form user notes using OpenAI  
 ✅ Fallback to default interest tags if extraction fails  
 ✅ Normalizes and structures all form input into a consistent schema  
-✅ Supports future expansion with more preference dimensions
+✅ Supports future expansion with more preference dimensions  
+✅ Async, non-blocking variant (`parse_form_input_async`) with a hard timeout
+✅ OpenAI SDK imported lazily (`get_openai_client`), off the worker startup path
 
 Author: Tripllery AI Backend
 """
@@ -25,16 +27,56 @@ Author: Tripllery AI Backend
 from typing import Dict, List
 import json
 import os
+import asyncio
 from dotenv import load_dotenv
-from openai import OpenAI
 
 # ✅ Load model config
 from services.utils.config import MODEL_NAME
+from services.utils.http_client import request as http_request
 
 # 🔐 Load OpenAI key from environment
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=api_key)
+
+# 💤 OpenAI SDK client, created on first use (the SDK import alone costs over a second)
+_client = None
+
+
+def get_openai_client():
+    """
+    Returns the shared synchronous OpenAI SDK client, importing the SDK on first call.
+    """
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=api_key)
+    return _client
+
+OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
+
+# ⏱️ Max seconds to wait for keyword extraction before using the fallback keywords
+INTENT_LLM_TIMEOUT = float(os.getenv("INTENT_LLM_TIMEOUT", "8"))
+
+# 🛟 Interest keywords used when the note is empty or extraction fails
+DEFAULT_KEYWORDS = ["sightseeing", "food", "landmarks", "nature", "cafes"]
+
+
+def build_keyword_prompt(note: str) -> str:
+    """
+    Builds the keyword-extraction prompt shared by the sync and async paths.
+    """
+    return f"""
+You are a travel assistant.
+
+Given the following user description, extract 3-5 concise English keywords that represent interests or trip style.
+
+Output in JSON array format.
+
+---
+"{note}"
+---
+Output:
+    """
 
 def extract_keywords(note: str) -> List[str]:
     """
@@ -53,21 +95,10 @@ def extract_keywords(note: str) -> List[str]:
     if not note.strip():
         return []
 
-    prompt = f"""
-You are a travel assistant.
-
-Given the following user description, extract 3-5 concise English keywords that represent interests or trip style.
-
-Output in JSON array format.
-
----
-"{note}"
----
-Output:
-    """
+    prompt = build_keyword_prompt(note)
 
     try:
-        response = client.chat.completions.create(
+        response = get_openai_client().chat.completions.create(
             model=MODEL_NAME,  # ✅ Use unified model config
             messages=[{"role": "user", "content": prompt}],
             temperature=0.5
@@ -78,32 +109,58 @@ Output:
         print(f"⚠️ Keyword extraction failed: {e}")
         return []
 
-def parse_form_input(form_data: Dict) -> Dict:
+async def extract_keywords_async(note: str, timeout: float = INTENT_LLM_TIMEOUT) -> List[str]:
     """
-    Parses raw form data submitted by the user into structured intent format.
+    Async variant of `extract_keywords` that never blocks the event loop.
 
-    This function:
-    - Extracts text input such as city, dates, and personal notes
-    - Calls LLM-based keyword extractor for interest tagging
-    - Applies fallback defaults when necessary
-    - Returns a consistent intent schema used by the recommendation engine
+    Uses the shared pooled OpenAI client and gives up after `timeout` seconds.
 
     Args:
-        form_data (Dict): Raw form submission data (typically from frontend DesignPage).
+        note (str): Free-text trip preference written by the user.
+        timeout (float): Max seconds to wait for the LLM.
 
     Returns:
-        Dict: Normalized intent dictionary with structured fields including:
-            - departure_city, destination, start_datetime, end_datetime
-            - travelers, budget, transportation, stopovers
-            - trip_preferences (raw notes)
-            - interest_keywords (AI-extracted or fallback)
-            - round_trip, include_hotels, meal_options, intensity
+        List[str]: Extracted keywords, or an empty list on timeout / failure.
     """
-    note = form_data.get("trip_preferences", "").strip()
-    keywords = extract_keywords(note)
+    if not note.strip():
+        return []
+
+    payload = {
+        "model": MODEL_NAME,
+        "messages": [{"role": "user", "content": build_keyword_prompt(note)}],
+        "temperature": 0.5
+    }
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+    try:
+        response = await asyncio.wait_for(
+            http_request("openai", "POST", OPENAI_API_URL, headers=headers, json=payload),
+            timeout=timeout
+        )
+        data = response.json()
+        if "choices" not in data:
+            raise ValueError("OpenAI missing choices")
+        keywords = json.loads(data["choices"][0]["message"]["content"])
+        if not isinstance(keywords, list):
+            raise ValueError("Keywords are not a JSON array")
+        return [str(kw) for kw in keywords]
+    except asyncio.TimeoutError:
+        print(f"⏱️ Keyword extraction timed out after {timeout}s")
+        return []
+    except Exception as e:
+        print(f"⚠️ Keyword extraction failed: {e}")
+        return []
+
 
+def build_intent(form_data: Dict, note: str, keywords: List[str]) -> Dict:
+    """
+    Assembles the normalized intent schema from form data and extracted keywords.
+    """
     if not keywords:
-        keywords = ["sightseeing", "food", "landmarks", "nature", "cafes"]
+        keywords = list(DEFAULT_KEYWORDS)
 
     intent = {
         "departure_city": form_data.get("departure_city"),
@@ -124,3 +181,47 @@ def parse_form_input(form_data: Dict) -> Dict:
 
     print("✅ Parsed user intent:", intent)
     return intent
+
+
+def parse_form_input(form_data: Dict) -> Dict:
+    """
+    Parses raw form data submitted by the user into structured intent format.
+
+    This function:
+    - Extracts text input such as city, dates, and personal notes
+    - Calls LLM-based keyword extractor for interest tagging
+    - Applies fallback defaults when necessary
+    - Returns a consistent intent schema used by the recommendation engine
+
+    Args:
+        form_data (Dict): Raw form submission data (typically from frontend DesignPage).
+
+    Returns:
+        Dict: Normalized intent dictionary with structured fields including:
+            - departure_city, destination, start_datetime, end_datetime
+            - travelers, budget, transportation, stopovers
+            - trip_preferences (raw notes)
+            - interest_keywords (AI-extracted or fallback)
+            - round_trip, include_hotels, meal_options, intensity
+    """
+    note = form_data.get("trip_preferences", "").strip()
+    keywords = extract_keywords(note)
+    return build_intent(form_data, note, keywords)
+
+
+async def parse_form_input_async(form_data: Dict) -> Dict:
+    """
+    Async variant of `parse_form_input` used by the recommendation pipeline.
+
+    Keyword extraction runs on the shared async client with a timeout,
+    falling back to `DEFAULT_KEYWORDS` exactly like the sync path.
+
+    Args:
+        form_data (Dict): Raw form submission data.
+
+    Returns:
+        Dict: Normalized intent dictionary (same schema as `parse_form_input`).
+    """
+    note = form_data.get("trip_preferences", "").strip()
+    keywords = await extract_keywords_async(note)
+    return build_intent(form_data, note, keywords)
@@ -11,12 +11,32 @@ Key Features:
     - /recommend
     - /plan
     - /preview
+✅ Shared pooled HTTP clients opened / closed with the app lifecycle  
+✅ /metrics endpoint for outbound pool usage and cache hit rates
+✅ Fast JSON encoding (orjson if installed) + negotiated gzip / brotli for every route
+✅ Startup instrumentation (TRIPLLERY_PROFILE_IMPORTS=1 → per-module import cost)
+✅ Heavy SDKs (OpenAI, googlemaps) deferred and warmed in the background after startup
 
 Author: Tripllery AI Backend
 """
 
-from quart import Quart
+# ⏱️ Must run before any other import so import costs can be recorded
+from services.utils import startup_profile
+startup_profile.install()
+
+import asyncio
+from quart import Quart, jsonify
 from quart_cors import cors
+from services.utils.http_client import (
+    startup_http_clients, shutdown_http_clients, get_http_pool_stats
+)
+from maps.places_cache import get_places_cache_stats
+from maps.poi_cleaner import get_dedupe_stats
+from agent.highlight_cache import get_highlight_cache_stats
+from services.preview.leg_cache import get_leg_cache_stats
+from services.preview.travel_matrix import get_matrix_cache_stats
+from backend.services.utils.recommend_pool import get_pool_store_stats
+from services.utils.response_codec import install_response_codec, get_compression_stats
 
 # ✅ Import all route blueprints
 from routes.recommend import recommend_bp
@@ -26,12 +46,51 @@ from routes.preview import preview_bp  # 🆕 Make sure this is included!
 # Initialize app
 app = Quart(__name__)
 app = cors(app, allow_origin="*")  # Allow all origins for local frontend
+install_response_codec(app)  # 🧾 orjson provider + response compression for all routes
 
 # ✅ Register route blueprints
 app.register_blueprint(recommend_bp)
 app.register_blueprint(plan_bp)
 app.register_blueprint(preview_bp)  # 🆕 Required for /preview to work
 
+# 🔌 Open / close pooled outbound HTTP clients with the app lifecycle
+@app.before_serving
+async def open_http_pools():
+    await startup_http_clients()
+
+# 🚀 Report readiness, then warm deferred SDKs without delaying the first request
+_warmup_tasks = set()
+
+@app.before_serving
+async def report_startup():
+    startup_profile.mark_ready()
+    startup_profile.print_report()
+    if startup_profile.WARM_IMPORTS:
+        task = asyncio.ensure_future(asyncio.to_thread(startup_profile.warm_imports))
+        _warmup_tasks.add(task)
+        task.add_done_callback(_warmup_tasks.discard)
+
+@app.after_serving
+async def close_http_pools():
+    await shutdown_http_clients()
+
+# 📊 Runtime metrics (outbound pool usage + cache hit rates)
+@app.route("/metrics", methods=["GET"])
+async def metrics():
+    return jsonify({
+        "http_pools": get_http_pool_stats(),
+        "caches": {
+            "places": get_places_cache_stats(),
+            "highlights": get_highlight_cache_stats(),
+            "legs": get_leg_cache_stats(),
+            "travel_matrices": get_matrix_cache_stats(),
+            "recommend_pools": get_pool_store_stats()
+        },
+        "poi_dedupe": get_dedupe_stats(),
+        "responses": get_compression_stats(),
+        "startup": startup_profile.get_startup_report()
+    })
+
 # ✅ Launch server
 if __name__ == "__main__":
     app.run(debug=True, port=5001)
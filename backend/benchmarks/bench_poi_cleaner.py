@@ -0,0 +1,91 @@
+"""
+bench_poi_cleaner.py · POI Cleaner Benchmark
+
+Compares the original per-POI distance loop (Python loop around a mean center,
+geopy geodesic if installed, pure-Python haversine otherwise) against the
+vectorized `clean_pois` on synthetic pools of 1k–100k POIs.
+
+Usage:
+------
+    PYTHONPATH=.:backend python backend/benchmarks/bench_poi_cleaner.py
+    PYTHONPATH=.:backend python backend/benchmarks/bench_poi_cleaner.py --sizes 1000 10000
+
+Author: Tripllery AI Backend
+"""
+
+import io
+import math
+import time
+import argparse
+import contextlib
+from typing import Dict, List
+
+import numpy as np
+
+from maps.poi_cleaner import clean_pois
+
+try:
+    from geopy.distance import geodesic
+except ImportError:
+    geodesic = None
+
+
+def make_pois(n: int, outlier_ratio: float = 0.02, seed: int = 42) -> List[Dict]:
+    """
+    Synthetic pool around Manhattan with a few far-away outliers.
+    """
+    rng = np.random.default_rng(seed)
+    lat = 40.758 + rng.normal(0, 0.05, n)
+    lng = -73.985 + rng.normal(0, 0.05, n)
+    outliers = rng.random(n) < outlier_ratio
+    lat[outliers] += rng.uniform(3, 10, outliers.sum())
+    return [{"name": f"POI {i}", "lat": float(lat[i]), "lng": float(lng[i])} for i in range(n)]
+
+
+def _haversine_scalar(a, b) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(h))
+
+
+def clean_pois_loop(pois: List[Dict], max_distance_km: float = 50.0, min_required: int = 5) -> List[Dict]:
+    """
+    Baseline: the previous implementation (mean center + one distance call per POI).
+    """
+    distance = (lambda a, b: geodesic(a, b).km) if geodesic else _haversine_scalar
+    center = (sum(p["lat"] for p in pois) / len(pois), sum(p["lng"] for p in pois) / len(pois))
+    cleaned = [p for p in pois if distance(center, (p["lat"], p["lng"])) <= max_distance_km]
+    return cleaned if len(cleaned) >= min_required else pois
+
+
+def _time(func, pois, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):  # silence per-POI logs
+            started = time.perf_counter()
+            func(pois)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clean_pois")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    baseline = "geopy geodesic loop" if geodesic else "python haversine loop"
+    print(f"Baseline: {baseline}")
+    print(f"{'POIs':>8} | {'loop (ms)':>10} | {'numpy (ms)':>10} | {'speedup':>8} | kept loop/numpy")
+
+    for n in args.sizes:
+        pois = make_pois(n)
+        loop_s = _time(clean_pois_loop, pois, args.repeat)
+        vec_s = _time(clean_pois, pois, args.repeat)
+        with contextlib.redirect_stdout(io.StringIO()):
+            kept = f"{len(clean_pois_loop(pois))}/{len(clean_pois(pois))}"
+        print(f"{n:>8} | {loop_s * 1000:>10.1f} | {vec_s * 1000:>10.1f} | {loop_s / vec_s:>7.1f}x | {kept}")
+
+
+if __name__ == "__main__":
+    main()
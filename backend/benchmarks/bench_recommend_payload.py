@@ -0,0 +1,108 @@
+"""
+bench_recommend_payload.py · /recommend Response Size Benchmark
+
+Compares the JSON body of `/recommend` in the original shape (`cards` = first
+page, `all_pois` = whole pool, so the first page is serialized twice) with the
+compact shape (`view=compact`: first page + lightweight index of the rest).
+
+Card pools are synthetic but shaped like `fusion.build_card` output: Places
+photo URL, ~300-character LLM description, highlight tags, weekday opening
+hours and review links. Sizes are measured with Quart's own JSON provider, i.e.
+the bytes `jsonify` puts on the wire (before any compression).
+
+Usage:
+------
+    PYTHONPATH=.:backend python backend/benchmarks/bench_recommend_payload.py
+    PYTHONPATH=.:backend python backend/benchmarks/bench_recommend_payload.py --sizes 24 120
+
+Author: Tripllery AI Backend
+"""
+
+import argparse
+from typing import Dict, List
+
+import numpy as np
+from quart import Quart
+
+from services.utils.recommend_pool import compact_card_index
+
+PAGE_SIZE = 12
+
+TAGS = ["Museums", "Local Food", "Street Art", "Rooftop Bar", "Hidden Gem", "Historic", "Family Friendly",
+        "Coffee", "Live Music", "Waterfront", "Shopping", "Parks", "Seafood", "Architecture", "Nightlife"]
+WORDS = ("charming historic spot loved by locals with a relaxed vibe great views friendly staff and "
+         "seasonal menus perfect for an afternoon stroll or a quick photo stop near the harbor").split()
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def make_card_pool(n: int, seed: int = 7) -> List[Dict]:
+    """
+    Synthetic scored card pool, best first, shaped like `fusion.build_card` output.
+    """
+    rng = np.random.default_rng(seed)
+    cards = []
+    for i in range(n):
+        name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}"
+        photo_ref = "".join(rng.choice(list("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-"), 180))
+        cards.append({
+            "id": f"poi_{rng.integers(0, 16 ** 12):012x}",
+            "place_id": f"ChIJ{photo_ref[:23]}",
+            "name": name,
+            "city": "Boston",
+            "lat": 42.36 + float(rng.normal(0, 0.02)),
+            "lng": -71.06 + float(rng.normal(0, 0.02)),
+            "rating": round(float(rng.uniform(3.5, 5.0)), 1),
+            "user_ratings_total": int(rng.lognormal(6, 1.2)),
+            "image_url": ("https://maps.googleapis.com/maps/api/place/photo?maxwidth=600"
+                          f"&photoreference={photo_ref}&key=AIzaSyD-EXAMPLEKEY0000000000000000000"),
+            "description": " ".join(rng.choice(WORDS, int(rng.integers(40, 70)))).capitalize() + ".",
+            "highlight_tags": [str(tag) for tag in rng.choice(TAGS, int(rng.integers(2, 6)), replace=False)],
+            "opening_hours": [f"{day}: {int(rng.integers(7, 11))}:00 AM – {int(rng.integers(5, 11))}:00 PM" for day in DAYS],
+            "source": {
+                "google_maps_url": f"https://www.google.com/maps/search/{name.replace(' ', '+')}",
+                "review_links": [f"https://www.xiaohongshu.com/explore/{rng.integers(0, 2 ** 62):024x}"
+                                 for _ in range(int(rng.integers(1, 4)))]
+            },
+            "score": float(10 - i * 0.01)
+        })
+    return cards
+
+
+def full_response(pool: List[Dict], pool_token: str = "x" * 22) -> Dict:
+    """
+    Original `/recommend` body (view=full).
+    """
+    return {"cards": pool[:PAGE_SIZE], "all_pois": pool, "min_required": 8, "pool_token": pool_token,
+            "pool_size": len(pool), "has_more": True}
+
+
+def compact_response(pool: List[Dict], pool_token: str = "x" * 22) -> Dict:
+    """
+    `/recommend?view=compact` body.
+    """
+    return {"cards": pool[:PAGE_SIZE], "index": compact_card_index(pool[PAGE_SIZE:]), "min_required": 8,
+            "pool_token": pool_token, "pool_size": len(pool), "has_more": True}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /recommend response size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[24, 60, 120, 240])
+    args = parser.parse_args()
+
+    dumps = Quart(__name__).json.dumps
+    sample = make_card_pool(100)
+    print(f"Average full card: ~{len(dumps(sample).encode('utf-8')) // len(sample)} B, "
+          f"index entry: ~{len(dumps(compact_card_index(sample)).encode('utf-8')) // len(sample)} B")
+    print(f"{'pool':>6} | {'full (KB)':>10} | {'compact (KB)':>12} | {'saved':>6} | "
+          f"{'/more page of 6 (KB)':>20}")
+
+    for n in args.sizes:
+        pool = make_card_pool(n)
+        full = len(dumps(full_response(pool)).encode("utf-8"))
+        compact = len(dumps(compact_response(pool)).encode("utf-8"))
+        more = len(dumps({"cards": pool[PAGE_SIZE:PAGE_SIZE + 6], "has_more": True, "expanding": False}).encode("utf-8"))
+        print(f"{n:>6} | {full / 1024:>10.1f} | {compact / 1024:>12.1f} | {1 - compact / full:>6.0%} | {more / 1024:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+bench_response_codec.py · JSON Encoding + Compression Benchmark
+
+Measures what `services/utils/response_codec.py` changes for realistic payloads:
+
+- Encode time: Quart's default provider (stdlib json, sorted keys, ASCII escapes)
+  vs the tuned stdlib fallback vs orjson (if installed)
+- Wire bytes: identity vs gzip vs brotli (if installed), plus compression time
+
+Payloads:
+- /recommend, full view (card pool shaped like `fusion.build_card`, see
+  `bench_recommend_payload.py`) and compact view
+- /preview: multi-day schedule whose transport blocks carry Google encoded
+  polylines (~200–500 points per leg)
+
+Usage:
+------
+    PYTHONPATH=.:backend python backend/benchmarks/bench_response_codec.py
+    PYTHONPATH=.:backend python backend/benchmarks/bench_response_codec.py --pool 240 --days 7
+
+Author: Tripllery AI Backend
+"""
+
+import json
+import time
+import argparse
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from services.utils import response_codec
+from services.utils.response_codec import compress_bytes
+from bench_recommend_payload import make_card_pool, full_response, compact_response
+
+
+def encode_polyline(points: np.ndarray) -> str:
+    """
+    Google polyline algorithm (1e-5 precision).
+    """
+    out = []
+    previous = np.zeros(2, dtype=np.int64)
+    for point in np.round(points * 1e5).astype(np.int64):
+        for delta in point - previous:
+            value = ~(int(delta) << 1) if delta < 0 else int(delta) << 1
+            while value >= 0x20:
+                out.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            out.append(chr(value + 63))
+        previous = point
+    return "".join(out)
+
+
+def make_preview(days: int, pois_per_day: int = 7, seed: int = 3) -> Dict[str, List[Dict]]:
+    """
+    Synthetic /preview response: meals, sightseeing and transport blocks with polylines.
+    """
+    rng = np.random.default_rng(seed)
+    schedule = {}
+    for d in range(days):
+        day, date = f"Day {d + 1}", f"2025-05-{5 + d:02d}"
+        blocks = [{"day": day, "date": date, "start_time": "08:00", "end_time": "08:30", "type": "Meal",
+                   "activity": "Breakfast", "location": None}]
+        position = np.array([42.36, -71.06]) + rng.normal(0, 0.01, 2)
+        for p in range(pois_per_day):
+            poi_id = f"poi_{rng.integers(0, 16 ** 12):012x}"
+            blocks.append({"day": day, "date": date, "start_time": "09:00", "end_time": "10:30", "type": "Sightseeing",
+                           "activity": f"Place {d}-{p}", "id": poi_id,
+                           "location": {"lat": float(position[0]), "lng": float(position[1])}, "opening_status": "open"})
+            steps = int(rng.integers(200, 500))
+            path = position + np.cumsum(rng.normal(0, 0.0002, (steps, 2)), axis=0)
+            blocks.append({"day": day, "date": date, "start_time": "10:30", "end_time": "10:52", "type": "Transportation",
+                           "activity": f"Transportation (22 min) Place {d}-{p} ➔ Place {d}-{p + 1}",
+                           "from_id": poi_id, "to_id": f"poi_{rng.integers(0, 16 ** 12):012x}",
+                           "from_location": {"lat": float(position[0]), "lng": float(position[1])},
+                           "to_location": {"lat": float(path[-1, 0]), "lng": float(path[-1, 1])},
+                           "polyline": encode_polyline(path)})
+            position = path[-1]
+        schedule[day] = blocks
+    return schedule
+
+
+def _best(func: Callable, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response encoding + compression")
+    parser.add_argument("--pool", type=int, default=120)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    pool = make_card_pool(args.pool)
+    payloads = {
+        f"/recommend full ({args.pool})": full_response(pool),
+        f"/recommend compact ({args.pool})": compact_response(pool),
+        f"/preview ({args.days} days)": make_preview(args.days)
+    }
+
+    encoders = {
+        "quart default": lambda obj: json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(",", ":")).encode(),
+        "json tuned": lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    }
+    if response_codec.orjson is not None:
+        encoders["orjson"] = lambda obj: response_codec.orjson.dumps(obj)
+
+    encodings = ["gzip"] + (["br"] if response_codec.brotli is not None else [])
+    print(f"JSON backends: {', '.join(encoders)} | compression: {', '.join(encodings)}"
+          f"{'' if response_codec.brotli is not None else ' (brotli not installed)'}")
+
+    print(f"\nEncode time (ms, best of {args.repeat})")
+    print(f"{'payload':<26} | " + " | ".join(f"{name:>13}" for name in encoders) + " | speedup")
+    for label, payload in payloads.items():
+        times = [_best(lambda: encode(payload), args.repeat) for encode in encoders.values()]
+        print(f"{label:<26} | " + " | ".join(f"{t * 1000:>13.3f}" for t in times) + f" | {times[0] / times[-1]:>6.1f}x")
+
+    print("\nWire bytes (KB) and compression time (ms)")
+    print(f"{'payload':<26} | {'quart default':>13} | {'identity':>9} | "
+          + " | ".join(f"{enc:>6} KB | {enc:>4} ms" for enc in encodings) + " | total saved")
+    for label, payload in payloads.items():
+        baseline = len(encoders["quart default"](payload))
+        data = response_codec.dumps_bytes(payload)
+        row = f"{label:<26} | {baseline / 1024:>13.1f} | {len(data) / 1024:>9.1f} | "
+        sizes = []
+        for enc in encodings:
+            size = len(compress_bytes(data, enc))
+            sizes.append(size)
+            row += f"{size / 1024:>9.1f} | {_best(lambda: compress_bytes(data, enc), 5) * 1000:>7.2f} | "
+        print(row + f"{1 - min(sizes) / baseline:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+bench_schedule_builder.py · Preview Schedule Builder Benchmark
+
+Compares the previous datetime-based timeline code (datetime arithmetic +
+`strftime` per block, `any(...)` meal scans per POI, `strptime` re-parsing in
+the flexible-time pass) against the integer-minute core used by
+`services/preview/builder.py` on synthetic multi-week trips.
+
+Only the CPU part of `/preview` is measured: travel times come from a
+precomputed per-day matrix, so nothing is fetched over the network. Both
+implementations must produce identical timelines, which is checked first.
+
+Usage:
+------
+    PYTHONPATH=.:backend python backend/benchmarks/bench_schedule_builder.py
+    PYTHONPATH=.:backend python backend/benchmarks/bench_schedule_builder.py --trips 14x8 56x40 --repeat 5
+
+Author: Tripllery AI Backend
+"""
+
+import time
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from services.preview.builder import _build_day
+from services.preview.flexible_time import smart_insert_flexible_blocks
+from services.preview.helper import render_times
+
+MEALS = {"include_breakfast": True, "include_lunch": True, "include_dinner": True}
+
+
+def make_trip(days: int, pois_per_day: int, seed: int = 42) -> List[Tuple[List[Dict], np.ndarray]]:
+    """
+    Synthetic trip: per day, a list of POIs and an (N, N) travel-minute matrix.
+    """
+    rng = np.random.default_rng(seed)
+    trip = []
+    for d in range(days):
+        pois = [
+            {"id": f"poi_{d}_{i}", "name": f"POI {d}-{i}", "lat": 42.36 + rng.normal(0, 0.02), "lng": -71.06 + rng.normal(0, 0.02)}
+            for i in range(pois_per_day)
+        ]
+        trip.append((pois, rng.integers(3, 40, size=(pois_per_day, pois_per_day)).astype(float)))
+    return trip
+
+
+# ---------------------------------------------------------------------------
+# Baseline: previous datetime implementation (helpers, builder loop, flexible pass)
+# ---------------------------------------------------------------------------
+
+def _legacy_block(start, minutes, day, date, block_type, activity, **extra):
+    end = start + timedelta(minutes=minutes)
+    block = {
+        "day": day, "date": date,
+        "start_time": start.strftime("%H:%M"), "end_time": end.strftime("%H:%M"),
+        "type": block_type, "activity": activity, **extra
+    }
+    return block, end
+
+
+def legacy_day(pois, start_time, date, day_name, duration, travel_time_list, meal_options, return_time):
+    day_schedule = []
+    current_time = start_time
+
+    if current_time.hour <= 9 and meal_options.get("include_breakfast", True):
+        block, current_time = _legacy_block(current_time, 30, day_name, date, "Meal", "Breakfast", location=None)
+        day_schedule.append(block)
+
+    for idx, poi in enumerate(pois):
+        if (
+            meal_options.get("include_lunch", True) and
+            (current_time.hour > 12 or (current_time.hour == 12 and current_time.minute >= 30)) and
+            not any(x for x in day_schedule if x["type"] == "Meal" and "Lunch" in x["activity"])
+        ):
+            block, current_time = _legacy_block(current_time, 60, day_name, date, "Meal", "Lunch Break", location=None)
+            day_schedule.append(block)
+
+        block, current_time = _legacy_block(
+            current_time, duration, day_name, date, "Sightseeing", poi["name"],
+            id=poi.get("id"), location={"lat": poi.get("lat"), "lng": poi.get("lng")}
+        )
+        day_schedule.append(block)
+
+        if idx < len(pois) - 1:
+            nxt, minutes = pois[idx + 1], travel_time_list[idx]
+            label = "~1 min" if minutes <= 1 else f"{minutes} min"
+            block, current_time = _legacy_block(
+                current_time, minutes, day_name, date, "Transportation",
+                f"Transportation ({label}) {poi['name']} ➔ {nxt['name']}",
+                from_id=poi.get("id"), to_id=nxt.get("id"),
+                from_location={"lat": poi.get("lat"), "lng": poi.get("lng")},
+                to_location={"lat": nxt.get("lat"), "lng": nxt.get("lng")},
+                polyline=None
+            )
+            day_schedule.append(block)
+
+        if (
+            meal_options.get("include_dinner", True) and
+            current_time.hour >= 18 and
+            not any(x for x in day_schedule if x["type"] == "Meal" and "Dinner" in x["activity"])
+        ):
+            block, current_time = _legacy_block(current_time, 60, day_name, date, "Meal", "Dinner Break", location=None)
+            day_schedule.append(block)
+
+    end = datetime.combine(current_time.date(), datetime.strptime(return_time, "%H:%M").time())
+    day_schedule.append({
+        "day": day_name, "date": date,
+        "start_time": current_time.strftime("%H:%M"), "end_time": end.strftime("%H:%M"),
+        "type": "Return", "activity": "Return to Hotel", "location": None
+    })
+    return day_schedule
+
+
+def legacy_flexible(day_schedule, target_total_flexible_minutes=60):
+    parse = lambda value: datetime.strptime(value, "%H:%M")
+    candidate_gaps = []
+    for i in range(len(day_schedule) - 1):
+        end_curr, start_next = parse(day_schedule[i]["end_time"]), parse(day_schedule[i + 1]["start_time"])
+        gap = (start_next - end_curr).total_seconds() / 60
+        if gap >= 20:
+            candidate_gaps.append({"index": i, "gap_minutes": gap, "start_time": end_curr})
+    if not candidate_gaps:
+        return day_schedule
+
+    remaining = target_total_flexible_minutes
+    updated = []
+    for idx, block in enumerate(day_schedule):
+        updated.append(block)
+        gap = next((g for g in candidate_gaps if g["index"] == idx), None)
+        if gap and remaining > 0:
+            minutes = max(20, min(remaining, gap["gap_minutes"] * 0.5))
+            if minutes < remaining:
+                updated.append({
+                    "day": block.get("day"), "date": block.get("date"),
+                    "start_time": gap["start_time"].strftime("%H:%M"),
+                    "end_time": (gap["start_time"] + timedelta(minutes=minutes)).strftime("%H:%M"),
+                    "type": "Flexible", "activity": "Free Time / Explore", "location": None
+                })
+                remaining -= minutes
+    return updated
+
+
+def run_legacy(trip, duration=90) -> Dict[str, List[Dict]]:
+    start = datetime(2025, 5, 5, 9, 0)
+    schedule = {}
+    for d, (pois, matrix) in enumerate(trip):
+        travel = [int(matrix[i][i + 1]) for i in range(len(pois) - 1)]
+        day = legacy_day(pois, start + timedelta(days=d), (start + timedelta(days=d)).date().isoformat(),
+                         f"Day {d + 1}", duration, travel, MEALS, "21:00")
+        schedule[f"Day {d + 1}"] = legacy_flexible(day)
+    return schedule
+
+
+def run_minutes(trip, duration=90) -> Dict[str, List[Dict]]:
+    start = datetime(2025, 5, 5, 9, 0)
+    schedule = {}
+    for d, (pois, matrix) in enumerate(trip):
+        day, _, _ = _build_day(pois, 540, (start + timedelta(days=d)).date().isoformat(), f"Day {d + 1}",
+                               duration, None, None, MEALS, 1260, travel_matrix=matrix)
+        schedule[f"Day {d + 1}"] = render_times(smart_insert_flexible_blocks(day))
+    return schedule
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the /preview schedule builder core")
+    parser.add_argument("--trips", nargs="*", default=["14x8", "28x20", "56x40", "28x100"],
+                        help="DAYSxPOIS_PER_DAY scenarios")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'trip':>10} | {'blocks':>7} | {'datetime (ms)':>13} | {'minutes (ms)':>12} | speedup")
+    for spec in args.trips:
+        days, per_day = map(int, spec.lower().split("x"))
+        trip = make_trip(days, per_day)
+
+        expected, actual = run_legacy(trip), run_minutes(trip)
+        assert expected == actual, f"timelines differ for {spec}"
+        blocks = sum(len(day) for day in actual.values())
+
+        legacy_s = best_of(lambda: run_legacy(trip), args.repeat)
+        minutes_s = best_of(lambda: run_minutes(trip), args.repeat)
+        print(f"{spec:>10} | {blocks:>7} | {legacy_s * 1000:>13.2f} | {minutes_s * 1000:>12.2f} | {legacy_s / minutes_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
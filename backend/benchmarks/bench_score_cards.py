@@ -0,0 +1,115 @@
+"""
+bench_score_cards.py · Card Ranking Benchmark
+
+Compares the original scoring (one Python `compute_score` per card + full sort)
+against the vectorized ranking engine on synthetic pools of 100–100k cards:
+
+- build:   `CardMatrix(cards)`, paid once per pool (`recommend_agent` stores it with the pool)
+- page:    one `/recommend/more` page on the stored scores (mask served cards + partial top-k)
+- rescore: re-scoring the pool for a new profile on the stored matrix (matrix-vector product)
+- append:  growing the stored matrix by one expansion batch (`CardMatrix.extend`, only the batch is parsed)
+- speedup: legacy / (build + page), i.e. creating a pool; below 1x means the build costs more than
+           the legacy loop, which only pays off over the pages, re-scores and appends that reuse it
+
+Usage:
+------
+    PYTHONPATH=.:backend python backend/benchmarks/bench_score_cards.py
+    PYTHONPATH=.:backend python backend/benchmarks/bench_score_cards.py --sizes 10000 --page 12
+
+Author: Tripllery AI Backend
+"""
+
+import time
+import argparse
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from services.utils.score_cards import CardMatrix, make_score_profile, score_cards, top_k_indices
+
+TAGS = ["Museums", "Local Food", "Street Art", "Rooftop Bar", "Hidden Gem", "Historic", "Family Friendly",
+        "Coffee", "Live Music", "Waterfront", "Shopping", "Parks", "Seafood", "Architecture", "Nightlife"]
+NAME_WORDS = ["Harbor", "Museum", "Garden", "Cafe", "Market", "Gallery", "Park", "Tavern", "Bakery", "Theater"]
+
+
+def make_cards(n: int, seed: int = 42) -> List[Dict]:
+    """
+    Synthetic card pool shaped like `fusion.build_card` output.
+    """
+    rng = np.random.default_rng(seed)
+    cards = []
+    for i in range(n):
+        tags = [TAGS[t] for t in rng.choice(len(TAGS), size=rng.integers(0, 5), replace=False)]
+        cards.append({
+            "id": f"poi_{i:012x}",
+            "name": f"{NAME_WORDS[i % len(NAME_WORDS)]} {NAME_WORDS[(i * 7) % len(NAME_WORDS)]} {i}",
+            "rating": None if rng.random() < 0.05 else round(float(rng.uniform(3.0, 5.0)), 1),
+            "user_ratings_total": None if rng.random() < 0.1 else int(rng.lognormal(5, 1.5)),
+            "description": "x" * int(rng.integers(40, 400)),
+            "highlight_tags": tags
+        })
+    return cards
+
+
+def legacy_score_cards(cards: List[Dict]) -> List[Dict]:
+    """
+    Baseline: the previous implementation (fixed weights, Python loop, full sort).
+    """
+    for card in cards:
+        rating = card.get("rating", 0) or 0
+        tag_count = len(card.get("highlight_tags", []))
+        desc_len = len(card.get("description", ""))
+        card["score"] = rating * 1.5 + tag_count * 1.0 + (desc_len / 100.0)
+    return sorted(cards, key=lambda x: x["score"], reverse=True)
+
+
+def _best(func: Callable, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark card ranking")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--page", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    profile = make_score_profile(interests=["museums", "street food", "live music"], style_tags=["Historic", "Coffee"])
+    fixed = make_score_profile(weights={"interest": 0, "style": 0})
+
+    print(f"Profile: interests={profile['interests']} style_tags={profile['style_tags']}")
+    print(f"{'cards':>8} | {'legacy (ms)':>11} | {'build (ms)':>10} | {'page (ms)':>9} | {'rescore (ms)':>12} | "
+          f"{'append (ms)':>11} | {'speedup':>7} | same order (default weights, no profile terms)")
+
+    for n in args.sizes:
+        cards = make_cards(n)
+        matrix = CardMatrix(cards)
+        scores = matrix.scores(profile)
+        served = top_k_indices(scores, args.page).tolist()
+        batch = make_cards(args.page, seed=7)
+
+        def page():
+            unserved = scores.copy()
+            unserved[served] = -np.inf
+            return top_k_indices(unserved, args.page)
+
+        legacy_s = _best(lambda: legacy_score_cards(cards), args.repeat)
+        build_s = _best(lambda: CardMatrix(cards), max(5, args.repeat // 2))
+        page_s = _best(page, args.repeat)
+        rescore_s = _best(lambda: matrix.scores(profile), args.repeat)
+        append_s = _best(lambda: matrix.extend(CardMatrix(batch)), args.repeat)
+
+        legacy_ids = [card["id"] for card in legacy_score_cards(cards)]
+        same = [card["id"] for card in score_cards(cards, fixed)] == legacy_ids
+
+        print(f"{n:>8} | {legacy_s * 1000:>11.2f} | {build_s * 1000:>10.2f} | {page_s * 1000:>9.3f} | "
+              f"{rescore_s * 1000:>12.3f} | {append_s * 1000:>11.3f} | {legacy_s / (build_s + page_s):>6.2f}x | {same}")
+
+
+if __name__ == "__main__":
+    main()
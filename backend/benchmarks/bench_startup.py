@@ -0,0 +1,79 @@
+"""
+bench_startup.py · Worker Startup Benchmark (import time + RSS)
+
+Imports `app.py` in fresh Python processes and reports wall-clock import time
+and peak resident memory. Each scenario can preload extra modules first, which
+is how the pre-change import graph is reproduced (e.g. `sklearn.cluster`,
+previously imported by `services/formatter/clustering.py` / `optimizer.py`).
+
+Usage:
+------
+    PYTHONPATH=.:backend python backend/benchmarks/bench_startup.py
+    PYTHONPATH=.:backend python backend/benchmarks/bench_startup.py --runs 10 --preload sklearn.cluster
+
+API keys only need to be non-empty; nothing is called over the network.
+
+Author: Tripllery AI Backend
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+import app
+elapsed = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"import_ms": elapsed * 1000, "rss_mb": rss_kb / 1024, "modules": len(sys.modules)}))
+"""
+
+
+def measure(preload: List[str], runs: int) -> Dict[str, float]:
+    """
+    Imports app (after `preload`) in `runs` fresh interpreters; returns medians.
+    """
+    env = {**os.environ}
+    env.setdefault("OPENAI_API_KEY", "bench")
+    env.setdefault("GOOGLE_MAPS_API_KEY", "bench")
+
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE, *preload],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+
+    return {
+        key: statistics.median(sample[key] for sample in samples)
+        for key in ("import_ms", "rss_mb", "modules")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app import time and RSS")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--preload", nargs="*", default=["sklearn.cluster"],
+                        help="Modules imported before app in the 'before' scenario")
+    args = parser.parse_args()
+
+    scenarios = [("after (current import graph)", [])]
+    if args.preload:
+        scenarios.insert(0, (f"before (+ {', '.join(args.preload)})", args.preload))
+
+    print(f"{'scenario':<40} | {'import (ms)':>11} | {'RSS (MB)':>8} | modules")
+    for label, preload in scenarios:
+        result = measure(preload, args.runs)
+        print(f"{label:<40} | {result['import_ms']:>11.0f} | {result['rss_mb']:>8.1f} | {result['modules']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+review_stage.py · Review-Gathering Pipeline Stage
+
+This module is the single place where the recommendation pipeline crawls
+reviews for POIs. It produces one typed `ReviewRecord` per POI, which the
+fusion engine consumes directly — fusion never calls a crawler itself.
+
+Main Use Case:
+--------------
+Called by `recommend_agent()` between POI cleaning and card fusion.
+
+Key Features:
+-------------
+✅ Each POI crawled at most once per request (keyed by name + city)
+✅ Crawls run off the event loop with bounded concurrency
+✅ Typed output record (`ReviewRecord`) shared with fusion
+✅ Counters proving crawl counts (`pois`, `crawled`, `duplicates_skipped`, ...)
+
+Output Schema:
+--------------
+Dict[str, ReviewRecord] keyed by `review_key(poi)`, where each record has:
+    - "raw_text": str → first crawled snippet
+    - "links": List[str] → source post links
+
+Author: Tripllery AI Backend
+"""
+
+import os
+import asyncio
+from typing import Dict, List, Tuple, TypedDict
+
+from crawler.xiaohongshu import fetch_reviews_for_poi
+
+REVIEW_CRAWL_CONCURRENCY = int(os.getenv("REVIEW_CRAWL_CONCURRENCY", "8"))
+
+
+class ReviewRecord(TypedDict):
+    raw_text: str
+    links: List[str]
+
+
+def review_key(poi: Dict) -> str:
+    """
+    Returns the lookup key used for a POI's review record.
+
+    Args:
+        poi (Dict): POI with "name" and optional "city"
+
+    Returns:
+        str: e.g. "MoMA|New York"
+    """
+    return f"{poi['name']}|{poi.get('city', '')}"
+
+
+async def gather_reviews_async(pois: List[Dict], max_concurrency: int = REVIEW_CRAWL_CONCURRENCY) -> Tuple[Dict[str, ReviewRecord], Dict[str, int]]:
+    """
+    Crawls reviews for every distinct POI exactly once.
+
+    Args:
+        pois (List[Dict]): Cleaned POIs (must contain "name")
+        max_concurrency (int): Maximum crawls in flight at once
+
+    Returns:
+        Tuple:
+            - Dict[str, ReviewRecord]: review_key → record (POIs with no reviews are absent)
+            - Dict[str, int]: counters {pois, crawled, duplicates_skipped, with_reviews, failed}
+    """
+    stats = {"pois": len(pois), "crawled": 0, "duplicates_skipped": 0, "with_reviews": 0, "failed": 0}
+
+    # Step 1️⃣ Collect distinct POIs to crawl
+    to_crawl = {}
+    for poi in pois:
+        key = review_key(poi)
+        if key in to_crawl:
+            stats["duplicates_skipped"] += 1
+        else:
+            to_crawl[key] = poi
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def crawl(key: str, poi: Dict):
+        async with semaphore:
+            stats["crawled"] += 1
+            try:
+                scraped = await asyncio.to_thread(fetch_reviews_for_poi, poi["name"], poi.get("city", ""))
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"⚠️ Review crawl failed for {poi['name']}: {e}")
+                return key, None
+
+        if not scraped.get("raw_texts"):
+            return key, None
+        return key, ReviewRecord(raw_text=scraped["raw_texts"][0], links=scraped.get("links", []))
+
+    # Step 2️⃣ Crawl concurrently, one crawl per distinct POI
+    results = await asyncio.gather(*(crawl(key, poi) for key, poi in to_crawl.items()))
+
+    reviews = {key: record for key, record in results if record is not None}
+    stats["with_reviews"] = len(reviews)
+    return reviews, stats
@@ -7,7 +7,7 @@ to fetch Points of Interest (POIs) based on user query keywords and cities.
 It returns cleaned, structured POI data including:
 - Name, coordinates, rating
 - Address and Google Maps link
-- Optional photo URL (from photo_reference)
+- Optional photo reference (the keyed URL is built at render time, see `maps/photos.py`)
 - Opening hours (if available)
 
 Main Use Case:
@@ -17,24 +17,52 @@ based on queries generated from user interests and city input.
 
 Key Features:
 -------------
-✅ Uses official `googlemaps.Client` SDK  
+✅ Uses official `googlemaps.Client` SDK (created lazily on first search)  
 ✅ Auto-appends city to query for contextual accuracy  
-✅ Fetches photo reference and constructs image URL  
+✅ Fetches photo reference (no API key in cached POIs)  
 ✅ Includes opening hours and location info  
 ✅ Returns a unified POI dictionary format for downstream fusion
+✅ Async fan-out with bounded concurrency and per-query timeouts
+✅ Results cached by (query, city, radius) via `places_cache`
+✅ Keeps Google's `place_id` and assigns a stable id (`poi_identity.make_poi_id`)
+✅ Further result pages on demand via `next_page_token` (`fetch_places_page`)
 
 Author: Tripllery AI Backend
 """
 
 import os
+import time
+import asyncio
 from dotenv import load_dotenv
-import googlemaps
-from typing import List, Dict
+from typing import List, Dict, Optional
+from maps.places_cache import get_cached_page, store_places, get_page_token, drop_page_token
+from maps.poi_identity import make_poi_id
 
 # 🔐 Load API key from environment
 load_dotenv()
 api_key = os.getenv("GOOGLE_MAPS_API_KEY")
-gmaps = googlemaps.Client(key=api_key)
+
+# 💤 googlemaps SDK client, created on first search (keeps googlemaps/requests off startup)
+_gmaps = None
+
+
+def get_gmaps_client():
+    """
+    Returns the shared `googlemaps.Client`, importing the SDK on first call.
+    """
+    global _gmaps
+    if _gmaps is None:
+        import googlemaps
+        _gmaps = googlemaps.Client(key=api_key)
+    return _gmaps
+
+# ⚙️ Async fan-out tuning (max parallel Places calls + per-query timeout in seconds)
+MAPS_MAX_CONCURRENCY = int(os.getenv("MAPS_MAX_CONCURRENCY", "8"))
+MAPS_QUERY_TIMEOUT = float(os.getenv("MAPS_QUERY_TIMEOUT", "10"))
+
+# 📄 A next_page_token only becomes valid a moment after it is issued
+PLACES_PAGE_TOKEN_DELAY = float(os.getenv("PLACES_PAGE_TOKEN_DELAY", "2"))
+PLACES_PAGE_TOKEN_RETRIES = int(os.getenv("PLACES_PAGE_TOKEN_RETRIES", "3"))
 
 def search_google_maps(query: str, city: str, limit=5, radius=5000) -> List[Dict]:
     """
@@ -48,47 +76,208 @@ def search_google_maps(query: str, city: str, limit=5, radius=5000) -> List[Dict
 
     Returns:
         List[Dict]: A list of POI dictionaries, each containing:
+            - id: str (deterministic, see `maps/poi_identity.py`)
+            - place_id: str or None (Google place_id)
             - name: str
             - lat: float
             - lng: float
             - rating: float or None
+            - user_ratings_total: int or None (number of Google ratings)
             - address: str
             - maps_url: str (Google Maps link)
-            - image_url: str (either real or fallback image)
+            - photo_reference: str or None (see `maps/photos.photo_url`)
             - opening_hours: List[str] (optional, weekday_text)
             - city: str
     """
+    return fetch_places_page(query, city, radius)["pois"][:limit]
+
+
+def fetch_places_page(query: str, city: str, radius=5000, page: int = 0) -> Dict:
+    """
+    Returns one result page of a Places search (Google returns up to 20 results per page).
+
+    Page 0 is the plain search; page n follows the `next_page_token` of page n-1.
+    Every page is cached on its own, but a token only lives a few minutes: when
+    page n-1's token is gone (or rejected), page n-1 is fetched again for a fresh one.
+
+    Args:
+        query (str): Keyword query (e.g. "Boston museums")
+        city (str): City name to constrain the search
+        radius (int): Search radius in meters (default: 5000)
+        page (int): Page number (0-based)
+
+    Returns:
+        Dict: {"pois": [POI dicts, see `search_google_maps`], "has_next_page": bool}
+    """
+    # Serve repeated searches from the places cache
+    cached = get_cached_page(query, city, radius, page)
+    if cached is not None:
+        return cached
+    return _fetch_live_page(query, city, radius, page)
+
+
+def _fetch_live_page(query: str, city: str, radius: int, page: int) -> Dict:
+    """
+    Fetches one result page from Google (bypassing the page cache) and caches it.
+    """
+    if page == 0:
+        # Send search request to Google Places API
+        response = get_gmaps_client().places(query=f"{query} in {city}", radius=radius)
+    else:
+        previous = get_cached_page(query, city, radius, page - 1)
+        if previous is not None and not previous["has_next_page"]:
+            return {"pois": [], "has_next_page": False}
+
+        token = get_page_token(query, city, radius, page - 1)
+        response = None
+        if token is not None:
+            try:
+                response = _places_next_page(token)
+            except Exception as e:
+                print(f"⚠️ Cached page token rejected ({query} / {city}, page {page}), refetching: {e}")
+                drop_page_token(query, city, radius, page - 1)
+        if response is None:
+            # Token expired (or never seen by this cache): a fresh copy of the previous page issues a new one
+            if not _fetch_live_page(query, city, radius, page - 1)["has_next_page"]:
+                return {"pois": [], "has_next_page": False}
+            response = _places_next_page(get_page_token(query, city, radius, page - 1))
+
+    # Build structured result objects (the whole page is cached)
+    pois = [_place_to_poi(place, city) for place in response.get("results", [])]
+    next_page_token = response.get("next_page_token")
+
+    store_places(query, city, radius, pois, page=page, next_page_token=next_page_token)
+    return {"pois": pois, "has_next_page": bool(next_page_token)}
+
+
+def _places_next_page(token: Dict) -> Dict:
+    """
+    Fetches the page behind a next_page_token ({"token", "issued_at"}), retrying while it is not active yet.
+    """
+    # A token becomes valid PLACES_PAGE_TOKEN_DELAY seconds after it was issued; an older token
+    # that is rejected has expired, so only young tokens are retried
+    age = time.time() - token["issued_at"]
+    wait = PLACES_PAGE_TOKEN_DELAY - age
+    retries = PLACES_PAGE_TOKEN_RETRIES if age < PLACES_PAGE_TOKEN_DELAY * PLACES_PAGE_TOKEN_RETRIES else 1
+    for attempt in range(retries):
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            return get_gmaps_client().places(page_token=token["token"])
+        except Exception as e:
+            if "INVALID_REQUEST" not in str(e) or attempt == retries - 1:
+                raise
+        wait = PLACES_PAGE_TOKEN_DELAY
+    return {}
 
-    # Send search request to Google Places API
-    response = gmaps.places(query=f"{query} in {city}", radius=radius)
-    results = response.get("results", [])
-    pois = []
 
-    # DEBUG: Print API key use (remove or log in prod)
-    print("🔑 GOOGLE_MAPS_API_KEY =", api_key)
+def _place_to_poi(place: Dict, city: str) -> Dict:
+    """
+    Converts one Places API result into the unified POI dict.
+    """
+    # Only the first photo's reference is kept; its (keyed) URL is built when the card is rendered
+    photos = place.get("photos") or [{}]
+    photo_reference = photos[0].get("photo_reference")
 
-    # Build structured result objects
-    for place in results[:limit]:
-        photo_ref = None
-        image_url = None
+    opening_hours = place.get("opening_hours", {}).get("weekday_text", [])
 
-        if "photos" in place:
-            # Extract first photo reference and build static image URL
-            photo_ref = place["photos"][0]["photo_reference"]
-            image_url = f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=600&photoreference={photo_ref}&key={api_key}"
+    poi = {
+        "place_id": place.get("place_id"),
+        "name": place.get("name"),
+        "lat": place["geometry"]["location"]["lat"],
+        "lng": place["geometry"]["location"]["lng"],
+        "rating": place.get("rating"),
+        "user_ratings_total": place.get("user_ratings_total"),
+        "address": place.get("formatted_address"),
+        "maps_url": f"https://www.google.com/maps/search/{place.get('name').replace(' ', '+')}",
+        "photo_reference": photo_reference,
+        "opening_hours": opening_hours,
+        "city": city
+    }
+    poi["id"] = make_poi_id(poi)
+    return poi
+
+
+async def search_google_maps_async(
+    query: str,
+    city: str,
+    limit=5,
+    radius=5000,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    timeout: float = MAPS_QUERY_TIMEOUT
+) -> List[Dict]:
+    """
+    Async wrapper around `search_google_maps` that never blocks the event loop.
+
+    The blocking SDK call runs in a worker thread. A shared semaphore bounds how many
+    queries are in flight at once, and each query gets its own timeout.
+
+    Args:
+        query (str): Keyword query (e.g. "Boston museums")
+        city (str): City name to constrain the search
+        limit (int): Maximum number of results to return (default: 5)
+        radius (int): Search radius in meters (default: 5000)
+        semaphore (asyncio.Semaphore, optional): Shared concurrency limiter
+        timeout (float): Seconds to wait for this query before giving up
+
+    Returns:
+        List[Dict]: POI dictionaries, or an empty list on timeout / API error.
+    """
+    semaphore = semaphore or asyncio.Semaphore(1)
+
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(search_google_maps, query, city, limit, radius),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            print(f"⏱️ Google Maps query timed out after {timeout}s: {query} ({city})")
+        except Exception as e:
+            print(f"⚠️ Google Maps query failed: {query} ({city}) because: {e}")
+
+    return []
+
+
+async def search_all_queries_async(
+    all_queries: Dict[str, List[str]],
+    max_concurrency: int = MAPS_MAX_CONCURRENCY,
+    timeout: float = MAPS_QUERY_TIMEOUT,
+    limit: int = 5,
+    round_robin: bool = False
+) -> List[Dict]:
+    """
+    Runs every (city, query) search concurrently and merges results in original order.
+
+    Latency is bounded by the slowest query instead of the sum of all of them.
+    A failed or timed-out query contributes no POIs but does not fail the batch.
+
+    Args:
+        all_queries (Dict[str, List[str]]): City → list of queries (from `generate_queries`)
+        max_concurrency (int): Maximum number of Places calls in flight at once
+        timeout (float): Per-query timeout in seconds
+        limit (int): Results kept per query (default: 5)
+        round_robin (bool): Interleave queries (1st result of every query, then 2nd, ...)
+                            so any prefix of the list covers every interest
+
+    Returns:
+        List[Dict]: Flat POI list, ordered by city then query as in `all_queries`
+                    (per rank first with `round_robin`).
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
 
-        opening_hours = place.get("opening_hours", {}).get("weekday_text", [])
+    jobs = [(city, query) for city, queries in all_queries.items() for query in queries]
+    results = await asyncio.gather(*(
+        search_google_maps_async(query=query, city=city, limit=limit, semaphore=semaphore, timeout=timeout)
+        for city, query in jobs
+    ))
 
-        pois.append({
-            "name": place.get("name"),
-            "lat": place["geometry"]["location"]["lat"],
-            "lng": place["geometry"]["location"]["lng"],
-            "rating": place.get("rating"),
-            "address": place.get("formatted_address"),
-            "maps_url": f"https://www.google.com/maps/search/{place.get('name').replace(' ', '+')}",
-            "image_url": image_url or "https://via.placeholder.com/400x300.png?text=No+Image",
-            "opening_hours": opening_hours,
-            "city": city
-        })
+    merged = []
+    if round_robin:
+        for rank in range(max((len(pois) for pois in results), default=0)):
+            merged.extend(pois[rank] for pois in results if rank < len(pois))
+        return merged
 
-    return pois
+    for pois in results:
+        merged.extend(pois)
+    return merged
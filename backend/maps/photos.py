@@ -0,0 +1,55 @@
+"""
+photos.py · Google Places Photo URLs
+
+POIs and cards keep only Google's `photo_reference`; the keyed Places Photo URL
+is built here when a card is put on the wire, so the Maps API key never ends up
+in the places cache, the pool store or any other persisted record.
+
+Main Use Case:
+--------------
+Used by `routes/recommend.py` on every card it returns (`render_cards`).
+
+Key Features:
+-------------
+✅ Photo URL built at render time from `photo_reference` + GOOGLE_MAPS_API_KEY
+✅ Placeholder image for POIs without a photo
+✅ Cards are copied, never modified in place (pool cards are shared)
+
+Author: Tripllery AI Backend
+"""
+
+import os
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+
+PLACES_PHOTO_MAX_WIDTH = int(os.getenv("PLACES_PHOTO_MAX_WIDTH", "600"))
+PLACEHOLDER_IMAGE_URL = "https://via.placeholder.com/400x300.png?text=No+Image"
+
+
+def photo_url(photo_reference: Optional[str]) -> str:
+    """
+    Builds the Places Photo URL of a photo reference (placeholder image if there is none).
+    """
+    if not photo_reference:
+        return PLACEHOLDER_IMAGE_URL
+    return (f"https://maps.googleapis.com/maps/api/place/photo?maxwidth={PLACES_PHOTO_MAX_WIDTH}"
+            f"&photoreference={photo_reference}&key={api_key}")
+
+
+def render_card(card: Dict) -> Dict:
+    """
+    Returns a copy of a card for the client: `photo_reference` replaced by its `image_url`.
+    """
+    rendered = {key: value for key, value in card.items() if key != "photo_reference"}
+    rendered["image_url"] = card.get("image_url") or photo_url(card.get("photo_reference"))
+    return rendered
+
+
+def render_cards(cards: List[Dict]) -> List[Dict]:
+    """
+    `render_card` over a card list.
+    """
+    return [render_card(card) for card in cards]
@@ -0,0 +1,130 @@
+"""
+places_cache.py · Google Places Search Cache
+
+This module keeps Places search results keyed by (query, city, radius) so that
+popular searches ("Boston museums", "New York brunch", ...) are served locally
+instead of hitting `gmaps.places` on every `/recommend`.
+
+Main Use Case:
+--------------
+Used by `maps/fetcher.py` in front of the Places API call.
+
+Key Features:
+-------------
+✅ Normalized cache key (case / whitespace insensitive)
+✅ Configurable TTL (PLACES_CACHE_TTL, seconds)
+✅ In-process LRU tier (PLACES_CACHE_MEMORY_ENTRIES)
+✅ SQLite tier persisted across restarts (PLACES_CACHE_DISK_ENTRIES)
+✅ Result pages cached separately; each page records whether a next page exists
+✅ Google's `next_page_token`s kept apart under a short TTL (PLACES_PAGE_TOKEN_TTL):
+   they expire within minutes, long before the cached page does
+✅ Hit / miss counters via `get_places_cache_stats()`
+
+Author: Tripllery AI Backend
+"""
+
+import os
+import time
+from typing import List, Dict, Optional
+
+from services.utils.config import CACHE_DIR
+from services.utils.kv_cache import TieredCache
+
+PLACES_CACHE_TTL = float(os.getenv("PLACES_CACHE_TTL", str(7 * 24 * 3600)))
+PLACES_CACHE_MEMORY_ENTRIES = int(os.getenv("PLACES_CACHE_MEMORY_ENTRIES", "512"))
+PLACES_CACHE_DISK_ENTRIES = int(os.getenv("PLACES_CACHE_DISK_ENTRIES", "20000"))
+PLACES_CACHE_ENABLED = os.getenv("PLACES_CACHE_ENABLED", "1") != "0"
+# Seconds a next_page_token is reused (Google invalidates them after a few minutes)
+PLACES_PAGE_TOKEN_TTL = float(os.getenv("PLACES_PAGE_TOKEN_TTL", "120"))
+# Bump when the stored POI fields change (2: "place_id" + stable "id", 3: pages + next_page_token,
+# 4: "user_ratings_total", 5: "photo_reference" instead of a keyed "image_url",
+# 6: "has_next_page" instead of the short-lived next_page_token)
+PLACES_CACHE_SCHEMA = 6
+
+places_cache = TieredCache(
+    name="places",
+    ttl_seconds=PLACES_CACHE_TTL,
+    max_memory_entries=PLACES_CACHE_MEMORY_ENTRIES,
+    db_path=os.path.join(CACHE_DIR, "places.sqlite3"),
+    max_disk_entries=PLACES_CACHE_DISK_ENTRIES
+)
+
+# Live page tokens: key of the page that issued the token → {"token": str, "issued_at": epoch seconds}
+page_token_cache = TieredCache(
+    name="places_page_tokens",
+    ttl_seconds=PLACES_PAGE_TOKEN_TTL,
+    max_memory_entries=PLACES_CACHE_MEMORY_ENTRIES,
+    db_path=os.path.join(CACHE_DIR, "places.sqlite3"),
+    max_disk_entries=PLACES_CACHE_MEMORY_ENTRIES
+)
+
+
+def make_places_key(query: str, city: str, radius: int, page: int = 0) -> str:
+    """
+    Builds a normalized cache key for a Places search.
+
+    Args:
+        query (str): Search keyword (e.g. "Boston museums")
+        city (str): City name (e.g. "Boston")
+        radius (int): Search radius in meters
+        page (int): Result page (0 = first request, n = n-th `next_page_token`)
+
+    Returns:
+        str: Key like "boston museums|boston|5000|v6" (page > 0: "...|v6|p1")
+    """
+    norm_query = " ".join(query.lower().split())
+    norm_city = " ".join(city.lower().split())
+    key = f"{norm_query}|{norm_city}|{int(radius)}|v{PLACES_CACHE_SCHEMA}"
+    return f"{key}|p{page}" if page else key
+
+
+def get_cached_page(query: str, city: str, radius: int, page: int = 0) -> Optional[Dict]:
+    """
+    Returns a cached result page {"pois": [...], "has_next_page": bool}, or None on miss.
+    """
+    if not PLACES_CACHE_ENABLED:
+        return None
+    return places_cache.get(make_places_key(query, city, radius, page))
+
+
+def get_cached_places(query: str, city: str, radius: int) -> Optional[List[Dict]]:
+    """
+    Returns cached POIs of the first result page for a search, or None on miss.
+    """
+    entry = get_cached_page(query, city, radius)
+    return entry["pois"] if entry else None
+
+
+def store_places(query: str, city: str, radius: int, pois: List[Dict], page: int = 0, next_page_token: Optional[str] = None):
+    """
+    Stores the POIs returned for a search (one result page).
+
+    The page keeps only whether a next page exists; the token itself goes to the
+    short-lived token cache (see `get_page_token`).
+    """
+    key = make_places_key(query, city, radius, page)
+    if next_page_token:  # kept even with the page cache off: later pages need it
+        page_token_cache.set(key, {"token": next_page_token, "issued_at": time.time()})
+    if PLACES_CACHE_ENABLED:
+        places_cache.set(key, {"pois": pois, "has_next_page": bool(next_page_token)})
+
+
+def get_page_token(query: str, city: str, radius: int, page: int = 0) -> Optional[Dict]:
+    """
+    Returns the still-usable next_page_token issued with a page {"token", "issued_at"}, or None.
+    """
+    return page_token_cache.get(make_places_key(query, city, radius, page))
+
+
+def drop_page_token(query: str, city: str, radius: int, page: int = 0):
+    """
+    Forgets a page token Google rejected.
+    """
+    page_token_cache.delete(make_places_key(query, city, radius, page))
+
+
+def get_places_cache_stats() -> Dict:
+    """
+    Returns hit/miss counters of the Places cache.
+    """
+    return places_cache.stats()
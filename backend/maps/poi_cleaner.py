@@ -4,7 +4,7 @@ poi_cleaner.py · POI Geolocation Filter
 This module post-processes raw POIs retrieved from external sources
 (e.g. Google Maps API) by filtering out geographically distant outliers.
 
-It computes a rough city center by averaging all POI coordinates,
+It computes a robust city center (median or trimmed mean of all POI coordinates),
 then removes entries that fall outside a defined radius.
 
 Main Use Case:
@@ -14,28 +14,49 @@ and avoid suggesting irrelevant or faraway places.
 
 Key Features:
 -------------
-✅ Dynamic center calculation (mean latitude & longitude)  
-✅ Outlier detection via geodesic distance (km)  
+✅ Robust center estimate (median / trimmed mean), not dragged by outliers  
+✅ Outlier detection via vectorized haversine distance (km)  
 ✅ Safety fallback: reverts to original list if too many are removed  
+✅ Co-located POI grouping via spatial-index radius queries  
+✅ Cross-query de-duplication (stable id, then co-located + same name) with counters  
 ✅ Useful in cities with noisy or scattered data results
 
 Recommended Pairing:
 --------------------
 Place this module immediately after `fetcher.py` to sanitize POI results
-before feeding them to the recommendation fusion engine.
+before feeding them to the recommendation fusion engine:
+`clean_pois` → `dedupe_pois` → review crawl / fusion / scoring.
 
 Author: Tripllery AI Backend
 """
 
-from typing import List, Dict
-from geopy.distance import geodesic
-
-def clean_pois(pois: List[Dict], max_distance_km: float = 50.0, min_required: int = 5) -> List[Dict]:
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from services.utils.geo import coords_array, distances_from_km, robust_center
+from services.utils.spatial_index import SpatialIndex
+from maps.poi_identity import make_poi_id, normalize_name
+from crawler.review_stage import review_key
+
+# Two POIs closer than this (km) are treated as the same spot
+COLOCATED_RADIUS_KM = 0.05
+
+# Cumulative de-duplication counters (see `get_dedupe_stats`)
+_dedupe_totals = {
+    "calls": 0,
+    "input": 0,
+    "unique": 0,
+    "exact_duplicates": 0,
+    "colocated_duplicates": 0,
+    "review_crawls_saved": 0
+}
+
+def clean_pois(pois: List[Dict], max_distance_km: float = 50.0, min_required: int = 5, center_method: str = "median",
+               center: Optional[Tuple[float, float]] = None) -> List[Dict]:
     """
     Cleans a list of POIs by removing those too far from the city center estimate.
 
     This function:
-    - Computes a rough geographic center from all POIs
+    - Computes a robust geographic center from all POIs
     - Filters out POIs whose distance exceeds `max_distance_km`
     - Ensures a minimum number of POIs is kept, or falls back to the original list
 
@@ -43,6 +64,9 @@ def clean_pois(pois: List[Dict], max_distance_km: float = 50.0, min_required: in
         pois (List[Dict]): Raw list of POIs (must contain lat/lng for each entry)
         max_distance_km (float): Max distance from center in kilometers (default: 50.0)
         min_required (int): Minimum number of POIs needed after filtering (default: 5)
+        center_method (str): "median" or "trimmed" (see `services.utils.geo.robust_center`)
+        center (Tuple[float, float], optional): Known (lat, lng) center, e.g. of an existing
+                                                pool being extended; skips the estimate
 
     Returns:
         List[Dict]: Cleaned list of POIs within acceptable distance, or original list if fallback triggered.
@@ -51,22 +75,20 @@ def clean_pois(pois: List[Dict], max_distance_km: float = 50.0, min_required: in
     if not pois:
         return []
 
-    # Step 1️⃣ Estimate rough center of city based on average coordinates
-    avg_lat = sum(poi["lat"] for poi in pois) / len(pois)
-    avg_lng = sum(poi["lng"] for poi in pois) / len(pois)
-    center = (avg_lat, avg_lng)
+    # Step 1️⃣ Estimate a robust center of the city from all coordinates
+    coords = coords_array(pois)
+    center_arr = robust_center(coords, method=center_method) if center is None else np.asarray(center, dtype=float)
+    center = (float(center_arr[0]), float(center_arr[1]))
 
     print(f"📍 Estimated center: {center}")
 
-    # Step 2️⃣ Filter out POIs too far from estimated center
-    cleaned = []
-    for poi in pois:
-        poi_loc = (poi["lat"], poi["lng"])
-        distance = geodesic(center, poi_loc).kilometers
-        if distance <= max_distance_km:
-            cleaned.append(poi)
-        else:
-            print(f"⚠️ Removed outlier POI: {poi['name']} ({distance:.1f} km away)")
+    # Step 2️⃣ Filter out POIs too far from estimated center (one vectorized pass)
+    distances = distances_from_km(center_arr, coords)
+    keep_mask = distances <= max_distance_km
+
+    cleaned = [poi for poi, keep in zip(pois, keep_mask) if keep]
+    for idx in (~keep_mask).nonzero()[0]:
+        print(f"⚠️ Removed outlier POI: {pois[idx]['name']} ({distances[idx]:.1f} km away)")
 
     # Step 3️⃣ Fallback: If too few remain, return the original unfiltered list
     if len(cleaned) < min_required:
@@ -75,3 +97,135 @@ def clean_pois(pois: List[Dict], max_distance_km: float = 50.0, min_required: in
 
     print(f"✅ Cleaned POIs: {len(cleaned)} kept.")
     return cleaned
+
+
+def group_colocated_pois(pois: List[Dict], radius_km: float = COLOCATED_RADIUS_KM) -> List[List[int]]:
+    """
+    Groups POIs that sit on (almost) the same spot, e.g. one place returned by several queries.
+
+    Uses one radius query per POI on a spatial index; groups are transitive
+    (A near B, B near C → one group).
+
+    Args:
+        pois (List[Dict]): POIs with lat/lng
+        radius_km (float): Max distance between two POIs of a group (default: 50 m)
+
+    Returns:
+        List[List[int]]: Index groups with ≥ 2 members, each sorted ascending
+    """
+    index = SpatialIndex(pois)
+    parent = list(range(len(pois)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(pois)):
+        for j, _ in index.within_of(i, radius_km):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(pois)):
+        groups.setdefault(find(i), []).append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def dedupe_pois(pois: List[Dict], radius_km: float = COLOCATED_RADIUS_KM) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Removes POIs returned more than once (e.g. the same museum from "museums" and "art" queries).
+
+    Two passes:
+    - Exact: same stable id (Google place_id, or normalized name + rounded coordinates)
+    - Co-located: within `radius_km` of each other and the same name (one normalized
+      name equal to, or a word-prefix of, the other)
+
+    The first occurrence is kept (query order = relevance) and its missing fields
+    (rating, opening hours, photo, ...) are filled in from its duplicates.
+
+    Args:
+        pois (List[Dict]): Cleaned POIs (output of `clean_pois`)
+        radius_km (float): Co-location radius (default: 50 m)
+
+    Returns:
+        Tuple:
+            - List[Dict]: Unique POIs, in first-seen order
+            - Dict[str, int]: {"input", "unique", "exact_duplicates",
+                               "colocated_duplicates", "review_crawls_saved"}
+    """
+    # Step 1️⃣ Exact duplicates by stable id
+    by_id: Dict[str, Dict] = {}
+    dropped: List[Tuple[Dict, Dict]] = []  # (duplicate, kept)
+    for poi in pois:
+        poi_id = poi.get("id") or make_poi_id(poi)
+        kept = by_id.get(poi_id)
+        if kept is None:
+            by_id[poi_id] = {**poi, "id": poi_id}
+        else:
+            dropped.append((poi, kept))
+    unique = list(by_id.values())
+    exact_duplicates = len(dropped)
+
+    # Step 2️⃣ Co-located POIs with the same name
+    names = [normalize_name(poi.get("name", "")) for poi in unique]
+    removed = set()
+    for group in (group_colocated_pois(unique, radius_km) if len(unique) > 1 else []):
+        for pos, i in enumerate(group):
+            if i in removed:
+                continue
+            for j in group[pos + 1:]:
+                if j not in removed and _same_name(names[i], names[j]):
+                    removed.add(j)
+                    dropped.append((unique[j], unique[i]))
+    unique = [poi for idx, poi in enumerate(unique) if idx not in removed]
+
+    # Step 3️⃣ Keep the richest record: fill the survivor's missing fields
+    for duplicate, kept in dropped:
+        for key, value in duplicate.items():
+            if value and not kept.get(key) and key not in ("id", "place_id"):
+                kept[key] = value
+
+    stats = {
+        "input": len(pois),
+        "unique": len(unique),
+        "exact_duplicates": exact_duplicates,
+        "colocated_duplicates": len(removed),
+        # The review stage already crawls once per name|city, so only differently named duplicates save a crawl
+        "review_crawls_saved": len({review_key(dup) for dup, kept in dropped if review_key(dup) != review_key(kept)})
+    }
+    _dedupe_totals["calls"] += 1
+    for key, value in stats.items():
+        _dedupe_totals[key] += value
+
+    return unique, stats
+
+
+def _same_name(a: str, b: str) -> bool:
+    """
+    Equal normalized names, or a multi-word name that is a word-prefix of the other
+    ("museum of fine arts" / "museum of fine arts boston"). Empty names never match.
+    """
+    if a == b:
+        return bool(a)
+    short, long = (a, b) if len(a) <= len(b) else (b, a)
+    return bool(short) and len(short.split()) >= 2 and long.startswith(short + " ")
+
+
+def get_dedupe_stats() -> Dict[str, int]:
+    """
+    Returns cumulative de-duplication counters, including downstream work saved.
+
+    Every removed duplicate saves one highlight summary (LLM), one card build and
+    one scoring pass; `review_crawls_saved` counts the crawls avoided on top of the
+    review stage's own name|city de-duplication.
+    """
+    removed = _dedupe_totals["input"] - _dedupe_totals["unique"]
+    return {
+        **_dedupe_totals,
+        "removed": removed,
+        "llm_summaries_saved": removed,
+        "removed_ratio": round(removed / _dedupe_totals["input"], 4) if _dedupe_totals["input"] else 0.0
+    }
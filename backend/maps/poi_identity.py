@@ -0,0 +1,69 @@
+"""
+poi_identity.py · Stable, Content-Derived POI IDs
+
+This module derives deterministic POI ids, so the same place gets the same id
+on every request, for every query that returns it, and across restarts.
+
+- With a Google `place_id`: the id is derived from it.
+- Without one (e.g. other sources): from the normalized name plus coordinates
+  rounded to POI_ID_COORD_PRECISION decimals (4 ≈ 11 m).
+
+Main Use Case:
+--------------
+Used by:
+- `maps/fetcher.py` (ids assigned when POIs are fetched)
+- `maps/poi_cleaner.dedupe_pois` (cross-query de-duplication)
+- `agent/fusion.build_card` (card ids)
+
+Key Features:
+-------------
+✅ Same place → same id (card / plan caching, client-side reuse)
+✅ Unicode-, case- and punctuation-insensitive name normalization
+✅ Short, URL-safe ids in the existing "poi_…" format
+
+Author: Tripllery AI Backend
+"""
+
+import os
+import hashlib
+import unicodedata
+from typing import Dict
+
+POI_ID_COORD_PRECISION = int(os.getenv("POI_ID_COORD_PRECISION", "4"))
+POI_ID_HEX_LENGTH = 12
+
+def normalize_name(name: str) -> str:
+    """
+    "Café de Flore, Paris!" → "cafe de flore paris", "故宫 博物院" → "故宫 博物院"
+
+    Accents are dropped from Latin letters only; letters of every script are kept
+    (NFKC + casefold), punctuation becomes single spaces.
+    """
+    kept = []
+    for ch in unicodedata.normalize("NFKD", name or ""):
+        if unicodedata.combining(ch) and kept and kept[-1].isascii():
+            continue  # accent on a Latin letter
+        kept.append(ch)
+    folded = unicodedata.normalize("NFKC", "".join(kept)).casefold()
+    return " ".join("".join(
+        ch if ch.isalnum() or unicodedata.category(ch)[0] == "M" else " " for ch in folded
+    ).split())
+
+
+def make_poi_id(poi: Dict) -> str:
+    """
+    Returns the deterministic id of a POI.
+
+    Args:
+        poi (Dict): POI with "place_id", or "name" + "lat" / "lng"
+
+    Returns:
+        str: e.g. "poi_3f9a1c0b7d2e"
+    """
+    place_id = poi.get("place_id")
+    if place_id:
+        source = f"place:{place_id}"
+    else:
+        p = POI_ID_COORD_PRECISION
+        source = f"geo:{normalize_name(poi.get('name', ''))}|{round(float(poi['lat']), p)}|{round(float(poi['lng']), p)}"
+    return "poi_" + hashlib.sha1(source.encode("utf-8")).hexdigest()[:POI_ID_HEX_LENGTH]
@@ -20,16 +20,22 @@ Key Features:
 ✅ Intensity-aware minimum POI requirement  
 ✅ Smart defaults for timing + transport fallback  
 ✅ Output includes timeline + all plan generation options  
+✅ Per-day route optimization (optional fixed start, e.g. hotel)  
 ✅ Unified error handling for all edge cases
 
 Author: Tripllery AI Backend
 """
 
+import asyncio
 from quart import Blueprint, request, jsonify
 from services.formatter.formatter_llm import format_plan_with_llm
 from services.planner.resolver import rebalance_days
+from services.formatter.optimizer import optimize_day_order
 from services.utils.poi_math import get_min_required_pois
+from backend.services.utils.recommend_pool import get_pool, get_pois_by_ids
+from maps.photos import render_cards
 from datetime import datetime
+from typing import Dict, Optional
 
 plan_bp = Blueprint("plan", __name__)
 
@@ -79,6 +85,21 @@ def clean_time_str(t: str, fallback: str) -> str:
         return t
     return fallback
 
+def parse_start_location(value) -> Optional[Dict[str, float]]:
+    """
+    Validates an optional {"lat", "lng"} start point.
+
+    Args:
+        value: Raw request value
+
+    Returns:
+        dict or None: {"lat": float, "lng": float}, or None if missing / invalid
+    """
+    try:
+        return {"lat": float(value["lat"]), "lng": float(value["lng"])}
+    except (TypeError, KeyError, ValueError):
+        return None
+
 @plan_bp.route("/plan", methods=["POST"])
 async def generate_plan():
     """
@@ -86,11 +107,14 @@ async def generate_plan():
 
     Receives:
         - accepted_pois: List of selected POI IDs
-        - all_pois: Full POI objects
+        - all_pois: Full POI objects (optional, default: the accepted cards of the pool)
+        - pool_token: Session key from /recommend (required without all_pois, resolves IDs server-side)
         - start_datetime, end_datetime: ISO strings
         - intensity: "chill" / "normal" / "intense"
         - transportation: "car" / "public"
         - meal_options, wake_up_time, return_time, etc. (optional)
+        - start_location: {"lat": float, "lng": float} (optional, e.g. hotel; each day's route starts here)
+        - split_strategy: "llm" / "geo" / "round_robin" (optional, default from DAY_SPLIT_STRATEGY)
 
     Returns:
         JSON with:
@@ -103,9 +127,17 @@ async def generate_plan():
 
         accepted_poi_ids = data.get("accepted_pois", [])
         all_pois = data.get("all_pois", [])
+        pool_token = data.get("pool_token")
 
         if not accepted_poi_ids:
             return jsonify({"error": "accepted_pois (id list) is missing"}), 400
+        if not all_pois:
+            # No full objects sent → resolve the IDs from the session's pool
+            if not pool_token:
+                return jsonify({"error": "pool_token is required when all_pois is not sent."}), 400
+            if get_pool(pool_token) is None:
+                return jsonify({"error": "Recommendation pool expired or unknown pool_token."}), 404
+            all_pois = get_pois_by_ids(accepted_poi_ids, pool_token)
         if not all_pois:
             return jsonify({"error": "all_pois (full poi objects) are missing"}), 400
 
@@ -147,16 +179,29 @@ async def generate_plan():
         if total_days <= 0:
             return jsonify({"error": "End date must be after start date."}), 400
 
-        # 🔮 Generate rough LLM-based day split plan
-        rough_plan = await format_plan_with_llm(accepted_pois, days=total_days, transportation=transportation)
+        # 🔮 Generate rough day split plan (LLM or geographic)
+        start_location = parse_start_location(data.get("start_location"))
+        rough_plan = await format_plan_with_llm(
+            accepted_pois, days=total_days, transportation=transportation, start=start_location,
+            strategy=data.get("split_strategy")
+        )
         if not isinstance(rough_plan, dict):
             return jsonify({"error": "Generated rough_plan is not a valid dictionary."}), 500
 
         # 🔄 Rebalance using resolver logic
         final_plan = rebalance_days(rough_plan)
 
+        # 🧭 Re-route only the days the rebalancer regrouped; days kept as split are already routed
+        #    (CPU-bound → worker threads, off the event loop)
+        routed = {tuple(map(id, day_pois)) for day_pois in rough_plan.values() if isinstance(day_pois, list)}
+        regrouped = [day for day, day_pois in final_plan.items() if tuple(map(id, day_pois)) not in routed]
+        ordered_days = await asyncio.gather(*(
+            asyncio.to_thread(optimize_day_order, final_plan[day], start=start_location) for day in regrouped
+        ))
+        final_plan.update(zip(regrouped, ordered_days))
+
         return jsonify({
-            "plan": final_plan,
+            "plan": {day: render_cards(day_pois) for day, day_pois in final_plan.items()},
             "options": {
                 "start_time_of_day": start_time_of_day,
                 "avg_poi_duration": avg_poi_duration,
@@ -173,7 +218,8 @@ async def generate_plan():
                 }),
                 "intensity": intensity,
                 "wake_up_time": wake_up_time,
-                "return_time": return_time
+                "return_time": return_time,
+                "start_location": start_location
             }
         })
 
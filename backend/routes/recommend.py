@@ -5,33 +5,83 @@ This module defines the recommendation entry point for the Tripllery system.
 It receives user preference form data and returns a batch of AI-curated POI cards
 along with supporting metadata such as selection thresholds.
 
+With `view=compact`, `/recommend` ships only the first page as full cards plus a
+lightweight index (id, name, lat/lng, score) of the rest of the pool; clients
+load full records on demand via `/recommend/more` (by page or by `ids`).
+
 The route also supports pagination (`/recommend/more`) to load additional cards
-from a cached pool.
+from a cached pool (growing lazily built pools in the background as they run
+low), and a streaming variant (`/recommend/stream`) that emits cards as NDJSON
+as soon as each one is fused and scored.
 
 Main Use Case:
 --------------
 Frontend ➜ POST to `/recommend` when form is submitted.
 Displays initial cards and stores all-pool locally.
 Frontend ➜ GET `/recommend/more` to page more options.
+Frontend ➜ POST to `/recommend/stream` to render cards progressively.
+Frontend ➜ GET `/recommend/profile` to read the background-computed travel style.
+Frontend ➜ GET `/recommend/nearby` to list cards close to a card or a point.
 
 Key Features:
 -------------
 ✅ LLM-powered recommendation agent  
 ✅ Travel intensity-based `min_required` POI calculation  
 ✅ Smart fallback for meal settings  
-✅ POI card pool cached server-side for pagination  
-✅ Returns full POI metadata for plan generation
+✅ POI card pool cached server-side per session (`pool_token`) for pagination  
+✅ Returns full POI metadata for plan generation  
+✅ Compact response mode: one page of full cards + a lightweight pool index
+✅ NDJSON streaming for low time-to-first-card
+✅ Demand-driven pool growth: `/recommend/more` expands the pool before it runs dry
+✅ k-nearest / radius lookups over the pool via a spatial index
 
 Author: Tripllery AI Backend
 """
 
-from quart import Blueprint, request, jsonify
-from backend.services.agent.recommender import recommend_agent
-from backend.services.utils.recommend_pool import cache_card_pool, get_next_batch
+import os
+import asyncio
+from quart import Blueprint, Response, request, jsonify
+from backend.services.agent.recommender import (
+    recommend_agent, recommend_agent_stream, schedule_pool_expansion, pool_can_grow, is_expanding,
+    RECOMMEND_PAGE_SIZE, RECOMMEND_EXPAND_THRESHOLD
+)
+from backend.services.utils.recommend_pool import (
+    cache_card_pool, get_next_batch, get_pool, get_pool_index, new_pool_token, get_session_profile,
+    get_pois_by_ids, compact_card_index
+)
 from backend.services.utils.poi_math import get_min_required_pois
+from services.utils.response_codec import dumps_bytes
+from maps.photos import render_card, render_cards
 
 recommend_bp = Blueprint("recommend", __name__)
 
+# 📦 Default /recommend response shape when the request has no `view` param: "full" or "compact"
+RECOMMEND_RESPONSE_VIEW = os.getenv("RECOMMEND_RESPONSE_VIEW", "full")
+
+# 🔢 Most card ids one `/recommend/more?ids=` request may ask for
+RECOMMEND_MAX_IDS = RECOMMEND_PAGE_SIZE * 4
+
+# ⏳ Max seconds /recommend/more waits for a running expansion when the page would come back short
+RECOMMEND_EXPAND_WAIT = float(os.getenv("RECOMMEND_EXPAND_WAIT", "8"))
+
+
+def apply_meal_defaults(form_data: dict) -> dict:
+    """
+    Fills in default meal settings when the form omits them.
+
+    Args:
+        form_data (dict): Raw form input
+
+    Returns:
+        dict: The same form_data with `meal_options` set
+    """
+    form_data["meal_options"] = form_data.get("meal_options", {
+        "include_breakfast": True,
+        "include_lunch": True,
+        "include_dinner": True
+    })
+    return form_data
+
 @recommend_bp.route("/recommend", methods=["POST"])
 async def recommend_cards():
     """
@@ -43,11 +93,18 @@ async def recommend_cards():
                 - destination, start_datetime, end_datetime
                 - interest_keywords, intensity, meal_options (optional)
 
+    Query Params:
+        - view: "full" | "compact" → response shape (default: RECOMMEND_RESPONSE_VIEW)
+
     Returns:
         JSON: {
             cards: [first 12 cards for display],
-            all_pois: [entire recommended POI pool],
-            min_required: int (minimum number of POIs needed based on duration + intensity)
+            all_pois: [recommended POI pool built so far]                    ← view=full
+            index: [{id, name, lat, lng, score} for the other cards]         ← view=compact
+            min_required: int (minimum number of POIs needed based on duration + intensity),
+            pool_token: str (session key of the cached pool),
+            pool_size: int (cards in the pool right now),
+            has_more: bool (more cards exist or can still be built via /recommend/more)
         }
     """
     try:
@@ -55,12 +112,7 @@ async def recommend_cards():
         print("🧾 Received form_data:", form_data)
 
         # ✅ Default meal settings fallback
-        meal_options = form_data.get("meal_options", {
-            "include_breakfast": True,
-            "include_lunch": True,
-            "include_dinner": True
-        })
-        form_data["meal_options"] = meal_options
+        apply_meal_defaults(form_data)
 
         # ✅ Calculate POI selection threshold
         start = form_data.get("start_datetime")
@@ -69,46 +121,244 @@ async def recommend_cards():
         min_required = get_min_required_pois(intensity, start, end)
 
         # ✅ LLM-based POI recommendation + cache
-        card_pool = await recommend_agent(form_data)
-        cache_card_pool(card_pool)
+        pool_token = new_pool_token()
+        card_pool = await recommend_agent(form_data, pool_token=pool_token)  # also caches the pool under the token
 
-        return jsonify({
-            "cards": card_pool[:12],         # Initial 12 for swipe or grid view
-            "all_pois": card_pool,           # Full pool for selection / backup
-            "min_required": min_required     # Frontend uses this to enforce limits
-        })
+        response = {
+            "cards": render_cards(card_pool[:RECOMMEND_PAGE_SIZE]),  # Initial 12 for swipe or grid view
+            "min_required": min_required,    # Frontend uses this to enforce limits
+            "pool_token": pool_token,        # Session key for /recommend/more and /plan
+            "pool_size": len(card_pool),
+            "has_more": len(card_pool) > RECOMMEND_PAGE_SIZE or pool_can_grow(pool_token)
+        }
+        if request.args.get("view", RECOMMEND_RESPONSE_VIEW) == "compact":
+            response["index"] = compact_card_index(card_pool[RECOMMEND_PAGE_SIZE:])  # Rest of the pool, light
+        else:
+            response["all_pois"] = render_cards(card_pool)  # Pool built so far, for selection / backup
+
+        return jsonify(response)
 
     except Exception as e:
         print("💥 Recommend API error:", e)
         return jsonify({"error": str(e)}), 500
 
 
+@recommend_bp.route("/recommend/stream", methods=["POST"])
+async def recommend_cards_stream():
+    """
+    Endpoint: POST /recommend/stream
+
+    Same input as `/recommend`, but streams the result as NDJSON
+    (one JSON object per line) so the first cards render immediately.
+
+    Returns:
+        application/x-ndjson lines:
+            {"type": "card", "card": {...}}                 ← one per card, as soon as it is scored
+            {"type": "summary", "min_required": int,
+             "total_cards": int, "pool_token": str}          ← after the last card (pool is cached)
+            {"type": "error", "error": str}                  ← only if the pipeline fails
+    """
+    form_data = await request.get_json()
+    print("🧾 Received form_data (stream):", form_data)
+
+    apply_meal_defaults(form_data)
+    min_required = get_min_required_pois(
+        form_data.get("intensity", "normal"),
+        form_data.get("start_datetime"),
+        form_data.get("end_datetime")
+    )
+
+    pool_token = new_pool_token()
+
+    async def generate():
+        try:
+            async for kind, payload in recommend_agent_stream(form_data, pool_token=pool_token):
+                if kind == "card":
+                    yield _ndjson({"type": "card", "card": render_card(payload)})
+                elif kind == "pool":
+                    cache_card_pool(payload, pool_token)
+                    yield _ndjson({
+                        "type": "summary",
+                        "min_required": min_required,
+                        "total_cards": len(payload),
+                        "pool_token": pool_token
+                    })
+        except Exception as e:
+            print("💥 Recommend stream error:", e)
+            yield _ndjson({"type": "error", "error": str(e)})
+
+    response = Response(generate(), mimetype="application/x-ndjson")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # disable proxy buffering
+    return response
+
+
+def _ndjson(event: dict) -> bytes:
+    return dumps_bytes(event) + b"\n"
+
+
 @recommend_bp.route("/recommend/more", methods=["GET"])
 async def recommend_more_cards():
     """
     Endpoint: GET /recommend/more
 
     Provides paginated POI cards from the previously cached pool.
-    Used when frontend scrolls or requests more cards.
+    Used when frontend scrolls or requests more cards, or (with `ids`) to load
+    the full records of cards listed in a compact `/recommend` index.
+
+    For lazily built pools, fewer than RECOMMEND_EXPAND_THRESHOLD unseen cards
+    after this page start a background expansion (next reservoir batch / Places
+    pages). A page that would come back short waits up to RECOMMEND_EXPAND_WAIT
+    seconds for that expansion.
 
     Query Params:
         - start: int → index to start from
         - size: int → number of cards to return
+        - pool_token: str → session key returned by /recommend (required)
+        - ids: str (optional) → comma-separated card ids (at most RECOMMEND_MAX_IDS); returns those cards
+                                  instead of a page
 
     Returns:
         JSON: {
-            cards: [next N cards from server-side pool]
+            cards: [next N cards from server-side pool],                ← with ids: {cards: [requested cards]}
+            has_more: bool (cards beyond this page exist or can still be built),
+            expanding: bool (an expansion is running; poll again for its cards)
         }
     """
     try:
         start = int(request.args.get("start", 0))
         size = int(request.args.get("size", 6))
-        more_cards = get_next_batch(start, size)
+        pool_token = request.args.get("pool_token")
+
+        if not pool_token:
+            return jsonify({"error": "pool_token is required."}), 400
+        if get_pool(pool_token) is None:
+            return jsonify({"error": "Recommendation pool expired or unknown pool_token."}), 404
+
+        ids = request.args.get("ids")
+        if ids:
+            ids = list(dict.fromkeys(id_ for id_ in ids.split(",") if id_))
+            if len(ids) > RECOMMEND_MAX_IDS:
+                return jsonify({"error": f"At most {RECOMMEND_MAX_IDS} ids per request."}), 400
+            return jsonify({"cards": render_cards(get_pois_by_ids(ids, pool_token))})
+
+        more_cards = get_next_batch(start, size, pool_token)
+        pool_size = len(get_pool(pool_token) or [])
+
+        expansion = None
+        if pool_size - (start + size) < RECOMMEND_EXPAND_THRESHOLD:
+            expansion = schedule_pool_expansion(pool_token)
+
+        # Short page: give a running expansion a moment to fill it
+        if expansion is not None and len(more_cards) < size:
+            try:
+                await asyncio.wait_for(asyncio.shield(expansion), timeout=RECOMMEND_EXPAND_WAIT)
+            except asyncio.TimeoutError:
+                print(f"⏱️ Pool expansion still running after {RECOMMEND_EXPAND_WAIT}s")
+            more_cards = get_next_batch(start, size, pool_token)
+            pool_size = len(get_pool(pool_token) or [])
 
         return jsonify({
-            "cards": more_cards
+            "cards": render_cards(more_cards),
+            "has_more": pool_size > start + size or pool_can_grow(pool_token),
+            "expanding": is_expanding(pool_token)
         })
 
     except Exception as e:
         print("💥 Recommend More error:", e)
         return jsonify({"error": str(e)}), 500
+
+
+@recommend_bp.route("/recommend/profile", methods=["GET"])
+async def recommend_profile():
+    """
+    Endpoint: GET /recommend/profile
+
+    Returns the background enrichment computed after `/recommend` responded
+    (travel style classification + feedback-learned tags).
+
+    Query Params:
+        - pool_token: str → session key returned by /recommend
+
+    Returns:
+        JSON: {
+            status: "ready" | "pending",
+            profile: {style: {...}, feedback: {...}} or null
+        }
+        404 if the pool is unknown or expired (its profile would never arrive)
+    """
+    pool_token = request.args.get("pool_token")
+    if not pool_token:
+        return jsonify({"error": "pool_token is required."}), 400
+    if get_pool(pool_token) is None:
+        return jsonify({"error": "Recommendation pool expired or unknown pool_token."}), 404
+
+    profile = get_session_profile(pool_token)
+    return jsonify({
+        "status": "ready" if profile else "pending",
+        "profile": profile
+    })
+
+
+@recommend_bp.route("/recommend/nearby", methods=["GET"])
+async def recommend_nearby():
+    """
+    Endpoint: GET /recommend/nearby
+
+    Lists cards of a cached pool close to one of its cards or to a point.
+    With `radius_km` it is a radius query (optionally capped at `k`),
+    otherwise it returns the `k` nearest cards.
+
+    Query Params:
+        - pool_token: str → session key returned by /recommend (required)
+        - poi_id: str → card to search around (excluded from results), or
+        - lat, lng: float → point to search around
+        - radius_km: float (optional) → search radius
+        - k: int (optional, default 5) → max number of cards
+
+    Returns:
+        JSON: {
+            cards: [{...card, "distance_km": float}, ...]  ← closest first
+        }
+    """
+    try:
+        pool_token = request.args.get("pool_token")
+        if not pool_token:
+            return jsonify({"error": "pool_token is required."}), 400
+
+        index = get_pool_index(pool_token)
+        if index is None:
+            return jsonify({"error": "Recommendation pool expired or unknown pool_token."}), 404
+
+        poi_id = request.args.get("poi_id")
+        radius_km = request.args.get("radius_km", type=float)
+        k = request.args.get("k", type=int)
+
+        if poi_id:
+            position = index.position_of(poi_id)
+            if position is None:
+                return jsonify({"error": f"Unknown poi_id: {poi_id}"}), 404
+            if radius_km is not None:
+                matches = index.within_of(position, radius_km)
+            else:
+                matches = index.nearest_to(position, k=k or 5)
+        else:
+            lat = request.args.get("lat", type=float)
+            lng = request.args.get("lng", type=float)
+            if lat is None or lng is None:
+                return jsonify({"error": "Either poi_id or lat/lng is required."}), 400
+            if radius_km is not None:
+                matches = index.within(lat, lng, radius_km)
+            else:
+                matches = index.nearest(lat, lng, k=k or 5)
+
+        if radius_km is not None and k:
+            matches = matches[:k]
+
+        return jsonify({
+            "cards": [{**render_card(index.pois[i]), "distance_km": round(distance, 3)} for i, distance in matches]
+        })
+
+    except Exception as e:
+        print("💥 Recommend Nearby error:", e)
+        return jsonify({"error": str(e)}), 500
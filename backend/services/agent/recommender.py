@@ -4,16 +4,26 @@ recommender.py · Tripllery V3 Full Recommendation Agent
 This module defines the intelligent pipeline behind the Tripllery recommendation system.
 
 It processes user form input through:
-- Intent parsing (from LLM or form)
+- Intent parsing (from LLM or form, async with timeout)
 - Query generation for Google Maps searches
-- POI fetching and cleaning
+- POI fetching, cleaning and cross-query de-duplication
 - Xiaohongshu mock scraping
 - LLM-powered highlight fusion
-- Card scoring and travel style classification
+- Personalized card scoring (interests, later travel style) and style classification
 - Feedback learning for interest tags
 
 The result is a sorted list of personalized POI cards that reflect the user's interests and trip context.
 
+The steps are declared as a stage graph (see `stage_graph.py`): the response is
+returned as soon as cards are scored, while style classification and feedback
+learning run in the background and are stored per session (`pool_token`).
+
+With a lazy pool (RECOMMEND_LAZY_POOL=1), only the first page plus a small
+lookahead is enriched (reviews + LLM + scoring) up front. The remaining POIs are
+kept in a per-session reservoir, and `expand_pool` enriches them in batches, pulling
+further Places result pages when the reservoir runs dry. `/recommend/more`
+triggers this in the background when the unseen part of the pool runs low.
+
 Main Use Case:
 --------------
 Called by the `/recommend` API to generate an initial card pool.
@@ -21,92 +31,473 @@ Called by the `/recommend` API to generate an initial card pool.
 Author: Tripllery AI Backend
 """
 
-from agent.llm_intent import parse_form_input
+import os
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from agent.llm_intent import parse_form_input_async, DEFAULT_KEYWORDS
 from agent.query_generator import generate_queries
-from maps.fetcher import search_google_maps
-from maps.poi_cleaner import clean_pois
-from crawler.xiaohongshu import fetch_reviews_for_poi
-from agent.fusion import fuse_cards_async
-from backend.services.utils.score_cards import score_cards
+from maps.fetcher import search_all_queries_async, fetch_places_page, MAPS_QUERY_TIMEOUT
+from maps.places_cache import get_places_cache_stats
+from maps.poi_cleaner import clean_pois, dedupe_pois
+from crawler.review_stage import gather_reviews_async
+from agent.fusion import fuse_cards_async, fuse_cards_stream
+from backend.services.utils.score_cards import CardMatrix, score_cards, compute_score, make_score_profile
 from backend.services.agent.style_classifier import classify_travel_style
 from backend.services.agent.feedback_learner import learn_from_feedback
+from backend.services.agent.stage_graph import Stage, run_stage_graph
+from backend.services.utils.recommend_pool import (
+    cache_card_pool, store_session_profile, get_pool, append_to_pool, store_pool_reservoir, get_pool_reservoir, rescore_unranked,
+    update_pool_reservoir, claim_pool_expansion, release_pool_expansion, is_expansion_claimed
+)
+from services.utils.geo import coords_array, robust_center
+
+# 🔥 While the LLM extracts keywords, pre-fetch Maps results for the fallback keyword set
+INTENT_PREWARM_DEFAULT_QUERIES = os.getenv("INTENT_PREWARM_DEFAULT_QUERIES", "0") == "1"
+
+# 🐢 Lazy pool: enrich only the first page + lookahead up front, grow on demand
+RECOMMEND_LAZY_POOL = os.getenv("RECOMMEND_LAZY_POOL", "1") == "1"
+RECOMMEND_PAGE_SIZE = int(os.getenv("RECOMMEND_PAGE_SIZE", "12"))
+RECOMMEND_LOOKAHEAD = int(os.getenv("RECOMMEND_LOOKAHEAD", "12"))
+# Cards enriched per expansion, and the unseen-card count below which /recommend/more expands
+RECOMMEND_EXPAND_BATCH = int(os.getenv("RECOMMEND_EXPAND_BATCH", "12"))
+RECOMMEND_EXPAND_THRESHOLD = int(os.getenv("RECOMMEND_EXPAND_THRESHOLD", "12"))
+# Failed page fetches (timeouts, API / token errors) after which a query is given up
+RECOMMEND_PAGE_MAX_FAILURES = int(os.getenv("RECOMMEND_PAGE_MAX_FAILURES", "3"))
+# Results kept per query: eager pools keep the top 5, lazy pools the whole first page
+MAPS_RESULTS_PER_QUERY = int(os.getenv("MAPS_RESULTS_PER_QUERY", "20"))
 
-async def recommend_agent(form_data: dict) -> list:
+# ✨ Strong references to prewarm searches that outlive their request
+_prewarm_tasks = set()
+
+# 🌱 Running pool expansions: pool_token → task (at most one per pool and worker)
+_expansion_tasks: Dict[str, asyncio.Task] = {}
+
+async def recommend_agent(form_data: dict, pool_token: Optional[str] = None) -> list:
     """
     Runs the full multi-stage recommendation process for a user's trip preferences.
 
+    The pipeline runs as a stage graph: independent stages overlap, and the
+    call returns as soon as scored cards exist. Style classification and
+    feedback learning continue in the background and are stored for the session.
+
     Args:
         form_data (dict): Raw form input submitted by the frontend, containing:
             - destination, stopovers, interest_keywords
             - transportation, start/end dates, trip_preferences, etc.
+        pool_token (str, optional): Session key under which the card pool and background enrichment are stored
 
     Returns:
         list: A sorted list of Tinder-style POI card dictionaries, ready for display and selection.
     """
     try:
-        # Step 1️⃣ Parse form into structured intent
-        intent = parse_form_input(form_data)
-        destination = intent.get("destination")
-        stopovers = intent.get("stopovers", [])
-        interest_keywords = intent.get("interest_keywords", [])
-        trip_note = form_data.get("trip_preferences", "")
-        transportation = intent.get("transportation")
-        start_datetime = intent.get("start_datetime")
-        end_datetime = intent.get("end_datetime")
-
-        # Step 2️⃣ Generate search queries for all cities
-        all_queries = generate_queries(destination, stopovers, interest_keywords)
-
-        # Step 3️⃣ Run Google Maps searches
-        all_pois = []
-        for city, queries in all_queries.items():
-            for query in queries:
-                pois = search_google_maps(query=query, city=city)
-                all_pois.extend(pois)
-
-        print(f"🗺️ Total POIs fetched: {len(all_pois)}")
-
-        # Step 4️⃣ Clean geographically distant POIs
-        all_pois = clean_pois(all_pois)
-        print(f"🧹 POIs cleaned: {len(all_pois)}")
-
-        # Step 5️⃣ Simulate Xiaohongshu review crawling
-        review_lookup = {}
-        for poi in all_pois:
-            name = poi["name"]
-            city = poi.get("city", "")
-            scraped = fetch_reviews_for_poi(name, city)
-            if scraped["raw_texts"]:
-                review_lookup[name] = {
-                    "raw_text": scraped["raw_texts"][0],
-                    "links": scraped.get("links", [])
-                }
-
-        print(f"🧠 Crawled reviews for {len(review_lookup)} POIs")
-
-        # Step 6️⃣ Fuse POIs + reviews into highlight-rich cards
-        raw_card_pool = await fuse_cards_async(all_pois, review_lookup)
-        print(f"🎴 Built raw card pool: {len(raw_card_pool)} cards")
-
-        # Step 7️⃣ Score and sort cards
-        scored_card_pool = score_cards(raw_card_pool)
-        print(f"🏆 Scored and sorted cards")
-
-        # Step 8️⃣ Classify user's travel style (theme, tone, tags)
-        style_info = await classify_travel_style(trip_note, scored_card_pool)
-        print(f"🎨 Classified user style: {style_info}")
-
-        # Step 9️⃣ Update tags via feedback (empty click history for now)
-        feedback_info = await learn_from_feedback(
-            liked_pois=[],
-            disliked_pois=[],
-            current_tags=style_info.get("tags", [])
+        results = await run_stage_graph(
+            PRE_FUSION_STAGES + FUSION_STAGES + ENRICHMENT_STAGES,
+            inputs={"form": form_data, "pool_token": pool_token},
+            on_background_done=_profile_saver(pool_token)
         )
-        print(f"🔄 Updated feedback tags: {feedback_info}")
 
         # ✅ Return final scored and sorted card pool
-        return scored_card_pool
+        return results["scored"]
 
     except Exception as e:
         print(f"💥 Recommender error: {e}")
         raise e
+
+
+async def recommend_agent_stream(form_data: dict, pool_token: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming variant of `recommend_agent`.
+
+    Cards are yielded (already scored) as soon as each fusion chunk finishes,
+    instead of waiting for the whole pool.
+
+    Args:
+        form_data (dict): Same form input as `recommend_agent`
+        pool_token (str, optional): Session key under which background enrichment is stored
+
+    Yields:
+        Tuple[str, Any]:
+            - ("card", card_dict) for every fused + scored card
+            - ("pool", sorted_card_pool) once all cards are ready
+    """
+    try:
+        results = await run_stage_graph(PRE_FUSION_STAGES, inputs={"form": form_data, "pool_token": pool_token})
+
+        # Step 6️⃣–7️⃣ Fuse chunk by chunk, score each card as it arrives
+        indexed_cards = []
+        async for cards in fuse_cards_stream(results["initial"], results["reviews"]):
+            for idx, card in cards:
+                card["score"] = compute_score(card, results["score_profile"])
+                indexed_cards.append((idx, card))
+                yield "card", card
+
+        # 🔁 Restore input order before the stable sort so ties break exactly like `score_cards`
+        card_pool = [card for _, card in sorted(indexed_cards, key=lambda pair: pair[0])]
+        scored_card_pool = sorted(card_pool, key=lambda card: card["score"], reverse=True)
+        print(f"🏆 Streamed and scored {len(scored_card_pool)} cards")
+
+        # Step 8️⃣–9️⃣ Enrichment runs in the background
+        await run_stage_graph(
+            ENRICHMENT_STAGES,
+            inputs={"form": form_data, "scored": scored_card_pool,
+                    "score_profile": results["score_profile"], "pool_token": pool_token},
+            on_background_done=_profile_saver(pool_token)
+        )
+        yield "pool", scored_card_pool
+
+    except Exception as e:
+        print(f"💥 Recommender stream error: {e}")
+        raise e
+
+
+def _profile_saver(pool_token: Optional[str]):
+    """
+    Builds the callback that stores background enrichment results for a session.
+    """
+    def save(background_results: Dict[str, Any]):
+        profile = {
+            "style": background_results.get("style"),
+            "feedback": background_results.get("feedback")
+        }
+        print(f"🎨 Session profile ready: {profile}")
+        if pool_token:
+            store_session_profile(pool_token, profile)
+    return save
+
+
+# =============================
+# 🧩 STAGE FUNCTIONS
+# =============================
+
+def _start_default_prewarm(results: Dict[str, Any]) -> Optional[asyncio.Task]:
+    """
+    Starts Maps searches for the fallback keyword set while the LLM extracts keywords.
+    Returns the running task (or None) so `maps` only waits for it if it is actually used.
+    """
+    form_data = results["form"]
+    if not (INTENT_PREWARM_DEFAULT_QUERIES and form_data.get("trip_preferences", "").strip()):
+        return None
+
+    default_queries = generate_queries(
+        form_data.get("destination"), form_data.get("stopovers", []), DEFAULT_KEYWORDS
+    )
+    task = asyncio.ensure_future(search_all_queries_async(default_queries, **_maps_search_options()))
+    _prewarm_tasks.add(task)
+    task.add_done_callback(_prewarm_tasks.discard)
+    return task
+
+
+def _maps_search_options() -> Dict[str, Any]:
+    if RECOMMEND_LAZY_POOL:
+        return {"limit": MAPS_RESULTS_PER_QUERY, "round_robin": True}
+    return {}
+
+
+def _build_queries(results: Dict[str, Any]) -> Dict[str, List[str]]:
+    intent = results["intent"]
+    return generate_queries(
+        intent.get("destination"), intent.get("stopovers", []), intent.get("interest_keywords", [])
+    )
+
+
+async def _search_maps(results: Dict[str, Any]) -> List[Dict]:
+    warm_task = results["prewarm"]
+    if warm_task is not None and results["intent"].get("interest_keywords") == DEFAULT_KEYWORDS:
+        all_pois = await warm_task  # fallback keywords → reuse the pre-fetched results
+    else:
+        all_pois = await search_all_queries_async(results["queries"], **_maps_search_options())
+
+    print(f"🗺️ Total POIs fetched: {len(all_pois)}")
+    print(f"📦 Places cache stats: {get_places_cache_stats()}")
+    return all_pois
+
+
+def _clean(results: Dict[str, Any]) -> List[Dict]:
+    cleaned = clean_pois(results["maps"])
+    print(f"🧹 POIs cleaned: {len(cleaned)}")
+    return cleaned
+
+
+def _dedupe(results: Dict[str, Any]) -> List[Dict]:
+    unique, dedupe_stats = dedupe_pois(results["clean"])
+    print(f"🧬 Dedupe stats: {dedupe_stats}")
+    return unique
+
+
+def _build_score_profile(results: Dict[str, Any]) -> Dict:
+    form = results["form"]
+    return make_score_profile(
+        interests=results["intent"].get("interest_keywords"),
+        style_tags=form.get("style_tags"),
+        weights=form.get("score_weights")
+    )
+
+
+def _select_initial(results: Dict[str, Any]) -> List[Dict]:
+    unique = results["unique"]
+    if not RECOMMEND_LAZY_POOL:
+        return unique
+    initial = unique[:RECOMMEND_PAGE_SIZE + RECOMMEND_LOOKAHEAD]
+    print(f"🐢 Lazy pool: enriching {len(initial)} of {len(unique)} POIs up front")
+    return initial
+
+
+def _store_reservoir(results: Dict[str, Any]) -> int:
+    pool_token, unique = results["pool_token"], results["unique"]
+    if not (RECOMMEND_LAZY_POOL and pool_token):
+        return 0
+
+    queries = [[city, query] for city, city_queries in results["queries"].items() for query in city_queries]
+    pending = unique[len(results["initial"]):]
+    store_pool_reservoir(pool_token, {
+        "pending": pending,
+        "queries": queries,
+        "pages": {f"{city}|{query}": 1 for city, query in queries},  # next page to fetch (None = exhausted)
+        "page_failures": {},  # query key → failed fetches of its next page
+        "seen_ids": [poi["id"] for poi in unique],
+        "exhausted": False,
+        "score_profile": results["score_profile"]
+    })
+    return len(pending)
+
+
+async def _gather_reviews(results: Dict[str, Any]) -> Dict:
+    reviews, review_stats = await gather_reviews_async(results["initial"])
+    print(f"🧠 Crawled reviews: {review_stats}")
+    return reviews
+
+
+async def _fuse(results: Dict[str, Any]) -> List[Dict]:
+    raw_card_pool = await fuse_cards_async(results["initial"], results["reviews"])
+    print(f"🎴 Built raw card pool: {len(raw_card_pool)} cards")
+    return raw_card_pool
+
+
+def _score(results: Dict[str, Any]) -> List[Dict]:
+    # Only the first page is ranked now; /recommend/more ranks the rest page by page
+    cards, pool_token = results["cards"], results["pool_token"]
+    matrix = CardMatrix(cards)
+    scored_card_pool = score_cards(cards, results["score_profile"], limit=RECOMMEND_PAGE_SIZE, matrix=matrix)
+    print(f"🏆 Scored and ranked cards")
+
+    # The pool keeps the matrix (rows in pool order), so paging, re-scoring and growth never rebuild it
+    if pool_token:
+        rows = {id(card): row for row, card in enumerate(cards)}
+        cache_card_pool(scored_card_pool, pool_token, ranked=RECOMMEND_PAGE_SIZE,
+                        matrix=matrix.permuted([rows[id(card)] for card in scored_card_pool]))
+    return scored_card_pool
+
+
+async def _classify_style(results: Dict[str, Any]) -> Dict:
+    return await classify_travel_style(results["form"].get("trip_preferences", ""), results["scored"])
+
+
+def _restyle(results: Dict[str, Any]) -> int:
+    """
+    Adds the classified travel-style tags to the scoring profile and re-scores the unserved cards.
+    """
+    pool_token, style_tags = results["pool_token"], (results["style"] or {}).get("tags")
+    if not (pool_token and style_tags):
+        return 0
+
+    profile = make_score_profile(results["score_profile"]["interests"], style_tags, results["score_profile"]["weights"])
+    update_pool_reservoir(pool_token, {"score_profile": profile})
+
+    rescored = rescore_unranked(pool_token, profile)
+    print(f"🎯 Re-scored {rescored} unserved cards with style tags {style_tags}")
+    return rescored
+
+
+async def _learn_feedback(results: Dict[str, Any]) -> Dict:
+    # Empty click history for now
+    return await learn_from_feedback(
+        liked_pois=[],
+        disliked_pois=[],
+        current_tags=(results["style"] or {}).get("tags", [])
+    )
+
+
+# =============================
+# 🗺️ STAGE GRAPH
+# =============================
+
+# Step 1️⃣–5️⃣ Intent (∥ default-query prewarm) → queries → maps → cleaning → de-dup
+#            → initial slice (lazy pool; the rest goes to the reservoir) → reviews
+PRE_FUSION_STAGES = [
+    Stage("intent", lambda results: parse_form_input_async(results["form"]), deps=["form"]),
+    Stage("prewarm", _start_default_prewarm, deps=["form"]),
+    Stage("queries", _build_queries, deps=["intent"]),
+    Stage("maps", _search_maps, deps=["queries", "prewarm"]),
+    Stage("clean", _clean, deps=["maps"]),
+    Stage("unique", _dedupe, deps=["clean"]),
+    Stage("initial", _select_initial, deps=["unique"]),
+    Stage("score_profile", _build_score_profile, deps=["form", "intent"]),
+    Stage("reservoir", _store_reservoir, deps=["pool_token", "unique", "initial", "queries", "score_profile"]),
+    Stage("reviews", _gather_reviews, deps=["initial"])
+]
+
+# Step 6️⃣–7️⃣ Fusion → scoring (the response goes out after this)
+FUSION_STAGES = [
+    Stage("cards", _fuse, deps=["initial", "reviews"]),
+    Stage("scored", _score, deps=["cards", "score_profile", "pool_token"])
+]
+
+# Step 8️⃣–9️⃣ Non-essential enrichment, off the critical path
+ENRICHMENT_STAGES = [
+    Stage("style", _classify_style, deps=["form", "scored"], background=True),
+    Stage("feedback", _learn_feedback, deps=["style"], background=True),
+    Stage("restyle", _restyle, deps=["style", "score_profile", "pool_token"], background=True)
+]
+
+
+# =============================
+# 🌱 LAZY POOL EXPANSION
+# =============================
+
+def schedule_pool_expansion(pool_token: str) -> Optional[asyncio.Task]:
+    """
+    Starts `expand_pool` in the background unless one is already running for this pool.
+
+    Returns:
+        asyncio.Task or None: The running expansion, or None if the pool cannot grow
+    """
+    task = _expansion_tasks.get(pool_token)
+    if task is not None and not task.done():
+        return task
+    if not pool_can_grow(pool_token):
+        return None
+
+    task = asyncio.ensure_future(expand_pool(pool_token))
+    _expansion_tasks[pool_token] = task
+    task.add_done_callback(lambda _: _expansion_tasks.pop(pool_token, None))
+    return task
+
+
+def pool_can_grow(pool_token: str) -> bool:
+    """
+    True if the pool still has raw POIs waiting, or Places pages left to pull.
+    """
+    reservoir = get_pool_reservoir(pool_token)
+    return bool(reservoir and (reservoir["pending"] or not reservoir["exhausted"]))
+
+
+def is_expanding(pool_token: str) -> bool:
+    """
+    True while this worker, or any other worker sharing the pool store, expands the pool.
+    """
+    task = _expansion_tasks.get(pool_token)
+    return (task is not None and not task.done()) or is_expansion_claimed(pool_token)
+
+
+async def expand_pool(pool_token: str, batch_size: int = RECOMMEND_EXPAND_BATCH) -> int:
+    """
+    Enriches the next batch of a lazily built pool and appends it to the pool.
+
+    Takes raw POIs from the session reservoir; if fewer than `batch_size` are
+    waiting, pulls further Places result pages first. The batch then goes through
+    the same review → fusion → scoring stages as the initial pool.
+
+    Runs only while holding the pool's expansion claim (`claim_pool_expansion`),
+    so two workers never take the same raw POIs; if another worker holds it, returns 0.
+
+    Args:
+        pool_token (str): Session key returned by /recommend
+        batch_size (int): Number of POIs to enrich
+
+    Returns:
+        int: Number of cards appended to the pool
+    """
+    reservoir = claim_pool_expansion(pool_token)
+    if reservoir is None:
+        return 0
+
+    try:
+        pool = get_pool(pool_token)
+        if pool is None:
+            return 0
+
+        pending = list(reservoir["pending"])
+        if len(pending) < batch_size and not reservoir["exhausted"]:
+            pending.extend(await _pull_more_places(reservoir, batch_size - len(pending), pool))
+
+        # Only the expansion fields are written: the style profile may have changed meanwhile
+        batch = pending[:batch_size]
+        update_pool_reservoir(pool_token, {
+            "pending": pending[batch_size:],
+            "pages": reservoir["pages"],
+            "page_failures": reservoir.get("page_failures", {}),
+            "seen_ids": reservoir["seen_ids"],
+            "exhausted": reservoir["exhausted"]
+        })
+        if not batch:
+            return 0
+
+        reviews, _ = await gather_reviews_async(batch)
+        cards = await fuse_cards_async(batch, reviews)
+        profile = (get_pool_reservoir(pool_token) or reservoir).get("score_profile")
+        added = append_to_pool(pool_token, score_cards(cards, profile))
+        print(f"🌱 Pool expanded by {added} cards ({len(pending) - len(batch)} raw POIs left)")
+        return added
+
+    except Exception as e:
+        print(f"💥 Pool expansion failed: {e}")
+        return 0
+
+    finally:
+        release_pool_expansion(pool_token)
+
+
+async def _pull_more_places(reservoir: Dict, needed: int, pool: List[Dict]) -> List[Dict]:
+    """
+    Fetches further result pages (one per query and round) until `needed` new POIs are found
+    or every query is exhausted. Updates `reservoir` pages / failures / seen ids / exhausted in place.
+
+    A query is exhausted only when Google reports no next page. A failed fetch (timeout, API
+    or page-token error) skips the query for this expansion and is retried by the next one,
+    up to RECOMMEND_PAGE_MAX_FAILURES times in a row.
+    """
+    pages = reservoir["pages"]
+    failures = reservoir.setdefault("page_failures", {})
+    seen = set(reservoir["seen_ids"])
+    failed_now = set()
+    center = robust_center(coords_array(pool)) if pool else None
+    found: List[Dict] = []
+
+    while len(found) < needed:
+        jobs = [(city, query) for city, query in reservoir["queries"]
+                if pages.get(f"{city}|{query}") is not None and f"{city}|{query}" not in failed_now]
+        if not jobs:
+            break
+
+        fetched = await asyncio.gather(*(
+            asyncio.wait_for(
+                asyncio.to_thread(fetch_places_page, query, city, page=pages[f"{city}|{query}"]),
+                timeout=MAPS_QUERY_TIMEOUT
+            )
+            for city, query in jobs
+        ), return_exceptions=True)
+
+        raw = []
+        for (city, query), page in zip(jobs, fetched):
+            key = f"{city}|{query}"
+            if isinstance(page, Exception):
+                print(f"⚠️ Next page of {query} ({city}) failed: {page!r}")
+                failed_now.add(key)
+                failures[key] = failures.get(key, 0) + 1
+                if failures[key] >= RECOMMEND_PAGE_MAX_FAILURES:
+                    pages[key] = None
+                continue
+            failures.pop(key, None)
+            raw.extend(page["pois"])
+            pages[key] = pages[key] + 1 if page["has_next_page"] else None
+
+        if raw:
+            cleaned = clean_pois(raw, min_required=0, center=center) if center is not None else raw
+            unique, _ = dedupe_pois(cleaned)
+            fresh = [poi for poi in unique if poi["id"] not in seen]
+            seen.update(poi["id"] for poi in fresh)
+            found.extend(fresh)
+
+    reservoir["seen_ids"] = list(seen)
+    reservoir["exhausted"] = all(page is None for page in pages.values())
+    return found
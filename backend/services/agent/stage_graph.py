@@ -0,0 +1,176 @@
+"""
+stage_graph.py · Async Pipeline Stage Graph
+
+This module runs a pipeline described as a small dependency graph of stages.
+Each stage declares which earlier results it needs; every stage whose
+dependencies are satisfied starts immediately, so independent stages run
+concurrently.
+
+Stages marked `background=True` are non-essential enrichment: the graph call
+returns as soon as all foreground stages are done, while background stages keep
+running as tasks and report their results through a callback.
+
+Main Use Case:
+--------------
+Used by `recommend_agent()` so that `/recommend` responds once scored cards exist,
+with travel-style classification and feedback learning finishing afterwards.
+
+Key Features:
+-------------
+✅ Explicit per-stage dependencies (validated up front)
+✅ Independent stages run concurrently
+✅ Background stages never delay the caller
+✅ Failed background stages are logged and their dependents skipped
+✅ Per-stage timing logs
+
+Author: Tripllery AI Backend
+"""
+
+import time
+import asyncio
+import inspect
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+# ✨ Strong references to running graph drivers (so background work is not garbage-collected)
+_running_graphs: Set[asyncio.Task] = set()
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step.
+
+    Attributes:
+        name (str): Result key of this stage
+        func (Callable): `func(results) -> value` (sync or async); `results` holds inputs + finished stages
+        deps (List[str]): Names of inputs / stages that must finish first
+        background (bool): Non-essential stage that may finish after the caller returns
+    """
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    deps: List[str] = field(default_factory=list)
+    background: bool = False
+
+
+async def _call_stage(stage: Stage, results: Dict[str, Any]) -> Any:
+    started = time.perf_counter()
+    value = stage.func(results)
+    if inspect.isawaitable(value):
+        value = await value
+    print(f"⏱️ Stage '{stage.name}' done in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return value
+
+
+def _validate(stages: List[Stage], inputs: Dict[str, Any]):
+    known = set(inputs)
+    names = [stage.name for stage in stages]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Duplicate stage names: {names}")
+
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in known and dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown '{dep}'")
+            if not stage.background and dep in by_name and by_name[dep].background:
+                raise ValueError(f"Foreground stage '{stage.name}' cannot depend on background '{dep}'")
+
+
+async def run_stage_graph(
+    stages: List[Stage],
+    inputs: Dict[str, Any],
+    on_background_done: Optional[Callable[[Dict[str, Any]], Optional[Awaitable]]] = None
+) -> Dict[str, Any]:
+    """
+    Runs a stage graph and returns once every foreground stage has finished.
+
+    Args:
+        stages (List[Stage]): Stages in any order
+        inputs (Dict[str, Any]): Initial values stages may depend on
+        on_background_done (Callable, optional): Called with {stage_name: result}
+            for all background stages once they have finished (failed ones are None)
+
+    Returns:
+        Dict[str, Any]: Inputs plus results of all foreground stages
+
+    Raises:
+        ValueError: If the graph references unknown stages
+        Exception: The first error raised by a foreground stage
+    """
+    _validate(stages, inputs)
+
+    results = dict(inputs)
+    foreground = {stage.name for stage in stages if not stage.background}
+    background = [stage.name for stage in stages if stage.background]
+    foreground_done = asyncio.Event()
+    outcome: Dict[str, Any] = {}
+
+    async def drive():
+        pending = {stage.name: stage for stage in stages}
+        running: Dict[asyncio.Task, Stage] = {}
+        failed: Set[str] = set()
+
+        if not foreground:
+            foreground_done.set()
+
+        try:
+            while pending or running:
+                # Step 1️⃣ Skip stages downstream of a failed background stage
+                skipped = [s for s in pending.values() if any(dep in failed for dep in s.deps)]
+                for stage in skipped:
+                    print(f"⚠️ Stage '{stage.name}' skipped (upstream failed)")
+                    failed.add(stage.name)
+                    del pending[stage.name]
+
+                # Step 2️⃣ Start every stage whose dependencies are satisfied
+                for stage in list(pending.values()):
+                    if all(dep in results for dep in stage.deps):
+                        del pending[stage.name]
+                        running[asyncio.ensure_future(_call_stage(stage, results))] = stage
+
+                if not running:
+                    break
+
+                # Step 3️⃣ Collect whichever stages finish first
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    try:
+                        results[stage.name] = task.result()
+                    except Exception as e:
+                        if not stage.background:
+                            for other in running:
+                                other.cancel()
+                            raise
+                        print(f"⚠️ Background stage '{stage.name}' failed: {e}")
+                        failed.add(stage.name)
+
+                if foreground <= results.keys():
+                    foreground_done.set()
+
+        except Exception as e:
+            outcome["error"] = e
+            foreground_done.set()
+            return
+
+        foreground_done.set()
+
+        # Step 4️⃣ Report background results (after the caller already returned)
+        if background and on_background_done:
+            try:
+                reported = on_background_done({name: results.get(name) for name in background})
+                if inspect.isawaitable(reported):
+                    await reported
+            except Exception as e:
+                print(f"⚠️ Background result handler failed: {e}")
+
+    driver = asyncio.ensure_future(drive())
+    _running_graphs.add(driver)
+    driver.add_done_callback(_running_graphs.discard)
+
+    await foreground_done.wait()
+    if "error" in outcome:
+        raise outcome["error"]
+
+    return {name: value for name, value in results.items() if name in inputs or name in foreground}
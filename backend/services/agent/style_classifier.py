@@ -25,8 +25,8 @@ Author: Tripllery AI Backend
 
 import os
 import json
-import httpx
 from typing import List, Dict
+from services.utils.http_client import request as http_request
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
@@ -87,14 +87,13 @@ JSON only:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            response = await client.post(OPENAI_API_URL, headers=HEADERS, json=payload)
-            data = response.json()
-            if "choices" not in data:
-                raise ValueError("OpenAI API missing choices")
-            content = data["choices"][0]["message"]["content"]
-            style_result = json.loads(content)
-            return style_result
+        response = await http_request("openai", "POST", OPENAI_API_URL, headers=HEADERS, json=payload)
+        data = response.json()
+        if "choices" not in data:
+            raise ValueError("OpenAI API missing choices")
+        content = data["choices"][0]["message"]["content"]
+        style_result = json.loads(content)
+        return style_result
 
     except Exception as e:
         print(f"⚠️ classify_travel_style fallback because: {e}")
@@ -2,7 +2,8 @@
 clustering.py · POI Location-Based Sorter (Mini Clustering)
 
 This module provides lightweight geographic clustering for POIs based on
-their latitude and longitude, using KMeans.
+their latitude and longitude, using a small NumPy k-means (`services.utils.kmeans`).
+scikit-learn is only imported (lazily) when CLUSTERING_BACKEND=sklearn.
 
 It groups POIs into up to 2 clusters, then returns a merged list that preserves
 local proximity — useful for generating plans with fewer long-distance jumps.
@@ -15,16 +16,20 @@ in a way that mimics location-aware route optimization (especially when no real
 Key Features:
 -------------
 ✅ Uses lat/lng to group nearby POIs  
-✅ KMeans clustering (min(2, N)) for simplicity  
+✅ KMeans clustering (min(2, N)) for simplicity, NumPy-only by default  
 ✅ Returns sorted POIs across clusters  
 ✅ Works even without car (adaptive to low-mobility trips)
 
 Author: Tripllery AI Backend
 """
 
+import os
 from typing import List, Dict
-from sklearn.cluster import KMeans
-import numpy as np
+from services.utils.geo import coords_array
+from services.utils.kmeans import kmeans
+
+# "numpy" (default, no import cost) or "sklearn" (lazy import on first use)
+CLUSTERING_BACKEND = os.getenv("CLUSTERING_BACKEND", "numpy")
 
 def sort_pois_by_location(pois: List[Dict], transportation: str = "no_car") -> List[Dict]:
     """
@@ -47,11 +52,10 @@ def sort_pois_by_location(pois: List[Dict], transportation: str = "no_car") -> L
     if len(pois) <= 2:
         return pois
 
-    coords = np.array([[poi["lat"], poi["lng"]] for poi in pois])
+    coords = coords_array(pois)
 
     # Cluster into 1 or 2 groups depending on count
-    kmeans = KMeans(n_clusters=min(2, len(pois)), random_state=42).fit(coords)
-    labels = kmeans.labels_
+    labels, _ = kmeans(coords, min(2, len(pois)), backend=CLUSTERING_BACKEND)
 
     sorted_pois = []
     for cluster in range(max(labels) + 1):
@@ -3,7 +3,8 @@ formatter_llm.py · Intelligent Day-Split Formatter
 
 This module provides a hybrid plan formatting strategy:
 - First attempts to split POIs across days using LLM
-- If LLM fails or returns invalid output, falls back to a deterministic splitter
+- If LLM fails or returns invalid output, falls back to the deterministic geographic splitter
+- The geographic splitter can also be selected as the primary strategy (no LLM round trip)
 
 It ensures that the final output is always a valid `{day → list of POI objects}` structure,
 suitable for downstream scheduling (/preview) and frontend display.
@@ -16,18 +17,21 @@ to divide the trip into N days worth of activities.
 Key Features:
 -------------
 ✅ Async LLM-based pipeline call  
-✅ Safe fallback to rule-based splitter  
+✅ Safe fallback to geographic splitter  
 ✅ Converts string-based fallback back to real POI objects  
 ✅ Returns dict of `{Day N: [POIs]}`
 
 Author: Tripllery AI Backend
 """
 
-from typing import List, Dict
+import asyncio
+from typing import List, Dict, Optional
 from services.formatter.pipeline import format_plan_pipeline
-from services.formatter.splitter import simple_split_days
+from services.formatter.splitter import geo_split_days
+from services.formatter.optimizer import optimize_day_order
 
-async def format_plan_with_llm(pois: List[Dict], days: int, transportation: str = "car") -> Dict[str, List[Dict]]:
+async def format_plan_with_llm(pois: List[Dict], days: int, transportation: str = "car", start: Optional[Dict] = None,
+                               strategy: Optional[str] = None) -> Dict[str, List[Dict]]:
     """
     Formats the travel plan by splitting POIs across days using LLM (with fallback).
 
@@ -35,6 +39,8 @@ async def format_plan_with_llm(pois: List[Dict], days: int, transportation: str
         pois (List[Dict]): List of POIs selected by the user.
         days (int): Total number of travel days.
         transportation (str): Travel mode ("car" or "public") (currently unused in splitting logic).
+        start (Dict, optional): Fixed daily starting point with "lat"/"lng" (e.g. hotel).
+        strategy (str, optional): Day split strategy ("llm", "geo", "round_robin"; default: DAY_SPLIT_STRATEGY).
 
     Returns:
         Dict[str, List[Dict]]: A mapping of day labels to lists of POI objects:
@@ -46,11 +52,12 @@ async def format_plan_with_llm(pois: List[Dict], days: int, transportation: str
 
     Fallback Logic:
         - If the LLM-based splitter fails or returns invalid output,
-          falls back to rule-based splitter (`simple_split_days`) and resolves POI objects by name.
+          falls back to the geographic splitter (`geo_split_days`), resolves POI objects by name
+          and still orders each day with the route optimizer.
     """
     try:
         # 🌸 Step 1: Attempt LLM-based splitting
-        formatted_plan = await format_plan_pipeline(pois, days)
+        formatted_plan = await format_plan_pipeline(pois, days, start=start, strategy=strategy)
 
         if not isinstance(formatted_plan, dict):
             raise ValueError("LLM returned invalid format.")
@@ -60,8 +67,8 @@ async def format_plan_with_llm(pois: List[Dict], days: int, transportation: str
     except Exception as e:
         print(f"⚠️ format_plan_with_llm fallback because: {e}")
 
-        # 🌸 Step 2: Fallback to rule-based splitter
-        fallback_day_name_to_names = simple_split_days(pois, days)
+        # 🌸 Step 2: Fallback to geographic splitter
+        fallback_day_name_to_names = geo_split_days(pois, days)
 
         # 🌸 Step 3: Build name → POI object mapping
         name_to_poi = {poi["name"]: poi for poi in pois}
@@ -76,7 +83,7 @@ async def format_plan_with_llm(pois: List[Dict], days: int, transportation: str
                     day_pois.append(poi_obj)
                 else:
                     print(f"⚠️ Warning: Fallback could not find POI object for name: {name}")
-            final_plan[day] = day_pois
+            final_plan[day] = await asyncio.to_thread(optimize_day_order, day_pois, start=start)
 
         # 🌸 Step 5: Return fallback {day → POIs}
         return final_plan
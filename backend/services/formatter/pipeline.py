@@ -4,7 +4,7 @@ pipeline.py · Tripllery Day-Split Pipeline
 This module defines the full formatting pipeline to convert a list of POIs
 into a multi-day plan. It combines:
 
-- LLM-based intelligent splitting (`intelligent_split_days`)
+- Day splitting (`split_days`: LLM, geographic clustering or round-robin)
 - Mapping from POI names to full POI objects
 - Intra-day spatial optimization (`optimize_day_order`)
 
@@ -19,25 +19,29 @@ Activated when LLM-based day plans are desired.
 Key Features:
 -------------
 ✅ Combines multiple formatter utilities in sequence  
-✅ Day-level splitting based on semantic diversity  
+✅ Day-level splitting based on semantic diversity or geographic locality  
 ✅ Spatial sorting within each day  
 ✅ Output: Dict[Day → List[POI objects]]
 
 Author: Tripllery AI Backend
 """
 
-from typing import List, Dict
-from services.formatter.splitter import intelligent_split_days
-from services.formatter.optimizer import optimize_day_order
+import asyncio
+from typing import List, Dict, Optional
+from services.formatter.splitter import split_days
+from services.formatter.optimizer import optimize_route
 from services.formatter.mapping import build_name_to_poi_map
 
-async def format_plan_pipeline(pois: List[Dict], days: int) -> Dict[str, List[Dict]]:
+async def format_plan_pipeline(pois: List[Dict], days: int, start: Optional[Dict] = None,
+                               strategy: Optional[str] = None) -> Dict[str, List[Dict]]:
     """
     Runs the full formatting pipeline: smart split ➜ mapping ➜ day optimization.
 
     Args:
         pois (List[Dict]): List of POIs to distribute across days.
         days (int): Total number of trip days.
+        start (Dict, optional): Fixed daily starting point with "lat"/"lng" (e.g. hotel).
+        strategy (str, optional): Day split strategy ("llm", "geo", "round_robin").
 
     Returns:
         Dict[str, List[Dict]]: Final multi-day plan with optimized POI lists per day.
@@ -53,18 +57,24 @@ async def format_plan_pipeline(pois: List[Dict], days: int) -> Dict[str, List[Di
     if not pois or days <= 0:
         raise ValueError("Invalid POIs or days")
 
-    # Step 1️⃣ Intelligent day splitting (LLM or heuristic)
-    day_plan = await intelligent_split_days(pois, days)
+    # Step 1️⃣ Day splitting (LLM, geographic or heuristic)
+    day_plan = await split_days(pois, days, strategy)
 
     # Step 2️⃣ Build mapping: POI name → POI object
     name_to_poi = build_name_to_poi_map(pois)
 
-    # Step 3️⃣ For each day: resolve names + optimize order
-    final_plan = {}
+    # Step 3️⃣ For each day: resolve names + optimize order (CPU-bound → worker threads)
+    day_pois_by_day = {
+        day: [name_to_poi[name] for name in names if name in name_to_poi]
+        for day, names in day_plan.items()
+    }
+    routes = await asyncio.gather(*(
+        asyncio.to_thread(optimize_route, day_pois, start=start) for day_pois in day_pois_by_day.values()
+    ))
 
-    for day, names in day_plan.items():
-        day_pois = [name_to_poi[name] for name in names if name in name_to_poi]
-        optimized_day = optimize_day_order(day_pois)
+    final_plan = {}
+    for day, (optimized_day, route_km) in zip(day_pois_by_day, routes):
+        print(f"🧭 {day}: {len(optimized_day)} POIs, route {route_km:.1f} km")
         final_plan[day] = optimized_day
 
     return final_plan
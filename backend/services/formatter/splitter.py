@@ -3,9 +3,12 @@ splitter.py · POI Day Split Engine (LLM + Heuristic)
 
 This module handles splitting a flat list of POIs into multiple travel days.
 
-It first attempts intelligent distribution using OpenAI LLMs,
-and if that fails (due to API error, invalid format, etc.), it falls back to
-a simple round-robin heuristic based on POI rating.
+Three strategies are available (DAY_SPLIT_STRATEGY, or per request):
+- "llm": intelligent distribution using OpenAI LLMs
+- "geo": deterministic capacity-constrained clustering on lat/lng (no network, milliseconds)
+- "round_robin": round-robin heuristic based on POI rating
+
+If the LLM fails (due to API error, invalid format, etc.), it falls back to the geo splitter.
 
 Main Use Case:
 --------------
@@ -15,7 +18,8 @@ to distribute accepted POIs over N days.
 Key Features:
 -------------
 ✅ Intelligent clustering via GPT (balanced, themed, diverse)  
-✅ Fast fallback with round-robin + rating sort  
+✅ Geographic balanced k-means: nearby POIs share a day, per-day caps respected  
+✅ Round-robin + rating sort still available  
 ✅ Consistent JSON output: { "Day 1": ["POI A", "POI B"], ... }  
 ✅ Supports graceful fallback with no disruption
 
@@ -24,18 +28,48 @@ Author: Tripllery AI Backend
 
 import os
 import json
-import httpx
-from typing import List, Dict
+import math
+from typing import List, Dict, Optional
+import numpy as np
+from services.utils.http_client import request as http_request
+from services.utils.geo import coords_array, haversine_km
+from services.utils.kmeans import farthest_first_seeds
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
 MODEL_NAME = os.getenv("MODEL_NAME", "gpt-3.5-turbo")
 
+# Primary day-split strategy: "llm" | "geo" | "round_robin"
+DAY_SPLIT_STRATEGY = os.getenv("DAY_SPLIT_STRATEGY", "llm")
+GEO_SPLIT_MAX_ITERATIONS = 20
+
 HEADERS = {
     "Authorization": f"Bearer {OPENAI_API_KEY}",
     "Content-Type": "application/json"
 }
 
+async def split_days(pois: List[Dict], days: int, strategy: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Splits POIs into days with the selected strategy.
+
+    Args:
+        pois (List[Dict]): List of POI objects (must contain "name"; "lat"/"lng" for "geo")
+        days (int): Number of travel days
+        strategy (str, optional): "llm", "geo" or "round_robin" (default: DAY_SPLIT_STRATEGY)
+
+    Returns:
+        Dict[str, List[str]]: Mapping of day labels to POI names.
+    """
+    strategy = strategy or DAY_SPLIT_STRATEGY
+    if strategy == "geo":
+        return geo_split_days(pois, days)
+    if strategy == "round_robin":
+        return simple_split_days(pois, days)
+    if strategy != "llm":
+        print(f"⚠️ Unknown day split strategy {strategy!r}, using llm")
+    return await intelligent_split_days(pois, days)
+
+
 async def intelligent_split_days(pois: List[Dict], days: int) -> Dict[str, List[str]]:
     """
     Uses OpenAI to split POIs into N days intelligently.
@@ -48,7 +82,7 @@ async def intelligent_split_days(pois: List[Dict], days: int) -> Dict[str, List[
         Dict[str, List[str]]: Mapping of day labels to POI names.
 
     Fallback:
-        If LLM fails or returns invalid format, uses `simple_split_days`.
+        If LLM fails or returns invalid format, uses `geo_split_days`.
 
     Example Output:
         {
@@ -83,20 +117,19 @@ Output format (strictly JSON):
     }
 
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            response = await client.post(OPENAI_API_URL, headers=HEADERS, json=payload)
-            data = response.json()
-            if "choices" not in data:
-                raise ValueError("OpenAI API returned invalid format (missing choices)")
-            content = data["choices"][0]["message"]["content"]
-            plan = json.loads(content)
-            if not isinstance(plan, dict):
-                raise ValueError("LLM returned non-dict format")
-            return plan
+        response = await http_request("openai", "POST", OPENAI_API_URL, headers=HEADERS, json=payload)
+        data = response.json()
+        if "choices" not in data:
+            raise ValueError("OpenAI API returned invalid format (missing choices)")
+        content = data["choices"][0]["message"]["content"]
+        plan = json.loads(content)
+        if not isinstance(plan, dict):
+            raise ValueError("LLM returned non-dict format")
+        return plan
 
     except Exception as e:
         print(f"⚠️ intelligent_split_days fallback because: {e}")
-        return simple_split_days(pois, days)
+        return geo_split_days(pois, days)
 
 
 def simple_split_days(pois: List[Dict], days: int) -> Dict[str, List[str]]:
@@ -120,3 +153,91 @@ def simple_split_days(pois: List[Dict], days: int) -> Dict[str, List[str]]:
         result[f"Day {idx % days + 1}"].append(poi["name"])
 
     return result
+
+
+def geo_split_days(pois: List[Dict], days: int, max_per_day: Optional[int] = None) -> Dict[str, List[str]]:
+    """
+    Deterministic geographic splitter: capacity-constrained (balanced) k-means on lat/lng.
+
+    Each day is one cluster of nearby POIs. Assignment is greedy by regret
+    (POIs with the most to lose pick first) into the nearest day with capacity
+    left; centers are then re-averaged until assignments stop changing.
+
+    Args:
+        pois (List[Dict]): List of POIs with "name", "lat", "lng"
+        days (int): Number of travel days
+        max_per_day (int, optional): Per-day cap (default and minimum: ceil(N / days))
+
+    Returns:
+        Dict[str, List[str]]: Day → POI name list (days ordered west → east, no empty days
+        unless there are fewer POIs than days)
+
+    Fallback:
+        POIs without coordinates → `simple_split_days`.
+    """
+    if days <= 0:
+        return {}
+    if not pois or any("lat" not in poi or "lng" not in poi for poi in pois):
+        return simple_split_days(pois, days)
+
+    n = len(pois)
+    k = min(days, n)
+    capacity = max(math.ceil(n / k), max_per_day or 0)
+    coords = coords_array(pois)
+
+    # Step 1️⃣ Deterministic farthest-first seeding (starting at the westernmost POI)
+    centers = coords[farthest_first_seeds(coords, k)].copy()
+
+    # Step 2️⃣ Alternate capacity-constrained assignment and center updates
+    labels = None
+    for _ in range(GEO_SPLIT_MAX_ITERATIONS):
+        new_labels = _assign_with_capacity(coords, centers, capacity)
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            members = coords[labels == c]
+            if len(members):
+                centers[c] = members.mean(axis=0)
+
+    # Step 3️⃣ Days ordered west → east; POIs keep their input order inside a day
+    day_order = sorted(range(k), key=lambda c: (centers[c][1], centers[c][0]))
+    result = {f"Day {i+1}": [] for i in range(days)}
+    for day_idx, c in enumerate(day_order):
+        result[f"Day {day_idx + 1}"] = [pois[i]["name"] for i in np.flatnonzero(labels == c)]
+    return result
+
+
+def _assign_with_capacity(coords: np.ndarray, centers: np.ndarray, capacity: int) -> np.ndarray:
+    """
+    Assigns every point to its nearest center that still has room, highest regret first.
+    Every center receives at least one point when there are enough points.
+    """
+    n, k = len(coords), len(centers)
+    dist = haversine_km(coords[:, 0][:, None], coords[:, 1][:, None], centers[:, 0][None, :], centers[:, 1][None, :])
+    preference = np.argsort(dist, axis=1, kind="stable")
+
+    if k > 1:
+        sorted_dist = np.take_along_axis(dist, preference, axis=1)
+        regret = sorted_dist[:, 1] - sorted_dist[:, 0]
+    else:
+        regret = np.zeros(n)
+    order = np.lexsort((np.arange(n), -regret))
+
+    labels = np.full(n, -1)
+    counts = np.zeros(k, dtype=int)
+    for i in order:
+        for c in preference[i]:
+            if counts[c] < capacity:
+                labels[i] = c
+                counts[c] += 1
+                break
+
+    # Refill empty clusters with their closest point from a cluster that can spare one
+    for c in np.flatnonzero(counts == 0):
+        donors = [i for i in np.argsort(dist[:, c], kind="stable") if counts[labels[i]] > 1]
+        if donors:
+            counts[labels[donors[0]]] -= 1
+            labels[donors[0]] = c
+            counts[c] += 1
+    return labels
@@ -22,8 +22,8 @@ Author: Tripllery AI Backend
 
 import os
 import json
-import httpx
 from typing import Dict, Optional
+from services.utils.http_client import request as http_request
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
@@ -117,15 +117,14 @@ Output JSON only:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            response = await client.post(OPENAI_API_URL, headers=HEADERS, json=payload)
-            data = response.json()
-            if "choices" not in data:
-                raise ValueError("OpenAI missing choices")
-            content = data["choices"][0]["message"]["content"]
-            detailed_plan = json.loads(content)
-            print("🧪 Final timeline plan =", json.dumps(detailed_plan, indent=2))
-            return detailed_plan
+        response = await http_request("openai", "POST", OPENAI_API_URL, headers=HEADERS, json=payload)
+        data = response.json()
+        if "choices" not in data:
+            raise ValueError("OpenAI missing choices")
+        content = data["choices"][0]["message"]["content"]
+        detailed_plan = json.loads(content)
+        print("🧪 Final timeline plan =", json.dumps(detailed_plan, indent=2))
+        return detailed_plan
 
     except Exception as e:
         print(f"⚠️ plan_days_with_llm fallback because: {e}")
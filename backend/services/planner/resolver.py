@@ -17,7 +17,9 @@ Used after formatting or LLM-based splits to smooth out overfilled/underfilled d
 Key Features:
 -------------
 ✅ Removes invalid POI entries (non-dict)  
+✅ Leaves already-balanced plans untouched (keeps the splitter's grouping)  
 ✅ Splits into fixed-size chunks  
+✅ Proximity-aware chunks: each day = a seed POI + its nearest unassigned neighbours  
 ✅ Skips empty days  
 ✅ Consistent day labels: "Day 1", "Day 2", ...
 
@@ -25,8 +27,9 @@ Author: Tripllery AI Backend
 """
 
 from typing import Dict, List
+from services.utils.spatial_index import SpatialIndex
 
-def rebalance_days(plan: Dict[str, List[Dict]], max_pois_per_day: int = 5) -> Dict[str, List[Dict]]:
+def rebalance_days(plan: Dict[str, List[Dict]], max_pois_per_day: int = 5, by_proximity: bool = True) -> Dict[str, List[Dict]]:
     """
     Rebalances the day plan by distributing POIs evenly and avoiding empty days.
 
@@ -37,6 +40,8 @@ def rebalance_days(plan: Dict[str, List[Dict]], max_pois_per_day: int = 5) -> Di
                 "Day 2": []
             }
         max_pois_per_day (int): Max number of POIs per day
+        by_proximity (bool): Fill each day with nearby POIs (needs lat/lng on every POI);
+            otherwise chunk in plan order
 
     Returns:
         Dict[str, List[Dict]]: Cleaned and restructured plan with balanced POIs, e.g.:
@@ -62,15 +67,49 @@ def rebalance_days(plan: Dict[str, List[Dict]], max_pois_per_day: int = 5) -> Di
         print("⚠️ No valid POIs found for rebalancing.")
         return {}
 
+    # Step 2️⃣.5 Already balanced (no empty / overloaded / invalid entries) → keep the split as is
+    valid_days = [day_pois for day_pois in plan.values() if isinstance(day_pois, list)]
+    if len(valid_days) == len(plan) and all(
+        0 < len(day_pois) <= max_pois_per_day and all(isinstance(poi, dict) for poi in day_pois)
+        for day_pois in valid_days
+    ):
+        print(f"✅ Plan already balanced: {len(valid_days)} days")
+        return {f"Day {i+1}": list(day_pois) for i, day_pois in enumerate(valid_days)}
+
     # Step 3️⃣ Chunk POIs and reassign to new days
+    if by_proximity and all("lat" in poi and "lng" in poi for poi in all_pois):
+        chunks = _chunk_by_proximity(all_pois, max_pois_per_day)
+    else:
+        chunks = [all_pois[i:i + max_pois_per_day] for i in range(0, len(all_pois), max_pois_per_day)]
+
     balanced_plan = {}
     day_idx = 1
 
-    for i in range(0, len(all_pois), max_pois_per_day):
-        chunk = all_pois[i:i + max_pois_per_day]
+    for chunk in chunks:
         if chunk:  # Only non-empty days
             balanced_plan[f"Day {day_idx}"] = chunk
             day_idx += 1
 
     print(f"✅ Rebalanced days: {len(balanced_plan)} non-empty days")
     return balanced_plan
+
+
+def _chunk_by_proximity(pois: List[Dict], size: int) -> List[List[Dict]]:
+    """
+    Chunks POIs so each chunk is a seed (earliest unassigned POI) plus its nearest
+    unassigned neighbours. POIs keep their original relative order inside a chunk.
+    """
+    index = SpatialIndex(pois)
+    assigned = set()
+    chunks = []
+
+    for seed in range(len(pois)):
+        if seed in assigned:
+            continue
+        lat, lng = pois[seed]["lat"], pois[seed]["lng"]
+        assigned.add(seed)
+        members = [seed] + [i for i, _ in index.nearest(lat, lng, k=size - 1, exclude=assigned)]
+        assigned.update(members)
+        chunks.append([pois[i] for i in sorted(members)])
+
+    return chunks
@@ -17,23 +17,50 @@ Key Features:
 ✅ Conditionally inserts breakfast, lunch, dinner  
 ✅ Adds flexible time blocks and final hotel return  
 ✅ Filters invalid blocks (missing start/end)
+✅ Matrix mode: one N×N travel-time matrix per day drives both the day order
+   and the schedule's travel times (PREVIEW_TRAVEL_TIMES=matrix)
+✅ Integer-minute timeline core: O(1) meal flags, "HH:MM" rendered once per block
+✅ Opening hours: visits placed inside open windows (waiting, reordering or
+   deferring as needed); POIs with no open slot that day are flagged as "Unscheduled"
 
 Author: Tripllery AI Backend
 """
 
+import os
+import asyncio
+from collections import deque
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
 from services.preview.helper import (
     insert_breakfast, insert_lunch, insert_dinner,
     insert_poi_block, insert_transport_block,
-    insert_flexible_block, insert_return_to_hotel
+    insert_return_to_hotel, insert_wait_block, insert_unscheduled_block,
+    to_minutes, render_times
 )
 from services.preview.directions import batch_travel_times
+from services.preview.travel_matrix import fetch_travel_matrix, estimate_minutes
+from services.preview.opening_hours import MINUTES_PER_DAY, build_opening_hours_index
+from services.formatter.optimizer import optimize_route
 from services.preview.flexible_time import smart_insert_flexible_blocks
 from services.preview.constants import (
     DEFAULT_LUNCH_TIME, DEFAULT_DINNER_TIME,
     DEFAULT_DAY_END_TIME, DEFAULT_START_TIME_OF_DAY
 )
 
+# "legs": Directions per consecutive pair (order fixed) · "matrix": N×N matrix per day (reorders)
+PREVIEW_TRAVEL_TIMES = os.getenv("PREVIEW_TRAVEL_TIMES", "legs")
+# In matrix mode, still fetch map polylines for the final order (leg-cached)
+PREVIEW_MATRIX_POLYLINES = os.getenv("PREVIEW_MATRIX_POLYLINES", "1") == "1"
+# Respect POI opening hours (cards carry Google weekday_text under "opening_hours")
+PREVIEW_OPENING_HOURS = os.getenv("PREVIEW_OPENING_HOURS", "1") == "1"
+# Longest wait (minutes) for a POI to open before another POI is visited first
+OPENING_HOURS_MAX_WAIT = int(os.getenv("OPENING_HOURS_MAX_WAIT", "30"))
+
+LUNCH_MINUTE = to_minutes(DEFAULT_LUNCH_TIME)
+DINNER_MINUTE = to_minutes(DEFAULT_DINNER_TIME)
+BREAKFAST_LATEST_HOUR = 9
+
 async def build_full_schedule(rough_plan: dict, options: dict) -> dict:
     """
     Converts a rough plan (Day → POIs) into a full time-based schedule per day.
@@ -45,19 +72,27 @@ async def build_full_schedule(rough_plan: dict, options: dict) -> dict:
             - avg_poi_duration, flexible_block
             - meal_options, transportation
             - start_datetime, end_datetime
+            - travel_times (optional): "legs" or "matrix" (default: PREVIEW_TRAVEL_TIMES)
+            - start_location (optional): {"lat", "lng"} day start used for matrix routing
+            - opening_hours (optional): bool, respect POI opening hours (default: PREVIEW_OPENING_HOURS)
 
     Returns:
         dict: {"Day 1": [block1, block2, ...], ...}
+              Sightseeing blocks carry "opening_status" ("open" / "closed" / "unknown")
+              when opening hours are used; POIs with no open slot that day are appended
+              as "Unscheduled" blocks.
     """
     start_datetime = datetime.fromisoformat(options.get("start_datetime"))
     end_datetime = datetime.fromisoformat(options.get("end_datetime"))
 
-    wake_up_time = options.get("wake_up_time") or DEFAULT_START_TIME_OF_DAY
-    return_time = options.get("return_time") or DEFAULT_DAY_END_TIME
+    wake_up_minute = to_minutes(options.get("wake_up_time") or DEFAULT_START_TIME_OF_DAY)
+    return_minute = to_minutes(options.get("return_time") or DEFAULT_DAY_END_TIME)
 
     avg_poi_duration = int(options.get("avg_poi_duration", 90))
     flexible_block = int(options.get("flexible_block", 60))
     transportation_mode = options.get("transportation", "no_car")
+    travel_times_source = options.get("travel_times") or PREVIEW_TRAVEL_TIMES
+    use_opening_hours = options.get("opening_hours", PREVIEW_OPENING_HOURS)
 
     meal_options = options.get("meal_options", {
         "include_breakfast": True,
@@ -77,18 +112,48 @@ async def build_full_schedule(rough_plan: dict, options: dict) -> dict:
             continue
 
         current_day_date = date_list[day_counter]
+        weekday = (start_datetime.weekday() + day_counter) % 7
 
-        # Determine start time
+        # Determine start time (minutes since midnight)
         if day_counter == 0:
-            current_time = start_datetime
+            current_time = start_datetime.hour * 60 + start_datetime.minute
         else:
-            current_time = datetime.combine(
-                start_datetime.date() + timedelta(days=day_counter),
-                datetime.strptime(wake_up_time, "%H:%M").time()
-            )
+            current_time = wake_up_minute
 
         # Get travel time + routing for POIs
-        travel_time_list, polyline_list = await batch_travel_times(pois, transportation_mode)
+        travel_matrix = None
+        if travel_times_source == "matrix":
+            pois, travel_matrix = await route_day_with_matrix(
+                pois, transportation_mode, start=options.get("start_location")
+            )
+
+        # Fit visits into opening hours: reorder / defer, set aside POIs with no slot today
+        opening_hours, unscheduled = None, []
+        if use_opening_hours:
+            opening_hours = build_opening_hours_index(pois)
+            if any(hours.known for hours in opening_hours):
+                plan_matrix = travel_matrix if travel_matrix is not None else estimate_minutes(pois, transportation_mode)
+                _, order, skipped = _build_day(
+                    pois, current_time, current_day_date, day_name, avg_poi_duration,
+                    None, None, meal_options, return_minute,
+                    travel_matrix=plan_matrix, opening_hours=opening_hours, weekday=weekday, reorder=True
+                )
+                unscheduled = [pois[i] for i in skipped]
+                pois = [pois[i] for i in order]
+                opening_hours = [opening_hours[i] for i in order]
+                if travel_matrix is not None:
+                    travel_matrix = travel_matrix[np.ix_(order, order)]
+            else:
+                opening_hours = None
+
+        if travel_matrix is not None:
+            if PREVIEW_MATRIX_POLYLINES:
+                _, polyline_list = await batch_travel_times(pois, transportation_mode)
+            else:
+                polyline_list = [None] * (len(pois) - 1)
+            travel_time_list = None
+        else:
+            travel_time_list, polyline_list = await batch_travel_times(pois, transportation_mode)
 
         # Build base day schedule with meals and transport
         day_schedule = await build_day_schedule(
@@ -96,7 +161,10 @@ async def build_full_schedule(rough_plan: dict, options: dict) -> dict:
             avg_poi_duration,
             travel_time_list, polyline_list,
             meal_options,
-            return_time
+            return_minute,
+            travel_matrix=travel_matrix,
+            opening_hours=opening_hours,
+            weekday=weekday
         )
 
         # Insert flexible time blocks (e.g. rest/shopping)
@@ -108,93 +176,252 @@ async def build_full_schedule(rough_plan: dict, options: dict) -> dict:
             if not block or not isinstance(block, dict):
                 print(f"⚠️ Invalid block skipped in {day_name}: {block}")
                 continue
-            if not block.get("start_time") or not block.get("end_time"):
+            if block.get("start_time") is None or block.get("end_time") is None:
                 print(f"⚠️ Missing time block skipped in {day_name}: {block}")
                 continue
             valid_schedule.append(block)
 
-        full_schedule[day_name] = valid_schedule
+        # ⛔ Flag POIs whose opening hours leave no slot on this day
+        if unscheduled:
+            print(f"⛔ {day_name}: outside opening hours: {[poi.get('name') for poi in unscheduled]}")
+            valid_schedule.extend(
+                insert_unscheduled_block(return_minute, poi, day_name, current_day_date) for poi in unscheduled
+            )
+
+        # 🕒 Render "HH:MM" once, after all timeline arithmetic
+        full_schedule[day_name] = render_times(valid_schedule)
         day_counter += 1
 
     return full_schedule
 
 
+async def route_day_with_matrix(pois: List[Dict], transportation_mode: str,
+                                start: Optional[Dict] = None) -> tuple:
+    """
+    Fetches one travel-time matrix for a day and reorders its POIs on real travel minutes.
+
+    Args:
+        pois: List of POI dicts for this day
+        transportation_mode: "have_car" or "no_car"
+        start: Optional {"lat", "lng"} fixed start (e.g. hotel)
+
+    Returns:
+        Tuple:
+            - List[Dict]: POIs in optimized order
+            - np.ndarray: (N, N) travel minutes in that order
+    """
+    if not (start and "lat" in start and "lng" in start):
+        start = None
+    nodes = ([start] if start else []) + list(pois)
+    matrix = await fetch_travel_matrix(nodes, transportation_mode)
+
+    ordered, total_minutes = await asyncio.to_thread(optimize_route, pois, start=start, matrix=matrix)
+    offset = 1 if start else 0
+    position = {id(poi): idx + offset for idx, poi in enumerate(pois)}
+    order = [position[id(poi)] for poi in ordered]
+    print(f"🧭 Matrix route: {len(ordered)} POIs, {total_minutes:.0f} travel minutes")
+
+    return ordered, matrix[np.ix_(order, order)]
+
+
 async def build_day_schedule(pois, start_time, date, day_name, avg_poi_duration,
-                             travel_time_list, polyline_list, meal_options, return_time):
+                             travel_time_list, polyline_list, meal_options, return_time,
+                             travel_matrix=None, opening_hours=None, weekday=None):
     """
     Constructs a time-based day schedule from ordered POIs.
 
     Args:
         pois: List of POI dicts for this day
-        start_time: datetime object (day start time)
+        start_time: int, day start in minutes since midnight (e.g. 540 = 09:00)
         date: str, e.g. "2025-05-01"
         day_name: "Day 1"
         avg_poi_duration: minutes per POI
         travel_time_list: list of minutes between POIs
         polyline_list: routing polylines for frontend map
         meal_options: includes breakfast/lunch/dinner bools
-        return_time: str, e.g. "21:00"
+        return_time: int minutes since midnight, or "HH:MM" (e.g. "21:00")
+        travel_matrix: optional (N, N) minutes in `pois` order; when given,
+                       travel times are read from it instead of `travel_time_list`
+        opening_hours: optional List[OpeningHours] aligned with `pois`; visits wait
+                       for their POI to open and are flagged "closed" if they cannot fit
+        weekday: int, 0 = Monday (required with `opening_hours`)
 
     Returns:
-        List[Dict]: Timeline blocks, e.g.:
+        List[Dict]: Timeline blocks with integer-minute start_time / end_time
+                    (rendered to "HH:MM" by `helper.render_times`), e.g.:
             [
-                {type: "Meal", time: "09:00", label: "Breakfast"},
-                {type: "Sightseeing", time: "10:00", poi: {...}},
-                {type: "Transportation", time: "11:30", from: A, to: B, ...},
+                {type: "Meal", start_time: 540, end_time: 570, activity: "Breakfast"},
+                {type: "Sightseeing", start_time: 570, end_time: 660, ...},
+                {type: "Transportation", start_time: 660, end_time: 675, from_id: A, to_id: B, ...},
                 ...
             ]
     """
-    lunch_hour, lunch_minute = map(int, DEFAULT_LUNCH_TIME.split(":"))
-    dinner_hour, dinner_minute = map(int, DEFAULT_DINNER_TIME.split(":"))
+    day_schedule, _, _ = _build_day(
+        pois, start_time, date, day_name, avg_poi_duration,
+        travel_time_list, polyline_list, meal_options, return_time,
+        travel_matrix=travel_matrix, opening_hours=opening_hours, weekday=weekday
+    )
+    return day_schedule
+
+
+def _build_day(pois, start_time, date, day_name, avg_poi_duration,
+               travel_time_list, polyline_list, meal_options, return_time,
+               travel_matrix=None, opening_hours=None, weekday=None, reorder=False):
+    """
+    Schedules one day; with `reorder`, also picks the visit order from opening hours.
+
+    Without `reorder` the POI order is kept. With `reorder` (needs `travel_matrix`),
+    the next visit is the first POI in route order that is open within
+    OPENING_HOURS_MAX_WAIT minutes of arrival — unless that would make another
+    open POI miss its window — else the POI that opens soonest; POIs that cannot
+    fit anywhere today are left out.
+
+    Returns:
+        Tuple:
+            - List[Dict]: Timeline blocks (integer-minute times)
+            - List[int]: Visited POI indices in schedule order
+            - List[int]: POI indices that could not be scheduled (reorder only)
+    """
+    if isinstance(return_time, str):
+        return_time = to_minutes(return_time)
+    include_lunch = meal_options.get("include_lunch", True)
+    include_dinner = meal_options.get("include_dinner", True)
+
+    if travel_matrix is not None:
+        travel_rows = np.asarray(travel_matrix).astype(int).tolist()
+
+        def travel(i, j):
+            return travel_rows[i][j]
+    else:
+        def travel(i, j):
+            return travel_time_list[i]
+
+    # Week-minute offset for opening-hours checks
+    week_base = (weekday or 0) * MINUTES_PER_DAY
+    day_limit = week_base + MINUTES_PER_DAY
+
+    def fit(idx, arrival):
+        """(start, window_end) of the earliest fitting visit today, or None."""
+        found = opening_hours[idx].earliest_fit(arrival, avg_poi_duration)
+        if found is None or found[0] + avg_poi_duration > day_limit:
+            return None
+        return found
 
     day_schedule = []
     current_time = start_time
+    # Meals still to take, in time order: (meal minute, insert function)
+    meals = deque(
+        (minute, insert) for minute, insert, included in
+        ((LUNCH_MINUTE, insert_lunch, include_lunch), (DINNER_MINUTE, insert_dinner, include_dinner)) if included
+    )
+    remaining = deque(range(len(pois)))
+    order = []
 
     # 🍳 Insert breakfast
-    if current_time.hour <= 9 and meal_options.get("include_breakfast", True):
+    if current_time // 60 <= BREAKFAST_LATEST_HOUR and meal_options.get("include_breakfast", True):
         breakfast_block, current_time = insert_breakfast(current_time, day_name, date)
         day_schedule.append(breakfast_block)
 
-    for idx, poi in enumerate(pois):
-        # 🥗 Insert lunch if needed
-        if (
-            meal_options.get("include_lunch", True) and
-            (current_time.hour > lunch_hour or
-             (current_time.hour == lunch_hour and current_time.minute >= lunch_minute)) and
-            not any(x for x in day_schedule if x["type"] == "Meal" and "Lunch" in x["activity"])
-        ):
-            lunch_block, current_time = insert_lunch(current_time, day_name, date)
-            day_schedule.append(lunch_block)
+    # First visit: the route's first POI, or (reorder) the best one open from the start
+    idx = remaining[0] if remaining else None
+    if reorder and remaining:
+        idx, _ = _pick_next_visit(remaining, None, week_base + current_time, avg_poi_duration, travel, fit)
+
+    while idx is not None:
+        # 🥗 Insert lunch / dinner once their time has come (after a visit + transport)
+        while meals and current_time >= meals[0][0]:
+            meal_block, current_time = meals.popleft()[1](current_time, day_name, date)
+            day_schedule.append(meal_block)
+
+        poi = pois[idx]
+        remaining.remove(idx)
+
+        # ⏳ Wait for the POI to open (week minutes)
+        status = None
+        if opening_hours is not None:
+            found = fit(idx, week_base + current_time)
+            if not opening_hours[idx].known:
+                status = "unknown"
+            elif found:
+                status = "open"
+                # A meal whose time comes before the POI opens is taken during the wait (splitting it)
+                while found and found[0] - week_base > current_time:
+                    open_time = found[0] - week_base
+                    until = meals[0][0] if meals and meals[0][0] < open_time else open_time
+                    if until > current_time:
+                        wait_block, current_time = insert_wait_block(current_time, until, poi, day_name, date)
+                        day_schedule.append(wait_block)
+                    if until == open_time:
+                        break
+                    meal_block, current_time = meals.popleft()[1](current_time, day_name, date)
+                    day_schedule.append(meal_block)
+                    found = fit(idx, week_base + current_time)
+                if not found:
+                    status = "closed"
+            else:
+                status = "closed"
 
         # 📍 Insert POI visit block
         poi_block, current_time = insert_poi_block(current_time, poi, avg_poi_duration, day_name, date)
+        if status:
+            poi_block["opening_status"] = status
         day_schedule.append(poi_block)
-
-        # 🚗 Insert transport block
-        if idx < len(pois) - 1:
-            next_poi = pois[idx + 1]
-            travel_time = travel_time_list[idx]
-            polyline = polyline_list[idx]
+        order.append(idx)
+
+        # 🚗 Insert transport block to the next visit
+        next_idx = remaining[0] if remaining else None
+        if reorder and remaining:
+            next_idx, _ = _pick_next_visit(remaining, idx, week_base + current_time, avg_poi_duration, travel, fit)
+        if next_idx is not None:
+            polyline = polyline_list[idx] if polyline_list and next_idx == idx + 1 else None
             transport_block, current_time = insert_transport_block(
-                current_time, poi, next_poi, travel_time, day_name, date, polyline
+                current_time, poi, pois[next_idx], travel(idx, next_idx), day_name, date, polyline
             )
             day_schedule.append(transport_block)
 
-        # 🍽️ Insert dinner if needed
-        if (
-            meal_options.get("include_dinner", True) and
-            (current_time.hour >= dinner_hour) and
-            not any(x for x in day_schedule if x["type"] == "Meal" and "Dinner" in x["activity"])
-        ):
-            dinner_block, current_time = insert_dinner(current_time, day_name, date)
-            day_schedule.append(dinner_block)
+        idx = next_idx
+
+    skipped = list(remaining)
+
+    # 🍽️ Meals due now or before the return (e.g. dinner after an early last visit)
+    while meals and (meals[0][0] <= current_time or meals[0][0] < return_time):
+        meal_minute, insert_meal = meals.popleft()
+        meal_block, current_time = insert_meal(max(current_time, meal_minute), day_name, date)
+        day_schedule.append(meal_block)
 
     # 🏨 Final return to hotel
-    hotel_block = insert_return_to_hotel(
-        current_time,
-        datetime.combine(current_time.date(), datetime.strptime(return_time, "%H:%M").time()),
-        day_name, date
-    )
+    hotel_block = insert_return_to_hotel(current_time, return_time, day_name, date)
     day_schedule.append(hotel_block)
 
-    return day_schedule
+    return day_schedule, order, skipped
+
+
+def _pick_next_visit(candidates, previous, now, duration, travel, fit):
+    """
+    Picks the next POI to visit (see `_build_day`).
+
+    Returns:
+        Tuple: (POI index, visit start week minute), or (None, None) if nothing fits today
+    """
+    options = []
+    for idx in candidates:
+        arrival = now + (travel(previous, idx) if previous is not None else 0)
+        found = fit(idx, arrival)
+        if found:
+            options.append((idx, arrival, found[0], found[1]))
+    if not options:
+        return None, None
+
+    ready = [option for option in options if option[2] - option[1] <= OPENING_HOURS_MAX_WAIT]
+    if not ready:
+        idx, _, start, _ = min(options, key=lambda option: option[2])
+        return idx, start
+
+    # Route order first, unless visiting it first makes another ready POI miss its window
+    idx, _, start, close = ready[0]
+    for other, _, other_start, other_close in ready[1:]:
+        loses_other = start + duration + travel(idx, other) + duration > other_close
+        keeps_first = other_start + duration + travel(other, idx) + duration <= close
+        if loses_other and keeps_first:
+            idx, start, close = other, other_start, other_close
+    return idx, start
@@ -62,6 +62,10 @@ DINNER_DURATION = 60
 FALLBACK_TRANSPORT_MINUTES_CAR = 10
 FALLBACK_TRANSPORT_MINUTES_NO_CAR = 15
 
+# If a travel-time matrix cell fails, estimate from straight-line distance (km/h)
+FALLBACK_SPEED_KMH_CAR = 30
+FALLBACK_SPEED_KMH_NO_CAR = 15
+
 # =============================
 # 🚗 TRANSPORTATION MODES
 # =============================
@@ -18,32 +18,39 @@ Key Features:
 ✅ Supports car and public transport modes  
 ✅ Batches route estimation for performance  
 ✅ Graceful fallback on API errors  
-✅ Returns both minutes + map polyline per hop
+✅ Returns both minutes + map polyline per hop  
+✅ Leg cache + in-flight de-duplication for repeated previews
 
 Author: Tripllery AI Backend
 """
 
 import os
 import asyncio
-import httpx
 from dotenv import load_dotenv
+from services.utils.http_client import request as http_request
 from services.preview.constants import (
     FALLBACK_TRANSPORT_MINUTES_CAR,
     FALLBACK_TRANSPORT_MINUTES_NO_CAR,
     TRANSPORT_MODE_HAVE_CAR,
     TRANSPORT_MODE_NO_CAR,
 )
+from services.preview.leg_cache import make_leg_key, get_or_fetch_leg
 
 load_dotenv()
 
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
-DIRECTIONS_API_URL = "https://maps.googleapis.com/maps/api/directions/json"
+# Point at a local stub (see `stubs/maps_stub.py`) to preview offline
+GOOGLE_MAPS_API_BASE = os.getenv("GOOGLE_MAPS_API_BASE", "https://maps.googleapis.com").rstrip("/")
+DIRECTIONS_API_URL = f"{GOOGLE_MAPS_API_BASE}/maps/api/directions/json"
 
 
 async def fetch_direction(origin: tuple, destination: tuple, transportation_mode: str = TRANSPORT_MODE_HAVE_CAR) -> dict:
     """
     Fetch travel time and polyline between two coordinates using Google Maps API.
 
+    Legs are served from the leg cache when possible, and identical concurrent
+    requests share a single API call. Fallback estimates are never cached.
+
     Args:
         origin (tuple): (lat, lng)
         destination (tuple): (lat, lng)
@@ -58,37 +65,55 @@ async def fetch_direction(origin: tuple, destination: tuple, transportation_mode
     if not GOOGLE_MAPS_API_KEY:
         raise Exception("Google Maps API Key not set!")
 
-    if transportation_mode == TRANSPORT_MODE_HAVE_CAR:
-        mode = "driving"
-    elif transportation_mode == TRANSPORT_MODE_NO_CAR:
-        mode = "transit"
-    else:
-        mode = "driving"
+    return await get_or_fetch_leg(
+        make_leg_key(origin, destination, transportation_mode),
+        lambda: _request_direction(origin, destination, transportation_mode),
+        should_cache=lambda result: result.get("polyline") is not None
+    )
+
+
+def google_travel_mode(transportation_mode: str) -> str:
+    """
+    Maps an internal transport mode to the Google `mode` parameter.
+
+    Args:
+        transportation_mode (str): "have_car" or "no_car"
 
+    Returns:
+        str: "driving" or "transit" (unknown modes drive)
+    """
+    if transportation_mode == TRANSPORT_MODE_NO_CAR:
+        return "transit"
+    return "driving"
+
+
+async def _request_direction(origin: tuple, destination: tuple, transportation_mode: str) -> dict:
+    """
+    Performs the actual Directions API request (no caching), with fallback on error.
+    """
     params = {
         "origin": f"{origin[0]},{origin[1]}",
         "destination": f"{destination[0]},{destination[1]}",
-        "mode": mode,
+        "mode": google_travel_mode(transportation_mode),
         "key": GOOGLE_MAPS_API_KEY
     }
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(DIRECTIONS_API_URL, params=params)
-            data = response.json()
+        response = await http_request("google", "GET", DIRECTIONS_API_URL, params=params)
+        data = response.json()
 
-            if data.get("status") != "OK":
-                raise Exception(f"Directions API error: {data.get('status', 'Unknown error')}")
+        if data.get("status") != "OK":
+            raise Exception(f"Directions API error: {data.get('status', 'Unknown error')}")
 
-            duration_seconds = data["routes"][0]["legs"][0]["duration"]["value"]
-            polyline = data["routes"][0]["overview_polyline"]["points"]
+        duration_seconds = data["routes"][0]["legs"][0]["duration"]["value"]
+        polyline = data["routes"][0]["overview_polyline"]["points"]
 
-            duration_minutes = max(1, duration_seconds // 60)
+        duration_minutes = max(1, duration_seconds // 60)
 
-            return {
-                "minutes": duration_minutes,
-                "polyline": polyline
-            }
+        return {
+            "minutes": duration_minutes,
+            "polyline": polyline
+        }
 
     except Exception as e:
         print(f"💥 Directions API fetch failed: {e}")
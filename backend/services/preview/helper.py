@@ -6,7 +6,11 @@ time blocks (meals, sightseeing, transport, free time, return) used
 in the daily itinerary.
 
 Each function returns a block dictionary (with start_time, end_time, type, etc.)
-and an updated current_time for chaining.
+and an updated current time for chaining.
+
+Times are integer minutes since the day's midnight (values ≥ 1440 run past
+midnight) while a day is being built; `render_times()` converts a finished
+schedule to "HH:MM" strings once, at the end.
 
 Main Use Case:
 --------------
@@ -15,24 +19,56 @@ hour-by-hour trip timeline from POI data and user preferences.
 
 Key Features:
 -------------
-✅ Consistent time format ("HH:MM")  
-✅ Supports location + POI IDs  
-✅ Works with polyline for transport  
+✅ Integer-minute arithmetic, no datetime / strftime per block
+✅ Consistent time format ("HH:MM") via a precomputed lookup table
+✅ Supports location + POI IDs
+✅ Works with polyline for transport
 ✅ Chainable (returns block + updated time)
+✅ Wait / unscheduled blocks for opening-hours conflicts
 
 Author: Tripllery AI Backend
 """
 
-from datetime import datetime, timedelta
+from services.preview.constants import BREAKFAST_DURATION, LUNCH_DURATION, DINNER_DURATION
+
+MINUTES_PER_DAY = 1440
+
+# "00:00" … "23:59", indexed by minute of day
+_HHMM = tuple(f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(MINUTES_PER_DAY))
+
+
+def to_minutes(hhmm: str) -> int:
+    """
+    "HH:MM" → minutes since midnight.
+    """
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(minute: int) -> str:
+    """
+    Minutes since midnight → "HH:MM" (wraps past midnight).
+    """
+    return _HHMM[int(minute) % MINUTES_PER_DAY]
+
+
+def render_times(day_schedule: list) -> list:
+    """
+    Converts every block's integer start_time / end_time to "HH:MM" in place.
+    """
+    for block in day_schedule:
+        block["start_time"] = _HHMM[int(block["start_time"]) % MINUTES_PER_DAY]
+        block["end_time"] = _HHMM[int(block["end_time"]) % MINUTES_PER_DAY]
+    return day_schedule
+
 
 def insert_breakfast(current_time, day, date):
-    breakfast_start = current_time
-    breakfast_end = breakfast_start + timedelta(minutes=30)
+    breakfast_end = current_time + BREAKFAST_DURATION
     block = {
         "day": day,
         "date": date,
-        "start_time": breakfast_start.strftime("%H:%M"),
-        "end_time": breakfast_end.strftime("%H:%M"),
+        "start_time": current_time,
+        "end_time": breakfast_end,
         "type": "Meal",
         "activity": "Breakfast",
         "location": None
@@ -41,13 +77,12 @@ def insert_breakfast(current_time, day, date):
 
 
 def insert_lunch(current_time, day, date):
-    lunch_start = current_time
-    lunch_end = lunch_start + timedelta(minutes=60)
+    lunch_end = current_time + LUNCH_DURATION
     block = {
         "day": day,
         "date": date,
-        "start_time": lunch_start.strftime("%H:%M"),
-        "end_time": lunch_end.strftime("%H:%M"),
+        "start_time": current_time,
+        "end_time": lunch_end,
         "type": "Meal",
         "activity": "Lunch Break",
         "location": None
@@ -56,13 +91,12 @@ def insert_lunch(current_time, day, date):
 
 
 def insert_dinner(current_time, day, date):
-    dinner_start = current_time
-    dinner_end = dinner_start + timedelta(minutes=60)
+    dinner_end = current_time + DINNER_DURATION
     block = {
         "day": day,
         "date": date,
-        "start_time": dinner_start.strftime("%H:%M"),
-        "end_time": dinner_end.strftime("%H:%M"),
+        "start_time": current_time,
+        "end_time": dinner_end,
         "type": "Meal",
         "activity": "Dinner Break",
         "location": None
@@ -71,13 +105,12 @@ def insert_dinner(current_time, day, date):
 
 
 def insert_poi_block(current_time, poi, duration_minutes, day, date):
-    poi_start = current_time
-    poi_end = poi_start + timedelta(minutes=duration_minutes)
+    poi_end = current_time + duration_minutes
     block = {
         "day": day,
         "date": date,
-        "start_time": poi_start.strftime("%H:%M"),
-        "end_time": poi_end.strftime("%H:%M"),
+        "start_time": current_time,
+        "end_time": poi_end,
         "type": "Sightseeing",
         "activity": poi["name"],
         "id": poi.get("id"),
@@ -90,8 +123,7 @@ def insert_poi_block(current_time, poi, duration_minutes, day, date):
 
 
 def insert_transport_block(current_time, from_poi, to_poi, transport_time_minutes, day, date, polyline=None):
-    transport_start = current_time
-    transport_end = transport_start + timedelta(minutes=transport_time_minutes)
+    transport_end = current_time + transport_time_minutes
 
     if transport_time_minutes <= 1:
         activity_name = f"Transportation (~1 min) {from_poi['name']} ➔ {to_poi['name']}"
@@ -101,8 +133,8 @@ def insert_transport_block(current_time, from_poi, to_poi, transport_time_minute
     block = {
         "day": day,
         "date": date,
-        "start_time": transport_start.strftime("%H:%M"),
-        "end_time": transport_end.strftime("%H:%M"),
+        "start_time": current_time,
+        "end_time": transport_end,
         "type": "Transportation",
         "activity": activity_name,
         "from_id": from_poi.get("id"),
@@ -121,13 +153,12 @@ def insert_transport_block(current_time, from_poi, to_poi, transport_time_minute
 
 
 def insert_flexible_block(current_time, flexible_minutes, day, date):
-    flex_start = current_time
-    flex_end = flex_start + timedelta(minutes=flexible_minutes)
+    flex_end = current_time + flexible_minutes
     block = {
         "day": day,
         "date": date,
-        "start_time": flex_start.strftime("%H:%M"),
-        "end_time": flex_end.strftime("%H:%M"),
+        "start_time": current_time,
+        "end_time": flex_end,
         "type": "Flexible",
         "activity": "Free Time / Explore",
         "location": None
@@ -136,15 +167,44 @@ def insert_flexible_block(current_time, flexible_minutes, day, date):
 
 
 def insert_return_to_hotel(current_time, day_end_time, day, date):
-    return_start = current_time
-    return_end = day_end_time
     block = {
         "day": day,
         "date": date,
-        "start_time": return_start.strftime("%H:%M"),
-        "end_time": return_end.strftime("%H:%M"),
+        "start_time": current_time,
+        "end_time": day_end_time,
         "type": "Return",
         "activity": "Return to Hotel",
         "location": None
     }
     return block
+
+
+def insert_wait_block(current_time, open_time, poi, day, date):
+    block = {
+        "day": day,
+        "date": date,
+        "start_time": current_time,
+        "end_time": open_time,
+        "type": "Flexible",
+        "activity": f"Free Time (until {poi['name']} opens)",
+        "location": None
+    }
+    return block, open_time
+
+
+def insert_unscheduled_block(current_time, poi, day, date):
+    block = {
+        "day": day,
+        "date": date,
+        "start_time": current_time,
+        "end_time": current_time,
+        "type": "Unscheduled",
+        "activity": f"Not schedulable (opening hours): {poi['name']}",
+        "id": poi.get("id"),
+        "location": {
+            "lat": poi.get("lat"),
+            "lng": poi.get("lng")
+        },
+        "opening_status": "closed"
+    }
+    return block
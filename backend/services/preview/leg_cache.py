@@ -0,0 +1,116 @@
+"""
+leg_cache.py · Route-Leg Cache for Directions Lookups
+
+This module caches single Directions legs (origin → destination, mode) so that
+re-previewing an edited plan does not re-fetch legs that were computed seconds ago.
+
+Identical legs requested concurrently (e.g. two previews of the same plan) are
+de-duplicated: only the first caller hits the API, the others await its result.
+
+Main Use Case:
+--------------
+Used by `services/preview/directions.fetch_direction` during `/preview`.
+
+Key Features:
+-------------
+✅ Key = rounded origin/destination coordinates + transport mode
+✅ TTL eviction + bounded LRU (in-memory tier of `TieredCache`)
+✅ Stores travel minutes together with the encoded polyline
+✅ In-flight de-duplication of identical concurrent requests
+✅ Counters via `get_leg_cache_stats()`
+
+Author: Tripllery AI Backend
+"""
+
+import os
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+from services.utils.kv_cache import TieredCache
+
+LEG_CACHE_TTL = float(os.getenv("LEG_CACHE_TTL", str(6 * 3600)))
+LEG_CACHE_MAX_ENTRIES = int(os.getenv("LEG_CACHE_MAX_ENTRIES", "5000"))
+LEG_COORD_PRECISION = int(os.getenv("LEG_COORD_PRECISION", "4"))  # 4 decimals ≈ 11 m
+
+leg_cache = TieredCache(
+    name="legs",
+    ttl_seconds=LEG_CACHE_TTL,
+    max_memory_entries=LEG_CACHE_MAX_ENTRIES
+)
+
+# ✨ key → running task for legs currently being fetched
+_inflight: Dict[str, asyncio.Task] = {}
+_inflight_joins = 0
+
+
+def make_leg_key(origin: tuple, destination: tuple, mode: str) -> str:
+    """
+    Builds a cache key from rounded coordinates and transport mode.
+
+    Args:
+        origin (tuple): (lat, lng)
+        destination (tuple): (lat, lng)
+        mode (str): Transport mode, e.g. "have_car" / "no_car"
+
+    Returns:
+        str: Key like "42.3601,-71.0589|42.3467,-71.0972|have_car"
+    """
+    p = LEG_COORD_PRECISION
+    return (
+        f"{round(origin[0], p)},{round(origin[1], p)}|"
+        f"{round(destination[0], p)},{round(destination[1], p)}|{mode}"
+    )
+
+
+async def get_or_fetch_leg(
+    key: str,
+    fetch: Callable[[], Awaitable[dict]],
+    should_cache: Callable[[dict], bool]
+) -> dict:
+    """
+    Returns a cached leg, joins an identical in-flight request, or fetches it.
+
+    Args:
+        key (str): Leg key from `make_leg_key`
+        fetch (Callable): Coroutine factory performing the real request
+        should_cache (Callable): Predicate deciding whether a result is cacheable
+                                 (fallback estimates are not cached)
+
+    Returns:
+        dict: {"minutes": int, "polyline": str or None}
+    """
+    global _inflight_joins
+
+    cached = leg_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    task = _inflight.get(key)
+    if task is not None:
+        _inflight_joins += 1
+        return dict(await asyncio.shield(task))
+
+    task = asyncio.ensure_future(fetch())
+    _inflight[key] = task
+    try:
+        result = await asyncio.shield(task)
+    finally:
+        if task.done():
+            _inflight.pop(key, None)
+        else:
+            task.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    if should_cache(result):
+        leg_cache.set(key, result)
+    return dict(result)
+
+
+def get_leg_cache_stats() -> Dict:
+    """
+    Returns hit/miss counters of the leg cache plus in-flight join count.
+    """
+    return {
+        **leg_cache.stats(),
+        "inflight": len(_inflight),
+        "inflight_joins": _inflight_joins
+    }
@@ -0,0 +1,219 @@
+"""
+opening_hours.py · Opening-Hours Interval Index
+
+This module parses Google Places `weekday_text` opening hours (as stored on
+cards under "opening_hours") into a compact interval index: sorted start / end
+minutes over one week (Monday 00:00 = 0 … Sunday 24:00 = 10080).
+
+"Can this visit start now?" and "when is the earliest start that still fits
+the visit?" are binary searches over a handful of integers, so the preview
+builder can check every visit without re-parsing strings.
+
+Main Use Case:
+--------------
+Used by `services/preview/builder.py` (`/preview`) to place visits inside
+open windows, reorder or defer visits that are not open yet, and flag POIs
+that cannot be visited on their scheduled day.
+
+Key Features:
+-------------
+✅ Handles "Closed", "Open 24 hours", split ranges, overnight ranges
+✅ Accepts 12-hour ("9:00 AM – 5:00 PM") and 24-hour ("09:00–17:00") text
+✅ Parsed once per distinct weekday_text (LRU memoized, shared across requests)
+✅ Unknown / unparseable hours are treated as always open (never false "closed")
+✅ O(log k) fit queries
+
+Author: Tripllery AI Backend
+"""
+
+import os
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+OPENING_HOURS_CACHE_SIZE = int(os.getenv("OPENING_HOURS_CACHE_SIZE", "4096"))
+
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+    "friday": 4, "saturday": 5, "sunday": 6
+}
+
+_SPACES = re.compile(r"[\u00a0\u2009\u202f]")
+_DASHES = re.compile(r"\s*[\u2013\u2014\-]\s*|\s+to\s+")
+_TIME = re.compile(r"^(\d{1,2})(?::(\d{2}))?\s*([ap])?\.?\s*m?\.?$", re.IGNORECASE)
+
+
+class OpeningHours:
+    """
+    Weekly opening windows as sorted, non-overlapping [start, end) minute intervals.
+
+    Attributes:
+        starts (Tuple[int, ...]): Window starts (week minutes)
+        ends (Tuple[int, ...]): Window ends (week minutes)
+        known (bool): False when the POI had no (parseable) hours → always open
+    """
+
+    __slots__ = ("starts", "ends", "known")
+
+    def __init__(self, intervals: List[Tuple[int, int]], known: bool = True):
+        merged: List[List[int]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = tuple(start for start, _ in merged)
+        self.ends = tuple(end for _, end in merged)
+        self.known = known
+
+    def earliest_fit(self, minute: int, duration: int) -> Optional[Tuple[int, int]]:
+        """
+        Finds the earliest start ≥ `minute` where a visit of `duration` fits in one window.
+
+        Args:
+            minute (int): Week minute the visitor can arrive
+            duration (int): Visit length in minutes
+
+        Returns:
+            Optional[Tuple[int, int]]: (start, window_end) in week minutes, or None
+                                       if nothing fits before the end of the week
+        """
+        idx = bisect_right(self.ends, minute)
+        while idx < len(self.starts):
+            start = max(minute, self.starts[idx])
+            if start + duration <= self.ends[idx]:
+                return start, self.ends[idx]
+            idx += 1
+        return None
+
+    def is_open(self, minute: int) -> bool:
+        idx = bisect_right(self.starts, minute) - 1
+        return idx >= 0 and minute < self.ends[idx]
+
+
+ALWAYS_OPEN = OpeningHours([(0, MINUTES_PER_WEEK)], known=False)
+
+
+def _parse_time(text: str, meridiem: Optional[str] = None) -> Optional[Tuple[int, Optional[str]]]:
+    """
+    "9:00 AM" / "17:30" / "5" → (minute of day, "a" | "p" | None).
+    """
+    match = _TIME.match(text.strip())
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    marker = (match.group(3) or meridiem or "").lower() or None
+    if marker:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if marker == "p" else 0)
+    if hour > 24 or minute > 59:
+        return None
+    return hour * 60 + minute, (match.group(3) or "").lower() or None
+
+
+def _parse_range(text: str) -> Optional[Tuple[int, int]]:
+    """
+    "9:00 AM – 5:00 PM" → (540, 1020); ends past midnight spill into the next day.
+    """
+    parts = _DASHES.split(text.strip())
+    if len(parts) != 2:
+        return None
+    end = _parse_time(parts[1])
+    if end is None:
+        return None
+    end_minute, end_marker = end
+
+    # "1:00 – 5:00 PM": the start borrows the end's AM/PM, unless that puts it after the end
+    start = _parse_time(parts[0], meridiem=end_marker)
+    if start is None:
+        return None
+    start_minute, start_marker = start
+    if start_marker is None and end_marker == "p" and start_minute > end_minute:
+        start_minute = _parse_time(parts[0], meridiem="a")[0]
+
+    if end_minute <= start_minute:
+        end_minute += MINUTES_PER_DAY  # overnight (or "… – 12:00 AM")
+    return start_minute, end_minute
+
+
+def _parse_day(text: str) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parses the hours part of one weekday line into day-relative intervals.
+    """
+    text = text.strip()
+    lowered = text.lower()
+    if lowered == "closed":
+        return []
+    if lowered in ("open 24 hours", "24 hours", "open 24h"):
+        return [(0, MINUTES_PER_DAY)]
+
+    intervals = []
+    for part in text.split(","):
+        interval = _parse_range(part)
+        if interval is None:
+            return None
+        intervals.append(interval)
+    return intervals
+
+
+@lru_cache(maxsize=OPENING_HOURS_CACHE_SIZE)
+def parse_weekday_text(weekday_text: Tuple[str, ...]) -> OpeningHours:
+    """
+    Parses Google `weekday_text` lines into an OpeningHours index.
+
+    Args:
+        weekday_text (Tuple[str, ...]): e.g. ("Monday: 9:00 AM – 5:00 PM", "Tuesday: Closed", ...)
+
+    Returns:
+        OpeningHours: Interval index; days missing or unparseable are open all day,
+                      and ALWAYS_OPEN is returned when no day could be parsed
+    """
+    intervals: List[Tuple[int, int]] = []
+    parsed_days = set()
+
+    for line in weekday_text:
+        name, _, hours = _SPACES.sub(" ", str(line)).partition(":")
+        weekday = WEEKDAYS.get(name.strip().lower())
+        if weekday is None or weekday in parsed_days:
+            continue
+        day_intervals = _parse_day(hours)
+        if day_intervals is None:
+            continue
+        parsed_days.add(weekday)
+        base = weekday * MINUTES_PER_DAY
+        for start, end in day_intervals:
+            start, end = base + start, base + end
+            if end > MINUTES_PER_WEEK:  # Sunday night → Monday morning
+                intervals.append((0, end - MINUTES_PER_WEEK))
+                end = MINUTES_PER_WEEK
+            intervals.append((start, end))
+
+    if not parsed_days:
+        return ALWAYS_OPEN
+
+    for weekday in set(range(7)) - parsed_days:
+        intervals.append((weekday * MINUTES_PER_DAY, (weekday + 1) * MINUTES_PER_DAY))
+    return OpeningHours(intervals)
+
+
+def get_opening_hours(poi: Dict) -> OpeningHours:
+    """
+    Returns the (memoized) OpeningHours index of a POI / card.
+    """
+    weekday_text = poi.get("opening_hours")
+    if not weekday_text or not isinstance(weekday_text, list):
+        return ALWAYS_OPEN
+    return parse_weekday_text(tuple(weekday_text))
+
+
+def build_opening_hours_index(pois: List[Dict]) -> List[OpeningHours]:
+    """
+    Precomputes the OpeningHours of each POI (aligned with `pois`).
+    """
+    return [get_opening_hours(poi) for poi in pois]
+
@@ -0,0 +1,198 @@
+"""
+travel_matrix.py · Travel-Time Matrix Engine (Google Distance Matrix API)
+
+This module fetches a full N×N travel-time matrix for one day's POIs in a few
+batched Distance Matrix requests, instead of one Directions call per
+consecutive pair after the order is already fixed.
+
+Because every pair is known, the day-order optimizer can route on real travel
+minutes, and any reorder is served from the same matrix without new requests.
+
+Main Use Case:
+--------------
+Used during `/preview` in matrix mode (PREVIEW_TRAVEL_TIMES=matrix):
+- Reorder each day on real travel minutes (`optimizer.optimize_route`)
+- Feed consecutive travel minutes to `build_day_schedule`
+
+Key Features:
+-------------
+✅ Blocks of ≤ 10×10 origins × destinations (100 elements per request), fetched concurrently
+✅ Matrix cache keyed by the POI set + mode, so reordered days hit the cache
+✅ Cells that fail are estimated from straight-line distance (never cached)
+✅ Works offline against the local stub (`GOOGLE_MAPS_API_BASE`, see `stubs/maps_stub.py`)
+✅ Counters via `get_matrix_cache_stats()`
+
+Author: Tripllery AI Backend
+"""
+
+import os
+import asyncio
+import hashlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from services.utils.geo import coords_array, distance_matrix_km
+from services.utils.http_client import request as http_request
+from services.utils.kv_cache import TieredCache
+from services.preview.directions import GOOGLE_MAPS_API_BASE, GOOGLE_MAPS_API_KEY, google_travel_mode
+from services.preview.constants import (
+    FALLBACK_SPEED_KMH_CAR,
+    FALLBACK_SPEED_KMH_NO_CAR,
+    TRANSPORT_MODE_HAVE_CAR,
+)
+
+DISTANCE_MATRIX_API_URL = f"{GOOGLE_MAPS_API_BASE}/maps/api/distancematrix/json"
+
+# Google allows at most 100 elements per request
+MATRIX_BLOCK_SIZE = int(os.getenv("MATRIX_BLOCK_SIZE", "10"))
+MATRIX_CACHE_TTL = float(os.getenv("MATRIX_CACHE_TTL", str(6 * 3600)))
+MATRIX_CACHE_MAX_ENTRIES = int(os.getenv("MATRIX_CACHE_MAX_ENTRIES", "500"))
+MATRIX_COORD_PRECISION = int(os.getenv("MATRIX_COORD_PRECISION", "4"))  # 4 decimals ≈ 11 m
+
+matrix_cache = TieredCache(
+    name="travel_matrices",
+    ttl_seconds=MATRIX_CACHE_TTL,
+    max_memory_entries=MATRIX_CACHE_MAX_ENTRIES
+)
+
+_matrix_requests = 0
+
+
+def _node_key(node: Dict) -> str:
+    p = MATRIX_COORD_PRECISION
+    return f"{round(node['lat'], p)},{round(node['lng'], p)}"
+
+
+def make_matrix_key(nodes: List[Dict], mode: str) -> Tuple[str, List[int]]:
+    """
+    Builds an order-independent cache key for a set of nodes.
+
+    Args:
+        nodes (List[Dict]): Points with "lat" / "lng"
+        mode (str): Transport mode, e.g. "have_car" / "no_car"
+
+    Returns:
+        Tuple:
+            - str: Key (SHA-256 of sorted rounded coordinates + mode)
+            - List[int]: Canonical order (indices into `nodes`) the cached matrix is stored in
+    """
+    keys = [_node_key(node) for node in nodes]
+    canonical = sorted(range(len(nodes)), key=lambda i: keys[i])
+    digest = hashlib.sha256(("|".join(keys[i] for i in canonical) + f"|{mode}").encode("utf-8")).hexdigest()
+    return digest, canonical
+
+
+def estimate_minutes(nodes: List[Dict], transportation_mode: str) -> np.ndarray:
+    """
+    Straight-line travel-time estimate used for cells the API could not answer.
+
+    Returns:
+        np.ndarray: (N, N) minutes, ≥ 1 off the diagonal
+    """
+    speed = FALLBACK_SPEED_KMH_CAR if transportation_mode == TRANSPORT_MODE_HAVE_CAR else FALLBACK_SPEED_KMH_NO_CAR
+    minutes = np.maximum(1.0, np.ceil(distance_matrix_km(coords_array(nodes)) / speed * 60))
+    np.fill_diagonal(minutes, 0.0)
+    return minutes
+
+
+async def fetch_travel_matrix(nodes: List[Dict], transportation_mode: str = TRANSPORT_MODE_HAVE_CAR) -> np.ndarray:
+    """
+    Returns the travel-time matrix (minutes) between all nodes.
+
+    Args:
+        nodes (List[Dict]): Points with "lat" / "lng" (POIs, optionally a hotel first)
+        transportation_mode (str): "have_car" or "no_car"
+
+    Returns:
+        np.ndarray: (N, N) minutes; matrix[i][j] = travel time from nodes[i] to nodes[j]
+    """
+    n = len(nodes)
+    if n < 2:
+        return np.zeros((n, n))
+
+    key, canonical = make_matrix_key(nodes, transportation_mode)
+    cached = matrix_cache.get(key)
+    if cached is not None:
+        return _from_canonical(np.array(cached, dtype=float), canonical)
+
+    if not GOOGLE_MAPS_API_KEY:
+        raise Exception("Google Maps API Key not set!")
+
+    # Fetch in canonical order so the cached matrix is reusable for any ordering
+    ordered = [nodes[i] for i in canonical]
+    minutes = estimate_minutes(ordered, transportation_mode)
+    answered = np.eye(n, dtype=bool)
+
+    blocks = [
+        (row, col)
+        for row in range(0, n, MATRIX_BLOCK_SIZE)
+        for col in range(0, n, MATRIX_BLOCK_SIZE)
+    ]
+    results = await asyncio.gather(*(
+        _request_block(ordered, row, col, transportation_mode) for row, col in blocks
+    ))
+    for (row, col), cells in zip(blocks, results):
+        for (i, j), value in cells.items():
+            minutes[row + i, col + j] = value
+            answered[row + i, col + j] = True
+
+    if answered.all():
+        matrix_cache.set(key, minutes.tolist())
+    else:
+        print(f"⚠️ Travel matrix: {int((~answered).sum())}/{n * n} cells estimated")
+
+    return _from_canonical(minutes, canonical)
+
+
+def _from_canonical(matrix: np.ndarray, canonical: List[int]) -> np.ndarray:
+    """
+    Re-indexes a canonical-order matrix back into the caller's node order.
+    """
+    position = np.empty(len(canonical), dtype=int)
+    position[canonical] = np.arange(len(canonical))
+    return matrix[np.ix_(position, position)]
+
+
+async def _request_block(nodes: List[Dict], row: int, col: int, transportation_mode: str) -> Dict[Tuple[int, int], float]:
+    """
+    Fetches one origins × destinations block; returns {(i, j): minutes} for the cells that succeeded.
+    """
+    global _matrix_requests
+
+    origins = nodes[row:row + MATRIX_BLOCK_SIZE]
+    destinations = nodes[col:col + MATRIX_BLOCK_SIZE]
+    params = {
+        "origins": "|".join(f"{p['lat']},{p['lng']}" for p in origins),
+        "destinations": "|".join(f"{p['lat']},{p['lng']}" for p in destinations),
+        "mode": google_travel_mode(transportation_mode),
+        "key": GOOGLE_MAPS_API_KEY
+    }
+
+    try:
+        _matrix_requests += 1
+        response = await http_request("google", "GET", DISTANCE_MATRIX_API_URL, params=params)
+        data = response.json()
+
+        if data.get("status") != "OK":
+            raise Exception(f"Distance Matrix API error: {data.get('status', 'Unknown error')}")
+
+        cells = {}
+        for i, matrix_row in enumerate(data["rows"]):
+            for j, element in enumerate(matrix_row["elements"]):
+                if row + i == col + j:
+                    continue
+                if element.get("status") == "OK":
+                    cells[(i, j)] = max(1, element["duration"]["value"] // 60)
+        return cells
+
+    except Exception as e:
+        print(f"💥 Distance Matrix fetch failed (block {row},{col}): {e}")
+        return {}
+
+
+def get_matrix_cache_stats() -> Dict:
+    """
+    Returns hit/miss counters of the matrix cache plus the number of API requests made.
+    """
+    return {**matrix_cache.stats(), "api_requests": _matrix_requests}
@@ -1,8 +1,9 @@
 """
-config.py · Model Name Configuration
+config.py · Model Name & Cache Configuration
 
 This utility module provides a centralized way to retrieve
-the LLM model name (e.g., "gpt-3.5-turbo") from environment variables.
+the LLM model name (e.g., "gpt-3.5-turbo") and the local cache
+directory from environment variables.
 
 This ensures consistency across all modules that invoke OpenAI APIs,
 and allows for easy switching between models without changing multiple files.
@@ -20,7 +21,8 @@ Key Features:
 -------------
 ✅ Avoids hardcoded model strings  
 ✅ Defaults to "gpt-3.5-turbo" if env var is missing  
-✅ Compatible with deployment configuration
+✅ Compatible with deployment configuration  
+✅ Single on-disk location for persistent caches (`CACHE_DIR`)
 
 Author: Tripllery AI Backend
 """
@@ -29,3 +31,9 @@ import os
 
 # ✅ Main model configuration used by all OpenAI LLM calls
 MODEL_NAME = os.getenv("MODEL_NAME", "gpt-3.5-turbo")
+
+# ✅ Directory for persistent on-disk caches (SQLite files), shared by all workers
+CACHE_DIR = os.getenv(
+    "TRIPLLERY_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".cache")
+)
@@ -0,0 +1,117 @@
+"""
+geo.py · Vectorized Geographic Kernels (NumPy)
+
+This utility module provides the shared distance and center kernels used wherever
+the backend reasons about POI coordinates. Everything operates on whole NumPy
+arrays at once instead of looping over POIs in Python.
+
+Main Use Case:
+--------------
+Used by:
+- `maps/poi_cleaner.py` (outlier filtering around a robust center)
+- Day clustering and intra-day ordering in `services/formatter/`
+
+Key Features:
+-------------
+✅ Haversine distance with NumPy broadcasting (point↔points, pairwise)
+✅ Full N×N distance matrix in one call
+✅ Robust center estimates: coordinate-wise median or iteratively trimmed mean
+✅ Pure NumPy, no geopy / sklearn dependency
+
+Author: Tripllery AI Backend
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+# Mean Earth radius (IUGG), kilometers
+EARTH_RADIUS_KM = 6371.0088
+
+
+def coords_array(pois: List[Dict]) -> np.ndarray:
+    """
+    Converts POIs into an (N, 2) float array of [lat, lng].
+
+    Args:
+        pois (List[Dict]): POIs with "lat" and "lng"
+
+    Returns:
+        np.ndarray: Shape (N, 2)
+    """
+    if not pois:
+        return np.empty((0, 2), dtype=float)
+    return np.array([[poi["lat"], poi["lng"]] for poi in pois], dtype=float)
+
+
+def haversine_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """
+    Great-circle distance in kilometers; all arguments broadcast against each other.
+
+    Args:
+        lat1, lng1: Degrees (scalars or arrays)
+        lat2, lng2: Degrees (scalars or arrays)
+
+    Returns:
+        np.ndarray: Distances in km with the broadcast shape of the inputs
+    """
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distances_from_km(center, coords: np.ndarray) -> np.ndarray:
+    """
+    Distances from one (lat, lng) point to every row of an (N, 2) array.
+
+    Returns:
+        np.ndarray: Shape (N,)
+    """
+    return haversine_km(center[0], center[1], coords[:, 0], coords[:, 1])
+
+
+def distance_matrix_km(coords: np.ndarray) -> np.ndarray:
+    """
+    Pairwise great-circle distances between all points.
+
+    Args:
+        coords (np.ndarray): Shape (N, 2) of [lat, lng]
+
+    Returns:
+        np.ndarray: Symmetric (N, N) matrix in km
+    """
+    lat = coords[:, 0]
+    lng = coords[:, 1]
+    return haversine_km(lat[:, None], lng[:, None], lat[None, :], lng[None, :])
+
+
+def robust_center(coords: np.ndarray, method: str = "median", keep_ratio: float = 0.8, iterations: int = 3) -> np.ndarray:
+    """
+    Estimates a center that is not dragged by the outliers being removed.
+
+    Methods:
+        - "median": coordinate-wise median
+        - "trimmed": start at the median, then repeatedly average the
+          `keep_ratio` closest points
+
+    Args:
+        coords (np.ndarray): Shape (N, 2) of [lat, lng], N ≥ 1
+        method (str): "median" or "trimmed"
+        keep_ratio (float): Fraction of points kept per trimming iteration
+        iterations (int): Number of trimming iterations
+
+    Returns:
+        np.ndarray: [lat, lng]
+    """
+    center = np.median(coords, axis=0)
+    if method != "trimmed" or len(coords) < 3:
+        return center
+
+    keep = max(1, int(np.ceil(len(coords) * keep_ratio)))
+    for _ in range(iterations):
+        distances = distances_from_km(center, coords)
+        nearest = np.argpartition(distances, keep - 1)[:keep]
+        center = coords[nearest].mean(axis=0)
+    return center
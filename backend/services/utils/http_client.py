@@ -0,0 +1,154 @@
+"""
+http_client.py · Shared Pooled HTTP Clients
+
+This utility module owns one app-lifetime `httpx.AsyncClient` per upstream
+(OpenAI, Google Maps), so outbound calls reuse pooled keep-alive connections
+instead of paying TCP + TLS setup on every request.
+
+Main Use Case:
+--------------
+Used by every module that calls an external HTTP API:
+- highlight_llm.py, splitter.py, planner_llm.py
+- style_classifier.py, feedback_learner.py
+- preview/directions.py
+
+Opened / closed by the Quart `before_serving` / `after_serving` hooks in `app.py`.
+If a module is used outside the app (scripts, benchmarks), clients are created lazily.
+
+Key Features:
+-------------
+✅ One pooled client per upstream with HTTP keep-alive
+✅ Per-upstream connection limits and timeouts (env overridable)
+✅ Pool usage metrics: requests, errors, in-flight and peak in-flight
+✅ Single `request()` helper for all outbound calls
+
+Author: Tripllery AI Backend
+"""
+
+import os
+from typing import Dict
+
+import httpx
+
+# =============================
+# ⚙️ PER-UPSTREAM SETTINGS
+# =============================
+
+UPSTREAM_SETTINGS = {
+    "openai": {
+        "timeout": float(os.getenv("OPENAI_HTTP_TIMEOUT", "20")),
+        "max_connections": int(os.getenv("OPENAI_MAX_CONNECTIONS", "32")),
+        "max_keepalive": int(os.getenv("OPENAI_MAX_KEEPALIVE", "16"))
+    },
+    "google": {
+        "timeout": float(os.getenv("GOOGLE_HTTP_TIMEOUT", "10")),
+        "max_connections": int(os.getenv("GOOGLE_MAX_CONNECTIONS", "32")),
+        "max_keepalive": int(os.getenv("GOOGLE_MAX_KEEPALIVE", "16"))
+    }
+}
+
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# ✨ Live clients and usage metrics, keyed by upstream name
+_clients: Dict[str, httpx.AsyncClient] = {}
+_metrics: Dict[str, Dict[str, int]] = {
+    name: {"requests": 0, "errors": 0, "in_flight": 0, "peak_in_flight": 0, "clients_created": 0}
+    for name in UPSTREAM_SETTINGS
+}
+
+
+def _build_client(upstream: str) -> httpx.AsyncClient:
+    settings = UPSTREAM_SETTINGS[upstream]
+    _metrics[upstream]["clients_created"] += 1
+    return httpx.AsyncClient(
+        timeout=settings["timeout"],
+        limits=httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive"],
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        )
+    )
+
+
+def get_client(upstream: str) -> httpx.AsyncClient:
+    """
+    Returns the shared client for an upstream, creating it on first use.
+
+    Args:
+        upstream (str): "openai" or "google"
+
+    Returns:
+        httpx.AsyncClient: Pooled client with the upstream's limits and timeout
+    """
+    if upstream not in UPSTREAM_SETTINGS:
+        raise ValueError(f"Unknown upstream: {upstream}")
+
+    client = _clients.get(upstream)
+    if client is None or client.is_closed:
+        client = _build_client(upstream)
+        _clients[upstream] = client
+    return client
+
+
+async def request(upstream: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Sends a request through the shared client of an upstream and records metrics.
+
+    Args:
+        upstream (str): "openai" or "google"
+        method (str): HTTP method ("GET", "POST", ...)
+        url (str): Target URL
+        **kwargs: Passed through to `httpx.AsyncClient.request` (json, params, headers, timeout...)
+
+    Returns:
+        httpx.Response
+    """
+    metrics = _metrics[upstream]
+    metrics["requests"] += 1
+    metrics["in_flight"] += 1
+    metrics["peak_in_flight"] = max(metrics["peak_in_flight"], metrics["in_flight"])
+
+    try:
+        return await get_client(upstream).request(method, url, **kwargs)
+    except Exception:
+        metrics["errors"] += 1
+        raise
+    finally:
+        metrics["in_flight"] -= 1
+
+
+async def startup_http_clients():
+    """
+    Opens one pooled client per upstream (Quart `before_serving` hook).
+    """
+    for upstream in UPSTREAM_SETTINGS:
+        get_client(upstream)
+    print(f"🔌 HTTP client pools ready: {list(_clients.keys())}")
+
+
+async def shutdown_http_clients():
+    """
+    Closes all pooled clients (Quart `after_serving` hook).
+    """
+    for upstream, client in list(_clients.items()):
+        await client.aclose()
+        _clients.pop(upstream, None)
+    print(f"🔌 HTTP client pools closed: {get_http_pool_stats()}")
+
+
+def get_http_pool_stats() -> Dict:
+    """
+    Returns pool usage metrics and configured limits per upstream.
+
+    Returns:
+        Dict: {upstream: {requests, errors, in_flight, peak_in_flight, max_connections, open}}
+    """
+    return {
+        upstream: {
+            **_metrics[upstream],
+            "max_connections": UPSTREAM_SETTINGS[upstream]["max_connections"],
+            "max_keepalive": UPSTREAM_SETTINGS[upstream]["max_keepalive"],
+            "open": upstream in _clients and not _clients[upstream].is_closed
+        }
+        for upstream in UPSTREAM_SETTINGS
+    }
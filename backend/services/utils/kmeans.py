@@ -0,0 +1,95 @@
+"""
+kmeans.py · Lightweight NumPy K-Means for Small 2-D Point Sets
+
+This utility module replaces scikit-learn's KMeans in request hot paths, where
+at most a few dozen lat/lng points are clustered per request. It is plain
+NumPy (Lloyd iterations with deterministic farthest-first seeding), so it adds
+no import cost and returns the same labels for the same input every time.
+
+Main Use Case:
+--------------
+Used by:
+- `services/formatter/clustering.py` (location-based POI sorting)
+- `services/formatter/splitter.py` (seeding of the geographic day splitter)
+
+Key Features:
+-------------
+✅ Deterministic farthest-first seeding (no random restarts)
+✅ Haversine distances via `services.utils.geo`
+✅ Empty clusters re-seeded with the farthest point
+✅ Optional scikit-learn backend, imported lazily only when requested
+
+Author: Tripllery AI Backend
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from services.utils.geo import haversine_km
+
+
+def farthest_first_seeds(coords: np.ndarray, k: int) -> List[int]:
+    """
+    Picks k well-spread seed indices: the westernmost point, then repeatedly the
+    point farthest from all seeds chosen so far.
+
+    Args:
+        coords (np.ndarray): (N, 2) [lat, lng]
+        k (int): Number of seeds (≤ N)
+
+    Returns:
+        List[int]: Seed indices
+    """
+    seeds = [int(np.lexsort((coords[:, 0], coords[:, 1]))[0])]
+    nearest_seed = haversine_km(coords[:, 0], coords[:, 1], *coords[seeds[0]])
+    while len(seeds) < k:
+        nxt = int(np.argmax(nearest_seed))
+        seeds.append(nxt)
+        nearest_seed = np.minimum(nearest_seed, haversine_km(coords[:, 0], coords[:, 1], *coords[nxt]))
+    return seeds
+
+
+def kmeans(coords: np.ndarray, k: int, max_iter: int = 50, backend: str = "numpy") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Clusters lat/lng points into k groups.
+
+    Args:
+        coords (np.ndarray): (N, 2) [lat, lng]
+        k (int): Number of clusters (clipped to N)
+        max_iter (int): Maximum Lloyd iterations
+        backend (str): "numpy" (default) or "sklearn" (imported on first use)
+
+    Returns:
+        Tuple:
+            - np.ndarray: (N,) labels in 0..k-1
+            - np.ndarray: (k, 2) cluster centers
+    """
+    n = len(coords)
+    k = max(1, min(k, n))
+
+    if backend == "sklearn":
+        from sklearn.cluster import KMeans  # lazy: only paid when explicitly configured
+        model = KMeans(n_clusters=k, random_state=42, n_init=10).fit(coords)
+        return model.labels_, model.cluster_centers_
+
+    centers = coords[farthest_first_seeds(coords, k)].astype(float)
+    labels = np.zeros(n, dtype=int)
+
+    for iteration in range(max_iter):
+        dist = haversine_km(coords[:, 0][:, None], coords[:, 1][:, None], centers[:, 0][None, :], centers[:, 1][None, :])
+        new_labels = np.argmin(dist, axis=1)
+
+        # Re-seed empty clusters with the point farthest from its current center
+        for c in range(k):
+            if not np.any(new_labels == c):
+                far = int(np.argmax(dist[np.arange(n), new_labels]))
+                new_labels[far] = c
+
+        if iteration > 0 and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            centers[c] = coords[labels == c].mean(axis=0)
+
+    return labels, centers
@@ -0,0 +1,351 @@
+"""
+kv_cache.py · Two-Tier Key/Value Cache (Memory LRU + SQLite)
+
+This utility module provides a small, dependency-free cache used in front of
+slow or quota-limited upstream calls (Google Places, LLM summaries, ...).
+
+Lookups go through two tiers:
+- An in-process LRU tier (OrderedDict) for hot keys
+- An optional on-disk SQLite tier that survives restarts and is shared
+  by every worker process on the same machine
+
+Main Use Case:
+--------------
+Used by:
+- `maps/places_cache.py` to cache Places search results
+
+Key Features:
+-------------
+✅ Per-entry TTL (expired entries are treated as misses)
+✅ Bounded LRU memory tier
+✅ Optional size-bounded SQLite tier (least recently used rows evicted)
+✅ Thread-safe (fetchers run in worker threads)
+✅ Callers get private copies of memory-tier values (opt out with `copy_values=False`)
+✅ Atomic read-modify-write (`update`), serialized across worker processes by SQLite
+✅ Optional re-validation of memory hits against disk (`shared=True`, multi-worker data)
+✅ Hit / miss / eviction counters via `stats()`
+
+Author: Tripllery AI Backend
+"""
+
+import os
+import copy
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class TieredCache:
+    """
+    A TTL cache with an in-memory LRU tier and an optional SQLite tier.
+
+    Values must be JSON-serializable when the disk tier is enabled; other objects
+    can be stored through `json_default` (object → JSON-safe form) and
+    `json_object_hook` (decoded dict → object), as in `json.dumps` / `json.loads`.
+
+    By default values are copied on `set` and `get`, so mutating a cached value
+    (e.g. a POI dict) never leaks into other requests. With `copy_values=False`
+    the memory tier hands out the stored objects themselves; callers must then
+    treat them as read-only and store modified values as new objects.
+
+    With `shared=True` (and the disk tier) every memory hit is checked against
+    the disk row's expiry stamp, which changes on every write, so values another
+    worker process updated are re-read instead of served stale.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        max_memory_entries: int = 1024,
+        db_path: Optional[str] = None,
+        max_disk_entries: Optional[int] = None,
+        copy_values: bool = True,
+        shared: bool = False,
+        json_default: Optional[Callable[[Any], Any]] = None,
+        json_object_hook: Optional[Callable[[Dict], Any]] = None
+    ):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self.copy_values = copy_values
+        self.shared = shared
+        self.json_default = json_default
+        self.json_object_hook = json_object_hook
+
+        self._memory = OrderedDict()  # key → (expires_at, value)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "sets": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0
+        }
+
+        if db_path:
+            self._open_disk_tier(db_path)
+
+    # =============================
+    # 💾 DISK TIER
+    # =============================
+
+    def _open_disk_tier(self, db_path: str):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            conn = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self._table}_access ON {self._table}(last_access)"
+            )
+            conn.commit()
+            self._conn = conn
+        except Exception as e:
+            print(f"⚠️ Cache '{self.name}' disk tier disabled because: {e}")
+            self._conn = None
+
+    @property
+    def _table(self) -> str:
+        return f"cache_{self.name}"
+
+    def _disk_get(self, key: str, now: float, commit: bool = True):
+        row = self._conn.execute(
+            f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None, None
+
+        value_json, expires_at = row
+        if expires_at <= now:
+            self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+            if commit:
+                self._conn.commit()
+            self._counters["expired"] += 1
+            return None, None
+
+        self._conn.execute(
+            f"UPDATE {self._table} SET last_access = ? WHERE key = ?", (now, key)
+        )
+        if commit:
+            self._conn.commit()
+        return json.loads(value_json, object_hook=self.json_object_hook), expires_at
+
+    def _disk_expiry(self, key: str) -> Optional[float]:
+        row = self._conn.execute(
+            f"SELECT expires_at FROM {self._table} WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _disk_set(self, key: str, value: Any, expires_at: float, now: float):
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {self._table} (key, value, expires_at, last_access) "
+            "VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False, default=self.json_default), expires_at, now)
+        )
+
+        if self.max_disk_entries:
+            count = self._conn.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+            overflow = count - self.max_disk_entries
+            if overflow > 0:
+                self._conn.execute(
+                    f"DELETE FROM {self._table} WHERE key IN ("
+                    f"SELECT key FROM {self._table} ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self._counters["disk_evictions"] += overflow
+
+        self._conn.commit()
+
+    # =============================
+    # 🧠 MEMORY TIER
+    # =============================
+
+    def _copy(self, value: Any) -> Any:
+        return copy.deepcopy(value) if self.copy_values else value
+
+    def _memory_set(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._counters["memory_evictions"] += 1
+
+    # =============================
+    # 🔑 PUBLIC API
+    # =============================
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Looks up a key in memory first, then on disk.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            The cached value (a copy unless `copy_values=False`), or None on miss / expiry.
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self.shared and self._conn is not None:
+                try:
+                    if self._disk_expiry(key) != entry[0]:  # rewritten (or dropped) by another worker
+                        del self._memory[key]
+                        entry = None
+                except Exception as e:
+                    print(f"⚠️ Cache '{self.name}' disk check failed: {e}")
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return self._copy(value)
+                del self._memory[key]
+                self._counters["expired"] += 1
+
+            if self._conn is not None:
+                try:
+                    value, expires_at = self._disk_get(key, now)
+                    if expires_at is not None:
+                        self._memory_set(key, value, expires_at)
+                        self._counters["disk_hits"] += 1
+                        return self._copy(value)
+                except Exception as e:
+                    print(f"⚠️ Cache '{self.name}' disk read failed: {e}")
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """
+        Stores a value in both tiers.
+
+        Args:
+            key (str): Cache key
+            value (Any): JSON-serializable value
+            ttl_seconds (float, optional): Override the cache-wide TTL for this entry
+        """
+        now = time.time()
+        expires_at = now + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+
+        with self._lock:
+            self._memory_set(key, self._copy(value), expires_at)
+            self._counters["sets"] += 1
+
+            if self._conn is not None:
+                try:
+                    self._disk_set(key, value, expires_at, now)
+                except Exception as e:
+                    print(f"⚠️ Cache '{self.name}' disk write failed: {e}")
+
+    def update(self, key: str, fn: Callable[[Optional[Any]], Optional[Any]], ttl_seconds: Optional[float] = None) -> Optional[Any]:
+        """
+        Atomically replaces a value with `fn(current)`.
+
+        With the disk tier, the read and the write happen in one IMMEDIATE SQLite
+        transaction and the current value is read from disk, so concurrent updates
+        from other worker processes are never lost. `fn` must not block.
+
+        Args:
+            key (str): Cache key
+            fn (Callable): Gets the current value (None if missing / expired), returns
+                           the new value, or None to leave the entry unchanged
+            ttl_seconds (float, optional): Override the cache-wide TTL for a written entry
+
+        Returns:
+            The value stored after the call (None if missing and not written)
+        """
+        now = time.time()
+        expires_at = now + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        current, current_expiry = self._disk_get(key, now, commit=False)
+                        new_value = fn(current)
+                        if new_value is None:
+                            self._conn.commit()
+                            if current is None:
+                                self._memory.pop(key, None)
+                            else:
+                                self._memory_set(key, current, current_expiry)
+                            return self._copy(current)
+                        self._disk_set(key, new_value, expires_at, now)  # commits
+                    except Exception:
+                        self._conn.rollback()
+                        raise
+                    self._memory_set(key, self._copy(new_value), expires_at)
+                    self._counters["sets"] += 1
+                    return new_value
+                except sqlite3.Error as e:
+                    print(f"⚠️ Cache '{self.name}' disk update failed, updating memory only: {e}")
+
+            entry = self._memory.get(key)
+            current = entry[1] if entry is not None and entry[0] > now else None
+            new_value = fn(self._copy(current))
+            if new_value is None:
+                return self._copy(current)
+            self._memory_set(key, self._copy(new_value), expires_at)
+            self._counters["sets"] += 1
+            return new_value
+
+    def delete(self, key: str):
+        """
+        Drops one key from both tiers.
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._conn is not None:
+                try:
+                    self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+                    self._conn.commit()
+                except Exception as e:
+                    print(f"⚠️ Cache '{self.name}' disk delete failed: {e}")
+
+    def clear(self):
+        """
+        Drops every entry from both tiers (counters are kept).
+        """
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute(f"DELETE FROM {self._table}")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss counters and current tier sizes.
+
+        Returns:
+            Dict: counters plus `hit_rate`, `memory_entries`, `disk_enabled`
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            memory_entries = len(self._memory)
+
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        lookups = hits + counters["misses"]
+
+        return {
+            "name": self.name,
+            **counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "disk_enabled": self._conn is not None
+        }
@@ -1,76 +1,471 @@
 """
-recommend_pool.py · Global Recommendation Pool Cache
+recommend_pool.py · Per-Session Recommendation Pool Store
 
-This module implements a lightweight in-memory caching layer for POI cards
-recommended by the `/recommend` route. It exposes helpers to:
+This module implements the server-side store for POI cards
+recommended by the `/recommend` route. Every `/recommend` call stores its pool
+under a fresh random pool token, so concurrent users never see each other's cards.
+It exposes helpers to:
 
-- Paginate POIs for lazy loading (`/recommend/more`)
-- Look up POIs by ID (`/plan`)
+- Paginate POIs for lazy loading (`/recommend/more`), ranking the pool page by page
+- Look up POIs by ID (`/plan`, `/recommend/more?ids=`)
+- Summarize a pool as a lightweight index (`/recommend?view=compact`)
+- Answer proximity queries through a per-pool spatial index (`/recommend/nearby`)
 - Reuse previously selected card data without hitting API again
+- Keep the not-yet-enriched POI reservoir of lazily built pools (`/recommend/more` expansion)
 
 Main Use Case:
 --------------
 Used by:
-- `/recommend`: to store full card pool
-- `/recommend/more`: to fetch next batch
-- `/plan`: to find selected POIs by ID
+- `/recommend`: to store full card pool (returns `pool_token`)
+- `/recommend/more`: to fetch next batch for a token
+- `/plan`: to find selected POIs by ID for a token
+- `recommend_agent()`: to store the scored pool with its feature matrix, and attach
+  background enrichment (travel style, tags) to a session
 
 Key Features:
 -------------
-✅ Caches full card list for frontend  
-✅ Supports list-based pagination (e.g. 6 at a time)  
-✅ Enables ID-based lookup for planning  
-✅ Global state (reset every new /recommend call)
+✅ Session-keyed pools (random `pool_token` per /recommend)
+✅ Per-entry TTL (RECOMMEND_POOL_TTL, seconds)
+✅ Memory cap with LRU eviction (RECOMMEND_POOL_MAX_SESSIONS)
+✅ Pluggable backend (RECOMMEND_POOL_BACKEND):
+    - "memory": in-process only (single worker)
+    - "sqlite": shared SQLite file under CACHE_DIR (multi-worker / horizontal scaling)
+✅ Atomic pool updates (`TieredCache.update`): ranking, appends and re-scoring from
+   several workers never overwrite each other; memory hits are re-validated on disk
+✅ Reservoirs and profiles in their own stores, so they never evict pools
+✅ Per-session profile slot for background enrichment results  
+✅ Per-session reservoir slot + de-duplicating `append_to_pool` for lazy pool growth  
+✅ Expansion claim in the reservoir: one worker at a time grows a pool
+✅ Served order + unranked rest: pages are picked by partial top-k, so cards
+   appended later compete only for pages not served yet
+✅ Per-pool `CardMatrix`, kept in the pool entry and extended on append: paging
+   and re-scoring cost one matrix-vector product / top-k, never a rebuild
+✅ Per-pool KD-tree (`get_pool_index`), built lazily once per pool and worker
 
 Author: Tripllery AI Backend
 """
 
-# ✨ Global cache of recommended cards
-recommend_pool_list = []   # Ordered card list for pagination
-recommend_pool_dict = {}   # ID → card lookup for fast access
+import os
+import time
+import secrets
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 
-def cache_card_pool(pois: list):
+from services.utils.config import CACHE_DIR
+from services.utils.kv_cache import TieredCache
+from services.utils.spatial_index import SpatialIndex
+from services.utils.score_cards import CardMatrix, top_k_indices
+
+RECOMMEND_POOL_BACKEND = os.getenv("RECOMMEND_POOL_BACKEND", "memory")
+RECOMMEND_POOL_TTL = float(os.getenv("RECOMMEND_POOL_TTL", str(2 * 3600)))
+RECOMMEND_POOL_MAX_SESSIONS = int(os.getenv("RECOMMEND_POOL_MAX_SESSIONS", "500"))
+RECOMMEND_POOL_MAX_INDEXES = int(os.getenv("RECOMMEND_POOL_MAX_INDEXES", "64"))
+# Seconds an expansion claim is held at most (a crashed worker's claim lapses after this)
+RECOMMEND_EXPAND_CLAIM_TTL = float(os.getenv("RECOMMEND_EXPAND_CLAIM_TTL", "120"))
+
+# Decimals kept in compact index entries (6 ≈ 0.1 m; scores only order cards)
+CARD_INDEX_COORD_DECIMALS = 6
+CARD_INDEX_SCORE_DECIMALS = 3
+
+
+def _to_json(value: Any) -> Dict:
+    """
+    JSON-safe form of the arrays kept in pool entries (sqlite backend).
+    """
+    if hasattr(value, "to_json"):  # CardMatrix (also when imported as `backend.services…`)
+        return {"__card_matrix__": value.to_json()}
+    if isinstance(value, np.ndarray):
+        return {"__ndarray__": value.tolist(), "dtype": str(value.dtype)}
+    raise TypeError(f"Cannot store {type(value).__name__} in a pool entry")
+
+
+def _from_json(value: Dict) -> Any:
+    if "__card_matrix__" in value:
+        return CardMatrix.from_json(value["__card_matrix__"])
+    if "__ndarray__" in value:
+        return np.array(value["__ndarray__"], dtype=value["dtype"])
+    return value
+
+
+def _build_store(backend: str, name: str, copy_values: bool = True) -> TieredCache:
+    if backend == "sqlite":
+        return TieredCache(
+            name=name,
+            ttl_seconds=RECOMMEND_POOL_TTL,
+            max_memory_entries=min(64, RECOMMEND_POOL_MAX_SESSIONS),
+            db_path=os.path.join(CACHE_DIR, "recommend_pools.sqlite3"),
+            max_disk_entries=RECOMMEND_POOL_MAX_SESSIONS,
+            copy_values=copy_values,
+            shared=True,
+            json_default=_to_json,
+            json_object_hook=_from_json
+        )
+    return TieredCache(
+        name=name,
+        ttl_seconds=RECOMMEND_POOL_TTL,
+        max_memory_entries=RECOMMEND_POOL_MAX_SESSIONS,
+        copy_values=copy_values
+    )
+
+
+if RECOMMEND_POOL_BACKEND not in ("memory", "sqlite"):
+    print(f"⚠️ Unknown RECOMMEND_POOL_BACKEND={RECOMMEND_POOL_BACKEND!r}, using memory")
+
+# ✨ Session-keyed pool store: token → {"cards": [...] (append-only), "order": [card positions, as served],
+#                                       "scores": np.ndarray (per card), "matrix": CardMatrix (row per card),
+#                                       "version": int (bumped on every update)}
+# Entries are not copied (pools can hold thousands of cards): stored entries and cards are read-only,
+# every update stores a new entry, and routes copy cards before adding fields (`maps.photos.render_cards`)
+pool_store = _build_store(RECOMMEND_POOL_BACKEND, "recommend_pools", copy_values=False)
+
+# 🌱 Expansion state of lazily built pools, and background enrichment profiles (token → dict each)
+reservoir_store = _build_store(RECOMMEND_POOL_BACKEND, "recommend_reservoirs")
+profile_store = _build_store(RECOMMEND_POOL_BACKEND, "recommend_profiles")
+
+# 🧭 Spatial indexes of recently queried pools: token → (pool version, SpatialIndex) (LRU, per worker)
+_pool_indexes: "OrderedDict[str, Tuple[int, SpatialIndex]]" = OrderedDict()
+
+
+def new_pool_token() -> str:
+    """
+    Creates a fresh, unguessable pool token (before the pool itself exists).
+    """
+    return secrets.token_urlsafe(16)
+
+
+def cache_card_pool(pois: list, token: Optional[str] = None, ranked: Optional[int] = None,
+                    matrix: Optional[CardMatrix] = None) -> str:
+    """
+    Save a full POI card pool under a session token.
+
+    Args:
+        pois (list): List of scored POI cards returned by recommend_agent()
+        token (str, optional): Existing token to overwrite; a new one is created if omitted
+        ranked (int, optional): Number of leading cards already in final order
+                                (default: all; the rest is ranked by score as pages are requested)
+        matrix (CardMatrix, optional): Feature matrix of `pois` (same order); built here if omitted
+
+    Returns:
+        str: The pool token to hand back to the client
+    """
+    token = token or new_pool_token()
+    ranked = len(pois) if ranked is None else min(ranked, len(pois))
+    pool_store.set(token, {
+        "cards": pois,
+        "order": list(range(ranked)),
+        "scores": np.fromiter((card.get("score", 0.0) for card in pois), dtype=float, count=len(pois)),
+        "matrix": CardMatrix(pois) if matrix is None else matrix,
+        "version": 0
+    })
+    return token
+
+
+def _update_pool(token: str, change: Callable[[Dict], Optional[Dict]]) -> Optional[Dict]:
+    """
+    Atomically applies `change` (entry → changed fields, or None for no change) to a pool entry.
+
+    Returns:
+        Dict or None: The entry after the update (None if the pool is unknown / expired)
+    """
+    def apply(entry: Optional[Dict]) -> Optional[Dict]:
+        if entry is None:
+            return None
+        fields = change(entry)
+        if fields is None:
+            return None
+        return {**entry, **fields, "version": entry.get("version", 0) + 1}
+
+    return pool_store.update(token, apply)
+
+
+def get_pool(token: str) -> Optional[List[Dict]]:
     """
-    Save full POI card objects into both list (for order) and dict (for lookup).
+    Returns the card list stored for a token.
 
     Args:
-        pois (list): List of POI cards returned by recommend_agent()
+        token (str): Pool token returned by /recommend
+
+    Returns:
+        list or None: Card list in pool order (not display order), or None if unknown / expired (or no token)
     """
-    global recommend_pool_list, recommend_pool_dict
-    recommend_pool_list = pois
-    recommend_pool_dict = {poi["id"]: poi for poi in pois if "id" in poi}
+    if not token:
+        return None
+    entry = pool_store.get(token)
+    return entry["cards"] if entry else None
 
 
-def get_next_batch(start: int, size: int) -> list:
+def get_pool_index(token: str) -> Optional[SpatialIndex]:
     """
-    Paginate through cached POIs for lazy loading in frontend.
+    Returns the spatial index over a pool's cards, building it on first use.
+
+    Args:
+        token (str): Pool token returned by /recommend
+
+    Returns:
+        SpatialIndex or None: Index whose `pois` are the pool's cards, or None if unknown / expired
+    """
+    if not token:
+        return None
+
+    entry = pool_store.get(token)
+    if entry is None:  # pool expired → drop its index too
+        _pool_indexes.pop(token, None)
+        return None
+
+    version = entry.get("version", 0)
+    cached = _pool_indexes.get(token)
+    if cached is not None and cached[0] == version:
+        _pool_indexes.move_to_end(token)
+        return cached[1]
+
+    index = SpatialIndex([card for card in entry["cards"] if "lat" in card and "lng" in card])
+    _pool_indexes[token] = (version, index)
+    _pool_indexes.move_to_end(token)
+    while len(_pool_indexes) > RECOMMEND_POOL_MAX_INDEXES:
+        _pool_indexes.popitem(last=False)
+    return index
+
+
+def get_next_batch(start: int, size: int, token: str) -> list:
+    """
+    Paginate through a cached pool for lazy loading in frontend.
 
     Args:
         start (int): Starting index
         size (int): Number of cards to return
+        token (str): Pool token returned by /recommend
 
     Returns:
-        list: Slice of cached POIs
+        list: Slice of cached POIs, in display order (empty if the pool is unknown or expired)
     """
-    return recommend_pool_list[start:start + size]
+    entry = pool_store.get(token) if token else None
+    if not entry:
+        return []
+
+    # Rank just enough of the unserved cards to cover this page: top-k over the stored scores
+    stop = start + size
 
+    def rank_page(entry: Dict) -> Optional[Dict]:
+        order, scores = entry["order"], entry["scores"]
+        missing = min(stop, len(scores)) - len(order)
+        if missing <= 0:
+            return None
+        unserved = scores.copy()
+        unserved[order] = -np.inf
+        return {"order": order + top_k_indices(unserved, missing).tolist()}
 
-def get_pois_by_ids(ids: list) -> list:
+    if min(stop, len(entry["scores"])) > len(entry["order"]):
+        entry = _update_pool(token, rank_page) or entry
+    cards, scores = entry["cards"], entry["scores"]
+    return [{**cards[i], "score": float(scores[i])} for i in entry["order"][start:stop]]
+
+
+def get_pois_by_ids(ids: list, token: str) -> list:
     """
     Fetch selected POIs by ID for use in /plan step.
 
     Args:
         ids (list): List of POI IDs
+        token (str): Pool token returned by /recommend
 
     Returns:
         list: Corresponding POI dicts
     """
+    entry = pool_store.get(token) if token else None
+    cards, scores = (entry["cards"], entry["scores"]) if entry else ([], [])
+    positions = {poi["id"]: i for i, poi in enumerate(cards) if "id" in poi}
+
     result = []
     for id_ in ids:
-        poi = recommend_pool_dict.get(id_)
-        if poi:
-            result.append(poi)
+        i = positions.get(id_)
+        if i is not None:
+            result.append({**cards[i], "score": float(scores[i])})
         else:
             print(f"⚠️ Warning: Cannot find POI object for id={id_}")
     return result
+
+
+def compact_card_index(cards: List[Dict]) -> List[Dict]:
+    """
+    Lightweight entries for cards not shipped in full (full records via `/recommend/more`).
+
+    Args:
+        cards (List[Dict]): Scored cards
+
+    Returns:
+        List[Dict]: [{"id", "name", "lat", "lng", "score"}, ...], best score first
+    """
+    def _round(value, decimals):
+        return round(value, decimals) if isinstance(value, (int, float)) else value
+
+    return [
+        {
+            "id": card.get("id"),
+            "name": card.get("name"),
+            "lat": _round(card.get("lat"), CARD_INDEX_COORD_DECIMALS),
+            "lng": _round(card.get("lng"), CARD_INDEX_COORD_DECIMALS),
+            "score": _round(card.get("score"), CARD_INDEX_SCORE_DECIMALS)
+        }
+        for card in sorted(cards, key=lambda card: card.get("score") or 0.0, reverse=True)
+    ]
+
+
+def append_to_pool(token: str, cards: List[Dict]) -> int:
+    """
+    Appends newly enriched cards to an existing pool (cards already in it are skipped by id).
+
+    They join the unserved cards, so they compete only for pages not served yet. Only
+    the new cards are parsed; their rows are merged into the pool's matrix.
+
+    Args:
+        token (str): Pool token
+        cards (List[Dict]): Scored cards to append (in display order)
+
+    Returns:
+        int: Number of cards actually appended (0 if the pool is unknown / expired)
+    """
+    appended = 0
+
+    def append(entry: Dict) -> Optional[Dict]:
+        nonlocal appended
+        seen = {card.get("id") for card in entry["cards"]}
+        new_cards = [card for card in cards if card.get("id") not in seen]
+        appended = len(new_cards)
+        if not new_cards:
+            return None
+        return {
+            "cards": entry["cards"] + new_cards,
+            "scores": np.concatenate([entry["scores"], np.fromiter(
+                (card.get("score", 0.0) for card in new_cards), dtype=float, count=len(new_cards))]),
+            "matrix": entry["matrix"].extend(CardMatrix(new_cards))
+        }
+
+    _update_pool(token, append)
+    return appended
+
+
+def rescore_unranked(token: str, profile: Dict) -> int:
+    """
+    Re-scores the cards not served yet (e.g. once the travel style is known).
+
+    One matrix-vector product over the pool's stored matrix; served cards keep the
+    score they were shown with. Cards get their new score when they are served.
+
+    Args:
+        token (str): Pool token
+        profile (Dict): Scoring profile (see `score_cards.make_score_profile`)
+
+    Returns:
+        int: Number of re-scored cards
+    """
+    rescored = 0
+
+    def rescore(entry: Dict) -> Optional[Dict]:
+        nonlocal rescored
+        order, old_scores = entry["order"], entry["scores"]
+        rescored = len(old_scores) - len(order)
+        if not rescored:
+            return None
+        scores = entry["matrix"].scores(profile)
+        scores[order] = old_scores[order]
+        return {"scores": scores}
+
+    _update_pool(token, rescore)
+    return rescored
+
+
+def store_pool_reservoir(token: str, reservoir: Dict):
+    """
+    Stores the expansion state of a lazily built pool.
+
+    Args:
+        token (str): Pool token of the session
+        reservoir (Dict): {"pending": [raw POIs not enriched yet],
+                           "queries": [[city, query], ...], "pages": {"city|query": next page or None},
+                           "seen_ids": [...], "exhausted": bool, "score_profile": {...}}
+    """
+    reservoir_store.set(token, reservoir)
+
+
+def get_pool_reservoir(token: str) -> Optional[Dict]:
+    """
+    Returns the expansion state of a pool, or None (eager pool / unknown / expired).
+    """
+    return reservoir_store.get(token)
+
+
+def update_pool_reservoir(token: str, fields: Dict) -> Optional[Dict]:
+    """
+    Atomically overwrites some fields of a pool's expansion state (others, e.g. a newer
+    "score_profile" stored meanwhile, are kept).
+
+    Returns:
+        Dict or None: The updated reservoir (None if unknown / expired)
+    """
+    return reservoir_store.update(token, lambda reservoir: {**reservoir, **fields} if reservoir is not None else None)
+
+
+def claim_pool_expansion(token: str) -> Optional[Dict]:
+    """
+    Claims the right to expand a pool (one expansion per pool across all workers).
+
+    The claim lapses after RECOMMEND_EXPAND_CLAIM_TTL seconds if never released.
+
+    Returns:
+        Dict or None: The reservoir at claim time, or None if unknown / expired / already claimed
+    """
+    now = time.time()
+    claimed = False
+
+    def claim(reservoir: Optional[Dict]) -> Optional[Dict]:
+        nonlocal claimed
+        if reservoir is None or reservoir.get("claimed_until", 0) > now:
+            return None
+        claimed = True
+        return {**reservoir, "claimed_until": now + RECOMMEND_EXPAND_CLAIM_TTL}
+
+    reservoir = reservoir_store.update(token, claim)
+    return reservoir if claimed else None
+
+
+def release_pool_expansion(token: str):
+    """
+    Releases a claim taken with `claim_pool_expansion`.
+    """
+    update_pool_reservoir(token, {"claimed_until": 0})
+
+
+def is_expansion_claimed(token: str) -> bool:
+    """
+    True while some worker holds the expansion claim of a pool.
+    """
+    reservoir = reservoir_store.get(token)
+    return bool(reservoir and reservoir.get("claimed_until", 0) > time.time())
+
+
+def store_session_profile(token: str, profile: Dict):
+    """
+    Stores background enrichment results (e.g. travel style, updated tags) for a session.
+
+    Args:
+        token (str): Pool token of the session
+        profile (Dict): Profile data to store
+    """
+    profile_store.set(token, profile)
+
+
+def get_session_profile(token: str) -> Optional[Dict]:
+    """
+    Returns the enrichment profile of a session, or None if not (yet) available.
+    """
+    return profile_store.get(token)
+
+
+def get_pool_store_stats() -> Dict:
+    """
+    Returns counters of the pool store (hits, misses, evictions, backend) and its side stores.
+    """
+    return {**pool_store.stats(), "backend": RECOMMEND_POOL_BACKEND,
+            "reservoirs": reservoir_store.stats(), "profiles": profile_store.stats()}
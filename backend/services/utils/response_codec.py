@@ -0,0 +1,254 @@
+"""
+response_codec.py · Fast JSON Encoding + Negotiated Response Compression
+
+This utility module owns how every API response is put on the wire:
+
+- A pluggable JSON serializer (orjson when installed, stdlib `json` otherwise),
+  installed as the app's JSON provider so every `jsonify` uses it
+- gzip / brotli compression negotiated from `Accept-Encoding`, applied in one
+  `after_request` hook to bodies above a size threshold
+
+Main Use Case:
+--------------
+Wired up once in `app.py` (`install_response_codec(app)`); routes keep calling
+`jsonify`. `/recommend/stream` encodes its NDJSON lines with `dumps_bytes`.
+
+Key Features:
+-------------
+✅ JSON_BACKEND = auto | orjson | json (auto: orjson if importable)
+✅ Compact UTF-8 output, no key sorting (stdlib fallback tuned the same way)
+✅ Brotli (optional `brotli` package) preferred over gzip when the client accepts it
+✅ Size threshold (COMPRESS_MIN_BYTES) and content-type allow list
+✅ Large bodies compressed in a worker thread, off the event loop
+✅ Counters via `get_compression_stats()` (/metrics)
+
+Author: Tripllery AI Backend
+"""
+
+import os
+import gzip
+import json
+import asyncio
+from typing import Any, Callable, Dict, Optional
+
+from quart.json.provider import DefaultJSONProvider
+from quart.wrappers.response import DataBody
+
+# =============================
+# ⚙️ SETTINGS
+# =============================
+
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") != "0"
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+# Bodies larger than this are compressed in a worker thread
+COMPRESS_THREAD_MIN_BYTES = int(os.getenv("COMPRESS_THREAD_MIN_BYTES", str(64 * 1024)))
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/x-ndjson", "text/")
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# =============================
+# 🧾 JSON SERIALIZER
+# =============================
+
+def _resolve_backend(name: str) -> str:
+    if name == "orjson" and orjson is None:
+        print("⚠️ JSON_BACKEND=orjson but orjson is not installed, using json")
+    elif name not in ("auto", "orjson", "json"):
+        print(f"⚠️ Unknown JSON_BACKEND={name!r}, using auto")
+        name = "auto"
+    if name in ("auto", "orjson") and orjson is not None:
+        return "orjson"
+    return "json"
+
+
+json_backend = _resolve_backend(JSON_BACKEND)
+
+if json_backend == "orjson":
+    # Datetimes go through `default` so they keep Quart's HTTP-date format
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps_bytes(obj: Any, default: Optional[Callable] = None) -> bytes:
+        """
+        Serializes `obj` to compact UTF-8 JSON bytes.
+        """
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+else:
+    def dumps_bytes(obj: Any, default: Optional[Callable] = None) -> bytes:
+        """
+        Serializes `obj` to compact UTF-8 JSON bytes.
+        """
+        return json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Quart JSON provider backed by `dumps_bytes` (responses skip the str round trip).
+
+    Debug mode keeps the stdlib's indented output.
+    """
+
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj, default=self.default).decode("utf-8")
+
+    def response(self, *args: Any, **kwargs: Any):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj, default=self.default) + b"\n", mimetype=self.mimetype)
+
+# =============================
+# 🗜️ COMPRESSION
+# =============================
+
+_compression_totals = {
+    "responses": 0,
+    "compressed": 0,
+    "skipped_small": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+    "gzip": 0,
+    "br": 0
+}
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Picks the best supported encoding from an Accept-Encoding header.
+
+    Highest q-value wins; on ties brotli beats gzip. "q=0" excludes an encoding,
+    "*" stands for any encoding not listed.
+
+    Args:
+        accept_encoding (str): e.g. "gzip, deflate, br;q=0.9"
+
+    Returns:
+        str or None: "br", "gzip" or None (send uncompressed)
+    """
+    weights: Dict[str, float] = {}
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    """
+    Compresses `data` with "br" or "gzip".
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+async def compress_response(response, accept_encoding: str):
+    """
+    Compresses a buffered response in place when the client accepts it and it is worth it.
+
+    Streamed bodies (e.g. NDJSON), already-encoded responses, non-text content
+    types and bodies under COMPRESS_MIN_BYTES are left untouched.
+
+    Args:
+        response: Quart response (from an `after_request` hook)
+        accept_encoding (str): The request's Accept-Encoding header
+
+    Returns:
+        The same response
+    """
+    if not isinstance(response.response, DataBody) or "Content-Encoding" in response.headers:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return response
+    if not (response.mimetype or "").startswith(COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+
+    data = await response.get_data()
+    _compression_totals["responses"] += 1
+    if len(data) < COMPRESS_MIN_BYTES:
+        _compression_totals["skipped_small"] += 1
+        return response
+
+    if len(data) >= COMPRESS_THREAD_MIN_BYTES:
+        compressed = await asyncio.to_thread(compress_bytes, data, encoding)
+    else:
+        compressed = compress_bytes(data, encoding)
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+
+    _compression_totals["compressed"] += 1
+    _compression_totals[encoding] += 1
+    _compression_totals["bytes_in"] += len(data)
+    _compression_totals["bytes_out"] += len(compressed)
+    return response
+
+
+def get_compression_stats() -> Dict:
+    """
+    Returns serializer backend and compression counters.
+    """
+    bytes_in = _compression_totals["bytes_in"]
+    return {
+        **_compression_totals,
+        "json_backend": json_backend,
+        "brotli_available": brotli is not None,
+        "ratio": round(_compression_totals["bytes_out"] / bytes_in, 4) if bytes_in else None
+    }
+
+
+def install_response_codec(app):
+    """
+    Installs the fast JSON provider and the compression hook on a Quart app.
+    """
+    from quart import request
+
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
+
+    if COMPRESS_ENABLED:
+        @app.after_request
+        async def _compress(response):
+            return await compress_response(response, request.headers.get("Accept-Encoding", ""))
+
+    print(f"🧾 Response codec: json={json_backend}, compression="
+          f"{('br+gzip' if brotli is not None else 'gzip') if COMPRESS_ENABLED else 'off'}")
+    return app
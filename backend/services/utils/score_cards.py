@@ -5,48 +5,394 @@ This module defines the scoring logic for ranking recommendation cards
 returned from the fusion engine. Each card is evaluated using:
 
 - Google Maps rating
+- Rating-count confidence (how many Google reviews back the rating)
 - Number of extracted highlight tags
 - Length of LLM-generated description
+- Overlap of the card's name / tags with the user's interest keywords
+- Overlap with the user's travel-style tags (once classified)
+
+Scoring is vectorized: a pool is turned into a `CardMatrix` (feature columns +
+an inverted index term → cards), and each user profile is scored against it with
+one matrix-vector product plus one index lookup per interest / style term. Pages are selected with a
+partial top-k (`top_k_indices`) instead of sorting the whole pool. A pool keeps its matrix
+(`recommend_pool`), extending it as cards are appended, so it is built once per pool.
 
 Main Use Case:
 --------------
-Used in `recommend_agent()` to sort POI cards before display.
-The scoring system can later be made user-personalized or AI-tuned.
+Used in `recommend_agent()` to rank POI cards before display, and by
+`recommend_pool` to rank the pool page by page and re-score it.
 
 Key Features:
 -------------
-✅ Multi-factor scoring (rating + tags + text quality)  
-✅ Score saved in card["score"]  
-✅ Descending sort (high → low)  
-✅ Easily extensible weight system
+✅ Multi-factor scoring (rating + confidence + tags + text quality + interests + style)
+✅ Weights configurable globally (RECOMMEND_SCORE_WEIGHTS) and per user (`score_weights`)
+✅ Score saved in card["score"]
+✅ Partial top-k page selection, stable (ties keep pool order)
+✅ Weights {interest, style} = 0 reproduce the original fixed score (confidence is opt-in)
 
 Author: Tripllery AI Backend
 """
 
-from typing import List, Dict
+import os
+import re
+import math
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from maps.poi_identity import normalize_name
+
+# Feature columns, in matrix order
+SCORE_FEATURES = ("rating", "confidence", "tags", "description", "interest", "style")
+
+# ✨ Default weights (rating / tags / description match the original fixed score; confidence is opt-in)
+_BASE_WEIGHTS = {"rating": 1.5, "confidence": 0.0, "tags": 1.0, "description": 1.0, "interest": 2.0, "style": 1.0}
+
+# Review count at which a rating counts as fully confirmed (log scale), and the confidence of unknown counts
+RATING_COUNT_REFERENCE = float(os.getenv("RATING_COUNT_REFERENCE", "1000"))
+RATING_CONFIDENCE_UNKNOWN = float(os.getenv("RATING_CONFIDENCE_UNKNOWN", "0.5"))
+
+# Interest / style phrases beyond these are ignored
+MAX_PROFILE_TERMS = 32
+
+_STOPWORDS = frozenset({"and", "the", "for", "with", "from"})
+# Scripts written without spaces (kana, CJK ideographs, Hangul) are split into overlapping character bigrams
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+_CJK_RUN = re.compile(f"[{_CJK}]+")
+# Words of any script; words shorter than 3 letters carry no interest signal (CJK: bigrams)
+_WORD_PATTERN = f"[^\\W_]{{3,}}|[{_CJK}]{{2}}"
+_WORD = re.compile(_WORD_PATTERN)
+_CARD_BREAK = "\x00"
+_WORD_OR_BREAK = re.compile(f"{_WORD_PATTERN}|\x00")
+
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    """
+    "interest=3,style=0.5" → {"interest": 3.0, "style": 0.5} (unknown / malformed entries skipped)
+    """
+    weights = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        try:
+            if name.strip() in _BASE_WEIGHTS:
+                weights[name.strip()] = float(value)
+        except ValueError:
+            print(f"⚠️ Ignoring malformed score weight: {item!r}")
+    return weights
+
+
+DEFAULT_SCORE_WEIGHTS = {**_BASE_WEIGHTS, **_parse_weights(os.getenv("RECOMMEND_SCORE_WEIGHTS", ""))}
+
+
+def _term(word: str) -> Optional[str]:
+    """
+    "museums" → "museum", "the" → None (stopwords dropped, plural "s" stripped)
+    """
+    if word in _STOPWORDS:
+        return None
+    return word[:-1] if len(word) > 3 and word[-1] == "s" and word[-2] != "s" else word
+
+
+def _fold(text: str) -> str:
+    """
+    Lowercase form of a name / tag: "Cafés" → "cafes", "上海博物馆" → "上海 海博 博物 物馆"
+    """
+    if text.isascii():
+        return text.lower()
+    return _CJK_RUN.sub(_bigrams, normalize_name(text))
+
+
+def _bigrams(run: "re.Match") -> str:
+    chars = run.group()
+    return " " + " ".join(chars[i:i + 2] for i in range(len(chars) - 1)) + " "
+
+
+@lru_cache(maxsize=16384)
+def _terms(text: str) -> Tuple[str, ...]:
+    """
+    "Art Museums & Cafés" → ("art", "museum", "cafe"), "博物馆" → ("博物", "物馆")
+    """
+    return tuple(term for term in map(_term, _WORD.findall(_fold(text))) if term is not None)
+
+
+def _rating_count(count) -> float:
+    """
+    Review count as a float (-1 when unknown).
+    """
+    return count if isinstance(count, (int, float)) else -1.0
+
+
+def _confidence(count) -> float:
+    """
+    Rating-count confidence in [0, 1]: log-scaled review count, RATING_CONFIDENCE_UNKNOWN if unknown.
+    """
+    count = _rating_count(count)
+    if count < 0:
+        return RATING_CONFIDENCE_UNKNOWN
+    return min(1.0, math.log1p(count) / math.log1p(RATING_COUNT_REFERENCE))
+
+
+def make_score_profile(interests: Optional[Iterable[str]] = None, style_tags: Optional[Iterable[str]] = None,
+                       weights: Optional[Dict] = None) -> Dict:
+    """
+    Builds the (JSON-safe) per-user scoring profile.
+
+    Args:
+        interests (Iterable[str], optional): Interest keywords (e.g. intent["interest_keywords"])
+        style_tags (Iterable[str], optional): Travel-style tags (e.g. ["Museums", "Local Food"])
+        weights (Dict, optional): Per-user weight overrides, merged over DEFAULT_SCORE_WEIGHTS
+
+    Returns:
+        Dict: {"interests": [...], "style_tags": [...], "weights": {feature: float}}
+    """
+    merged = dict(DEFAULT_SCORE_WEIGHTS)
+    for name, value in (weights or {}).items():
+        if name in merged and isinstance(value, (int, float)) and math.isfinite(value):
+            merged[name] = float(value)
+
+    return {
+        "interests": [term for term in (interests or []) if isinstance(term, str) and term.strip()][:MAX_PROFILE_TERMS],
+        "style_tags": [tag for tag in (style_tags or []) if isinstance(tag, str) and tag.strip()][:MAX_PROFILE_TERMS],
+        "weights": merged
+    }
+
+
+class CardMatrix:
+    """
+    Profile-independent features of a card list, built once and scored against any profile.
+
+    - base: float array (n, 4) with rating, confidence, tag count, description length / 100
+    - postings / term_ptr: inverted index term → cards (CSR), over the terms of each
+      card's name and highlight tags
+    """
+
+    __slots__ = ("base", "vocab", "postings", "term_ptr")
+
+    def __init__(self, cards: List[Dict]):
+        ratings = [card.get("rating", 0) or 0 for card in cards]
+        counts = [_rating_count(card.get("user_ratings_total")) for card in cards]
+        tag_lists = [card.get("highlight_tags") or [] for card in cards]
+        desc_lens = [len(card.get("description", "")) for card in cards]
+
+        self.base = np.empty((len(cards), 4))
+        self.base[:, 0] = ratings
+        self.base[:, 1] = counts
+        self.base[:, 2] = [len(tags) for tags in tag_lists]
+        self.base[:, 3] = desc_lens
+        self.base[:, 3] /= 100.0
+
+        confidence = self.base[:, 1]
+        known = confidence >= 0
+        confidence[known] = np.minimum(1.0, np.log1p(confidence[known]) / math.log1p(RATING_COUNT_REFERENCE))
+        confidence[~known] = RATING_CONFIDENCE_UNKNOWN
+
+        # One regex pass over all names + tags; card breaks are matched as words to attribute terms to cards
+        text = _CARD_BREAK.join([
+            (card.get("name") or "") + " " + " ".join(tags) for card, tags in zip(cards, tag_lists)
+        ])
+        words = _WORD_OR_BREAK.findall(text.lower() if text.isascii() else
+                                       _CARD_BREAK.join(map(_fold, text.split(_CARD_BREAK))))
+
+        # Word → term id (-1: card break, -2: stopword), computed once per distinct word
+        self.vocab: Dict[str, int] = {}
+        vocab_id = self.vocab.setdefault
+        word_ids = {word: -2 if term is None else vocab_id(term, len(self.vocab))
+                    for word, term in ((word, _term(word)) for word in set(words) - {_CARD_BREAK})}
+        word_ids[_CARD_BREAK] = -1
+
+        ids = np.fromiter(map(word_ids.__getitem__, words), dtype=np.intp, count=len(words))
+        owners = np.cumsum(ids == -1)  # card index of every word
+        is_term = ids >= 0
+        token_ids_arr, token_cards = ids[is_term], owners[is_term]
+
+        order = np.argsort(token_ids_arr, kind="stable")
+        self.postings = token_cards[order]
+        self.term_ptr = np.zeros(len(self.vocab) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(token_ids_arr, minlength=len(self.vocab)), out=self.term_ptr[1:])
+
+    @classmethod
+    def _from_parts(cls, base: np.ndarray, vocab: Dict[str, int], postings: np.ndarray,
+                    term_ptr: np.ndarray) -> "CardMatrix":
+        matrix = cls.__new__(cls)
+        matrix.base, matrix.vocab, matrix.postings, matrix.term_ptr = base, vocab, postings, term_ptr
+        return matrix
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    def extend(self, other: "CardMatrix") -> "CardMatrix":
+        """
+        New matrix with the rows of `other` after these rows (both inputs are left unchanged).
+
+        The inverted indexes are merged term by term in linear time, without re-parsing any card.
+        """
+        vocab = dict(self.vocab)
+        remap = np.fromiter((vocab.setdefault(term, len(vocab)) for term in other.vocab),
+                            dtype=np.intp, count=len(other.vocab))
+
+        own_counts, other_counts = np.diff(self.term_ptr), np.diff(other.term_ptr)
+        own_padded = np.zeros(len(vocab), dtype=np.intp)
+        own_padded[:len(own_counts)] = own_counts
+        counts = own_padded.copy()
+        counts[remap] += other_counts  # remap has no duplicates
+        term_ptr = np.zeros(len(vocab) + 1, dtype=np.intp)
+        np.cumsum(counts, out=term_ptr[1:])
+
+        # Each term's own postings first, then the other matrix's (shifted past these rows)
+        postings = np.empty(term_ptr[-1], dtype=np.intp)
+        own_shift = term_ptr[:len(own_counts)] - self.term_ptr[:-1]
+        postings[np.arange(len(self.postings)) + np.repeat(own_shift, own_counts)] = self.postings
+        other_shift = term_ptr[remap] + own_padded[remap] - other.term_ptr[:-1]
+        postings[np.arange(len(other.postings)) + np.repeat(other_shift, other_counts)] = other.postings + len(self)
+
+        return CardMatrix._from_parts(np.concatenate([self.base, other.base]), vocab, postings, term_ptr)
+
+    def permuted(self, rows: Iterable[int]) -> "CardMatrix":
+        """
+        New matrix over the same cards, in the order `rows` (a permutation of range(len)).
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        new_row = np.empty(len(rows), dtype=np.intp)
+        new_row[rows] = np.arange(len(rows))
+        return CardMatrix._from_parts(self.base[rows], self.vocab, new_row[self.postings], self.term_ptr)
+
+    def to_json(self) -> Dict:
+        """
+        JSON-safe form (for pool stores with a disk tier), see `from_json`.
+        """
+        return {"base": self.base.tolist(), "vocab": self.vocab,
+                "postings": self.postings.tolist(), "term_ptr": self.term_ptr.tolist()}
+
+    @classmethod
+    def from_json(cls, state: Dict) -> "CardMatrix":
+        return cls._from_parts(np.array(state["base"], dtype=float).reshape(-1, 4),
+                               state["vocab"], np.array(state["postings"], dtype=np.intp),
+                               np.array(state["term_ptr"], dtype=np.intp))
+
+    def scores(self, profile: Optional[Dict] = None) -> np.ndarray:
+        """
+        Scores every card for a profile (see `make_score_profile`).
+
+        Returns:
+            np.ndarray: float scores, aligned with the card list
+        """
+        profile = profile or make_score_profile()
+        weights = profile.get("weights") or DEFAULT_SCORE_WEIGHTS
+        scores = self.base @ np.array([weights.get(name, 0.0) for name in SCORE_FEATURES[:4]])
+
+        for feature, phrases in (("interest", profile.get("interests")), ("style", profile.get("style_tags"))):
+            if phrases and weights.get(feature):
+                scores += weights[feature] * self.overlap(phrases)
+        return scores
+
+    def overlap(self, phrases: List[str]) -> np.ndarray:
+        """
+        Fraction of `phrases` each card matches (a card matches a phrase if it shares any of its terms).
+        """
+        matched = np.zeros(len(self.base))
+        hit = np.zeros(len(self.base), dtype=bool)
+        for phrase in phrases:
+            hit[:] = False
+            for term in _terms(phrase):
+                term_id = self.vocab.get(term)
+                if term_id is not None:
+                    hit[self.postings[self.term_ptr[term_id]:self.term_ptr[term_id + 1]]] = True
+            matched += hit
+        return matched / len(phrases)
 
-def score_cards(cards: List[Dict]) -> List[Dict]:
+
+def top_k_indices(scores: np.ndarray, k: int, offset: int = 0) -> np.ndarray:
+    """
+    Indices of ranks [offset, offset + k) by descending score, without sorting the whole array.
+
+    Ties keep array order (same result as a stable descending sort).
+
+    Args:
+        scores (np.ndarray): Scores
+        k (int): Page size
+        offset (int): First rank of the page
+
+    Returns:
+        np.ndarray: Up to k indices, best first
+    """
+    n = len(scores)
+    stop = min(n, offset + k)
+    if stop <= offset:
+        return np.empty(0, dtype=np.intp)
+
+    if stop < n:
+        kth = np.partition(scores, n - stop)[n - stop]  # stop-th largest score
+        candidates = np.flatnonzero(scores >= kth)      # keeps every tie at the boundary
+    else:
+        candidates = np.arange(n)
+
+    ranked = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return ranked[offset:stop]
+
+
+def compute_score(card: Dict, profile: Optional[Dict] = None) -> float:
     """
-    Assigns a numeric score to each card and returns a sorted list (desc).
+    Computes the score of a single card (used directly when streaming cards).
+
+    Args:
+        card (Dict): POI card dict
+        profile (Dict, optional): Scoring profile (see `make_score_profile`)
+
+    Returns:
+        float: Card score
+    """
+    profile = profile or make_score_profile()
+    weights = profile.get("weights") or DEFAULT_SCORE_WEIGHTS
+    tags = card.get("highlight_tags") or []
+
+    score = ((card.get("rating", 0) or 0) * weights.get("rating", 0.0)
+             + _confidence(card.get("user_ratings_total")) * weights.get("confidence", 0.0)
+             + len(tags) * weights.get("tags", 0.0)
+             + len(card.get("description", "")) / 100.0 * weights.get("description", 0.0))
+
+    card_terms = set(_terms(card.get("name") or ""))
+    for tag in tags:
+        card_terms.update(_terms(tag))
+    for feature, phrases in (("interest", profile.get("interests")), ("style", profile.get("style_tags"))):
+        if phrases and weights.get(feature):
+            matched = sum(1 for phrase in phrases if card_terms.intersection(_terms(phrase)))
+            score += weights[feature] * matched / len(phrases)
+    return score
+
+
+def score_cards(cards: List[Dict], profile: Optional[Dict] = None, limit: Optional[int] = None,
+                matrix: Optional[CardMatrix] = None) -> List[Dict]:
+    """
+    Assigns a numeric score to each card and returns them ranked (desc).
 
     Args:
         cards (List[Dict]): List of POI card dicts
+        profile (Dict, optional): Scoring profile (see `make_score_profile`)
+        limit (int, optional): Rank only the best `limit` cards; the others follow
+                               in their original order
+        matrix (CardMatrix, optional): Prebuilt matrix of `cards` (built here if omitted)
 
     Returns:
-        List[Dict]: Cards with added 'score', sorted by score descending
+        List[Dict]: Cards with added 'score', sorted by score descending (the first `limit` with a limit)
     """
+    if not cards:
+        return []
 
-    def compute_score(card: Dict) -> float:
-        rating = card.get("rating", 0) or 0
-        tag_count = len(card.get("highlight_tags", []))
-        desc_len = len(card.get("description", ""))
+    scores = (CardMatrix(cards) if matrix is None else matrix).scores(profile)
+    for card, score in zip(cards, scores.tolist()):
+        card["score"] = score
 
-        # ✨ Weight system: 1.5×rating + 1.0×tag_count + 1.0×desc_length (normalized)
-        return rating * 1.5 + tag_count * 1.0 + (desc_len / 100.0)
+    order = top_k_indices(scores, len(cards) if limit is None else limit)
+    return _with_head(cards, order)
 
-    # Attach scores
-    for card in cards:
-        card["score"] = compute_score(card)
 
-    # Sort descending by score
-    return sorted(cards, key=lambda x: x["score"], reverse=True)
+def _with_head(cards: List[Dict], head: np.ndarray) -> List[Dict]:
+    """
+    Cards at `head` (in that order), then all others in original order.
+    """
+    if len(head) == len(cards):
+        return [cards[i] for i in head]
+    chosen = np.zeros(len(cards), dtype=bool)
+    chosen[head] = True
+    return [cards[i] for i in head] + [card for card, taken in zip(cards, chosen) if not taken]
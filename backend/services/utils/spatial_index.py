@@ -0,0 +1,234 @@
+"""
+spatial_index.py · KD-Tree Spatial Index over POIs
+
+This utility module builds a static KD-tree over a list of POIs so proximity
+questions ("which cards are within 1 km of this one?", "the 5 closest cards")
+cost O(log n) per lookup instead of a scan over the whole pool.
+
+Coordinates are mapped once to 3D points on the Earth sphere (km). The tree
+prunes on straight-line (chord) distances, which grow monotonically with the
+great-circle distance, so pruning is exact for any pool (multi-city, high
+latitudes, across the antimeridian). Returned distances are exact haversine
+kilometers (`services.utils.geo`).
+
+Main Use Case:
+--------------
+Built once per recommendation pool (`recommend_pool.get_pool_index`) and used by:
+- `/recommend/nearby` (k-nearest / radius queries on a session's cards)
+- `maps/poi_cleaner.py` (co-located POI groups)
+- `services/formatter/optimizer.py` (nearest-neighbour chaining)
+- `services/planner/resolver.py` (proximity-aware day rebalancing)
+
+Key Features:
+-------------
+✅ k-nearest and radius queries, results sorted by distance
+✅ Exact anywhere on the globe: 3D chord pruning, haversine re-ranking
+✅ Optional exclusion set (e.g. the query POI itself, already-assigned POIs)
+✅ Leaf buckets keep Python overhead low on large pools
+✅ Pure NumPy, no scipy / sklearn dependency
+
+Author: Tripllery AI Backend
+"""
+
+import math
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from services.utils.geo import EARTH_RADIUS_KM, coords_array, haversine_km
+
+LEAF_SIZE = 16
+
+# Extra kNN candidates re-ranked by haversine distance (guards float near-ties between the two metrics)
+_KNN_OVERFETCH = 4
+
+# Relative tolerance on chord radii against float rounding (exact haversine filtering follows)
+_CHORD_TOLERANCE = 1e-9
+
+
+def _chord_km(arc_km: float) -> float:
+    """
+    Straight-line distance between two surface points `arc_km` apart along the great circle.
+    """
+    half_angle = min(arc_km / EARTH_RADIUS_KM, math.pi) / 2.0
+    return 2.0 * EARTH_RADIUS_KM * math.sin(half_angle)
+
+
+class SpatialIndex:
+    """
+    Static KD-tree over POI coordinates.
+
+    Attributes:
+        pois (List[Dict]): Indexed POIs (query results are indices into this list)
+    """
+
+    def __init__(self, pois: List[Dict], leaf_size: int = LEAF_SIZE):
+        self.pois = list(pois)
+        self._coords = coords_array(self.pois)
+        self._positions = {poi["id"]: i for i, poi in enumerate(self.pois) if "id" in poi}
+        self._leaf_size = max(1, leaf_size)
+        self._xyz = self._project(self._coords)
+
+        # Node layout (parallel lists): internal → axis/split/children, leaf → order[start:end]
+        self._order = np.arange(len(self.pois))
+        self._axis: List[int] = []
+        self._split: List[float] = []
+        self._left: List[int] = []
+        self._right: List[int] = []
+        self._start: List[int] = []
+        self._end: List[int] = []
+        if len(self.pois):
+            self._build(0, len(self.pois))
+
+    def __len__(self) -> int:
+        return len(self.pois)
+
+    def position_of(self, poi_id: str) -> Optional[int]:
+        """
+        Returns the index of the POI with the given "id", or None.
+        """
+        return self._positions.get(poi_id)
+
+    # =============================
+    # 🔍 QUERIES
+    # =============================
+
+    def nearest(self, lat: float, lng: float, k: int = 1, exclude: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """
+        Returns the k POIs closest to a point.
+
+        Args:
+            lat (float), lng (float): Query point
+            k (int): Number of neighbours
+            exclude (Iterable[int], optional): Indices to skip
+
+        Returns:
+            List[Tuple[int, float]]: (poi_index, distance_km), closest first
+        """
+        if not self.pois or k <= 0:
+            return []
+        skip = set(exclude or ())
+        query = self._project(np.array([[lat, lng]]))[0]
+        fetch = k + _KNN_OVERFETCH
+
+        heap: List[Tuple[float, int]] = []  # max-heap via negated squared distance
+
+        def visit(node: int):
+            if self._axis[node] < 0:
+                idx = self._order[self._start[node]:self._end[node]]
+                d2 = ((self._xyz[idx] - query) ** 2).sum(axis=1)
+                for i, dist in zip(idx.tolist(), d2.tolist()):
+                    if i in skip:
+                        continue
+                    if len(heap) < fetch:
+                        heapq.heappush(heap, (-dist, i))
+                    elif dist < -heap[0][0]:
+                        heapq.heapreplace(heap, (-dist, i))
+                return
+
+            diff = query[self._axis[node]] - self._split[node]
+            near, far = (self._left[node], self._right[node]) if diff <= 0 else (self._right[node], self._left[node])
+            visit(near)
+            if len(heap) < fetch or diff * diff < -heap[0][0]:
+                visit(far)
+
+        visit(0)
+        return self._with_distances(lat, lng, [i for _, i in heap])[:k]
+
+    def within(self, lat: float, lng: float, radius_km: float, exclude: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """
+        Returns all POIs within a radius of a point.
+
+        Args:
+            lat (float), lng (float): Query point
+            radius_km (float): Search radius in kilometers
+            exclude (Iterable[int], optional): Indices to skip
+
+        Returns:
+            List[Tuple[int, float]]: (poi_index, distance_km), closest first
+        """
+        if not self.pois or radius_km < 0:
+            return []
+        skip = set(exclude or ())
+        query = self._project(np.array([[lat, lng]]))[0]
+        r = _chord_km(radius_km) * (1.0 + _CHORD_TOLERANCE) + _CHORD_TOLERANCE
+        r2 = r * r
+
+        candidates: List[int] = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._axis[node] < 0:
+                idx = self._order[self._start[node]:self._end[node]]
+                d2 = ((self._xyz[idx] - query) ** 2).sum(axis=1)
+                candidates.extend(i for i in idx[d2 <= r2].tolist() if i not in skip)
+                continue
+
+            diff = query[self._axis[node]] - self._split[node]
+            if diff <= r:
+                stack.append(self._left[node])
+            if diff >= -r:
+                stack.append(self._right[node])
+
+        return [(i, d) for i, d in self._with_distances(lat, lng, candidates) if d <= radius_km]
+
+    def nearest_to(self, index: int, k: int = 1) -> List[Tuple[int, float]]:
+        """
+        k nearest neighbours of an indexed POI (excluding itself).
+        """
+        lat, lng = self._coords[index]
+        return self.nearest(lat, lng, k=k, exclude={index})
+
+    def within_of(self, index: int, radius_km: float) -> List[Tuple[int, float]]:
+        """
+        All POIs within a radius of an indexed POI (excluding itself).
+        """
+        lat, lng = self._coords[index]
+        return self.within(lat, lng, radius_km, exclude={index})
+
+    # =============================
+    # 🧱 INTERNALS
+    # =============================
+
+    @staticmethod
+    def _project(coords: np.ndarray) -> np.ndarray:
+        """
+        [lat, lng] degrees → 3D points (km) on the sphere of radius EARTH_RADIUS_KM.
+        """
+        lat, lng = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+        cos_lat = np.cos(lat)
+        return np.column_stack((cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat))) * EARTH_RADIUS_KM
+
+    def _new_node(self) -> int:
+        for column in (self._axis, self._split, self._left, self._right, self._start, self._end):
+            column.append(-1)
+        return len(self._axis) - 1
+
+    def _build(self, start: int, end: int) -> int:
+        node = self._new_node()
+        if end - start <= self._leaf_size:
+            self._start[node], self._end[node] = start, end
+            return node
+
+        # Split on the wider axis at the median
+        idx = self._order[start:end]
+        points = self._xyz[idx]
+        axis = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+        mid = (end - start) // 2
+        part = np.argpartition(points[:, axis], mid)
+        self._order[start:end] = idx[part]
+
+        self._axis[node] = axis
+        self._split[node] = float(self._xyz[self._order[start + mid], axis])
+        self._left[node] = self._build(start, start + mid)
+        self._right[node] = self._build(start + mid, end)
+        return node
+
+    def _with_distances(self, lat: float, lng: float, indices: List[int]) -> List[Tuple[int, float]]:
+        if not indices:
+            return []
+        idx = np.array(indices)
+        distances = haversine_km(lat, lng, self._coords[idx, 0], self._coords[idx, 1])
+        order = np.argsort(distances, kind="stable")
+        return [(int(idx[o]), float(distances[o])) for o in order]
@@ -0,0 +1,181 @@
+"""
+startup_profile.py · Worker Startup Instrumentation
+
+This utility module measures how long a worker takes to become ready and,
+in profiling mode, what each imported module costs.
+
+Profiling mode (TRIPLLERY_PROFILE_IMPORTS=1) wraps `builtins.__import__`
+before the app imports its blueprints and records, for every import statement
+that actually loaded new modules, its inclusive and self time. The report is
+printed once the app is ready and exposed under `/metrics`.
+
+Deferred libraries (e.g. the OpenAI / googlemaps SDKs) can be warmed in a
+background thread after the worker starts serving (TRIPLLERY_WARM_IMPORTS),
+so the first request that needs them does not pay the import either.
+
+Main Use Case:
+--------------
+Used by `app.py`:
+- `install()` at the very top of the module
+- `mark_ready()` / `print_report()` in `before_serving`
+- `get_startup_report()` in `/metrics`
+
+Key Features:
+-------------
+✅ Per-import inclusive / self time (ms), top-N report
+✅ Process-start → ready and app-import timings
+✅ Zero overhead when profiling mode is off
+✅ Background warm-up of lazily imported libraries
+
+Author: Tripllery AI Backend
+"""
+
+import os
+import sys
+import time
+import builtins
+import threading
+import importlib
+import importlib.util
+from typing import Dict, List, Optional
+
+PROFILE_IMPORTS = os.getenv("TRIPLLERY_PROFILE_IMPORTS", "0") == "1"
+PROFILE_TOP_N = int(os.getenv("TRIPLLERY_PROFILE_TOP_N", "25"))
+# Comma-separated modules imported in a background thread once the worker is serving
+WARM_IMPORTS = [m for m in os.getenv("TRIPLLERY_WARM_IMPORTS", "openai,googlemaps").split(",") if m.strip()]
+
+_install_time = time.perf_counter()
+_ready_time: Optional[float] = None
+_records: Dict[str, List[float]] = {}  # name → [inclusive_s, self_s]
+_installed = False
+_warmed: Dict[str, float] = {}
+
+
+def _process_start_offset() -> Optional[float]:
+    """
+    Seconds between process start and this module's import (Linux only).
+    """
+    try:
+        with open(f"/proc/{os.getpid()}/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_started_ago = _process_start_offset()
+
+
+def _qualified_name(name: str, globals: Optional[Dict], level: int) -> str:
+    """
+    Resolves relative imports ("from .x import y") to absolute module names for the report.
+    """
+    if level == 0:
+        return name
+    package = (globals or {}).get("__package__") or ""
+    try:
+        return importlib.util.resolve_name("." * level + name, package)
+    except (ImportError, ValueError):
+        return "." * level + name
+
+
+def install():
+    """
+    Starts recording import costs (only in profiling mode). Call before heavy imports.
+    """
+    global _installed
+    if not PROFILE_IMPORTS or _installed:
+        return
+    _installed = True
+
+    original_import = builtins.__import__
+    child_time: List[float] = []
+    main_thread = threading.get_ident()
+
+    def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if threading.get_ident() != main_thread:  # e.g. background warm-up
+            return original_import(name, globals, locals, fromlist, level)
+        loaded_before = len(sys.modules)
+        started = time.perf_counter()
+        child_time.append(0.0)
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = child_time.pop()
+            if len(sys.modules) > loaded_before:
+                record = _records.setdefault(_qualified_name(name, globals, level), [0.0, 0.0])
+                record[0] += elapsed
+                record[1] += elapsed - children
+            if child_time:
+                child_time[-1] += elapsed
+
+    builtins.__import__ = timed_import
+
+
+def mark_ready():
+    """
+    Records the moment the app is ready to serve.
+    """
+    global _ready_time
+    if _ready_time is None:
+        _ready_time = time.perf_counter()
+
+
+def get_startup_report(top: int = PROFILE_TOP_N) -> Dict:
+    """
+    Returns startup timings and, in profiling mode, the most expensive imports.
+
+    Returns:
+        Dict: {
+            "process_to_ready_ms": float or None,
+            "import_to_ready_ms": float or None,
+            "profile_imports": bool,
+            "imports": [{"module", "inclusive_ms", "self_ms"}, ...],  ← top N by inclusive time
+            "warmed_imports_ms": {module: ms}
+        }
+    """
+    ready = None if _ready_time is None else (_ready_time - _install_time) * 1000
+    process = None if ready is None or _started_ago is None else ready + _started_ago * 1000
+    ranked = sorted(_records.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "process_to_ready_ms": None if process is None else round(process, 1),
+        "import_to_ready_ms": None if ready is None else round(ready, 1),
+        "profile_imports": PROFILE_IMPORTS,
+        "imports": [
+            {"module": name, "inclusive_ms": round(incl * 1000, 1), "self_ms": round(own * 1000, 1)}
+            for name, (incl, own) in ranked
+        ],
+        "warmed_imports_ms": dict(_warmed)
+    }
+
+
+def print_report():
+    """
+    Prints the startup report (import table only in profiling mode).
+    """
+    report = get_startup_report()
+    print(f"🚀 Worker ready: {report['import_to_ready_ms']} ms after app import "
+          f"({report['process_to_ready_ms']} ms after process start)")
+    if report["profile_imports"]:
+        print(f"{'inclusive ms':>12} | {'self ms':>8} | module")
+        for row in report["imports"]:
+            print(f"{row['inclusive_ms']:>12.1f} | {row['self_ms']:>8.1f} | {row['module']}")
+
+
+def warm_imports(modules: List[str] = WARM_IMPORTS):
+    """
+    Imports deferred libraries (run in a background thread after the worker is serving).
+    """
+    for name in modules:
+        name = name.strip()
+        if name in sys.modules:
+            continue
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            _warmed[name] = round((time.perf_counter() - started) * 1000, 1)
+        except ImportError as e:
+            print(f"⚠️ Warm import of {name} failed: {e}")
@@ -0,0 +1,133 @@
+"""
+maps_stub.py · Offline Google Maps Stub Server (Directions + Distance Matrix)
+
+A tiny Quart app that answers the two routing endpoints `/preview` uses with
+deterministic, distance-based travel times, so previews (legs or matrix mode)
+can be exercised without network access or an API key quota.
+
+Travel time = straight-line distance / mode speed (+ a fixed stop overhead).
+Directions responses carry a real encoded polyline of the straight segment.
+
+Usage:
+------
+    python backend/stubs/maps_stub.py --port 8765
+
+    # in the backend's environment
+    GOOGLE_MAPS_API_BASE=http://127.0.0.1:8765
+    GOOGLE_MAPS_API_KEY=stub
+    PREVIEW_TRAVEL_TIMES=matrix
+
+Endpoints:
+----------
+GET /maps/api/distancematrix/json   (origins, destinations, mode)
+GET /maps/api/directions/json       (origin, destination, mode)
+GET /stub/stats                     → request counters
+
+Author: Tripllery AI Backend
+"""
+
+import math
+import argparse
+from typing import List, Tuple
+
+from quart import Quart, jsonify, request
+
+SPEED_KMH = {"driving": 30.0, "transit": 18.0, "walking": 4.5}
+STOP_OVERHEAD_SECONDS = 120
+
+app = Quart(__name__)
+stats = {"distancematrix": 0, "directions": 0, "elements": 0}
+
+
+def _parse_points(value: str) -> List[Tuple[float, float]]:
+    points = []
+    for part in (value or "").split("|"):
+        lat, lng = part.split(",")
+        points.append((float(lat), float(lng)))
+    return points
+
+
+def _haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(h))
+
+
+def _element(a, b, mode: str) -> dict:
+    km = _haversine_km(a, b)
+    seconds = 0 if km == 0 else int(km / SPEED_KMH.get(mode, 30.0) * 3600) + STOP_OVERHEAD_SECONDS
+    return {
+        "status": "OK",
+        "distance": {"value": int(km * 1000), "text": f"{km:.1f} km"},
+        "duration": {"value": seconds, "text": f"{seconds // 60} mins"}
+    }
+
+
+def _encode_polyline(points: List[Tuple[float, float]]) -> str:
+    """
+    Google encoded polyline algorithm.
+    """
+    encoded = []
+    prev_lat = prev_lng = 0
+    for lat, lng in points:
+        lat_e5, lng_e5 = int(round(lat * 1e5)), int(round(lng * 1e5))
+        for delta in (lat_e5 - prev_lat, lng_e5 - prev_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                encoded.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            encoded.append(chr(value + 63))
+        prev_lat, prev_lng = lat_e5, lng_e5
+    return "".join(encoded)
+
+
+@app.route("/maps/api/distancematrix/json")
+async def distance_matrix():
+    try:
+        origins = _parse_points(request.args.get("origins"))
+        destinations = _parse_points(request.args.get("destinations"))
+    except ValueError:
+        return jsonify({"status": "INVALID_REQUEST", "rows": []})
+
+    if len(origins) * len(destinations) > 100:
+        return jsonify({"status": "MAX_ELEMENTS_EXCEEDED", "rows": []})
+
+    mode = request.args.get("mode", "driving")
+    stats["distancematrix"] += 1
+    stats["elements"] += len(origins) * len(destinations)
+    return jsonify({
+        "status": "OK",
+        "rows": [{"elements": [_element(o, d, mode) for d in destinations]} for o in origins]
+    })
+
+
+@app.route("/maps/api/directions/json")
+async def directions():
+    try:
+        origin = _parse_points(request.args.get("origin"))[0]
+        destination = _parse_points(request.args.get("destination"))[0]
+    except (ValueError, IndexError):
+        return jsonify({"status": "INVALID_REQUEST", "routes": []})
+
+    stats["directions"] += 1
+    leg = _element(origin, destination, request.args.get("mode", "driving"))
+    return jsonify({
+        "status": "OK",
+        "routes": [{
+            "legs": [{"duration": leg["duration"], "distance": leg["distance"]}],
+            "overview_polyline": {"points": _encode_polyline([origin, destination])}
+        }]
+    })
+
+
+@app.route("/stub/stats")
+async def stub_stats():
+    return jsonify(stats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline Google Maps routing stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    app.run(host=args.host, port=args.port)
@@ -0,0 +1,8 @@
+"""
+Test setup: backend modules import each other as top-level packages (`services.…`, `maps.…`).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,68 @@
+"""
+CardMatrix growth / reordering vs a fresh build, and pool paging on the stored matrix.
+"""
+
+import numpy as np
+import pytest
+
+from services.utils import recommend_pool
+from services.utils.score_cards import CardMatrix, compute_score, make_score_profile, score_cards
+
+TAGS = ["Museums", "Local Food", "Street Art", "Historic", "Coffee", "Live Music", "博物馆", "Музей"]
+PROFILE = make_score_profile(["museums", "live music", "博物馆"], ["Historic", "Coffee"])
+
+
+def _cards(n: int, seed: int, prefix: str = "c"):
+    rng = np.random.default_rng(seed)
+    return [{
+        "id": f"{prefix}{i}",
+        "name": f"{TAGS[i % len(TAGS)]} Place {i}",
+        "rating": round(float(rng.uniform(3, 5)), 1),
+        "user_ratings_total": int(rng.integers(0, 5000)),
+        "description": "x" * int(rng.integers(0, 300)),
+        "highlight_tags": [TAGS[t] for t in rng.choice(len(TAGS), size=rng.integers(0, 4), replace=False)]
+    } for i in range(n)]
+
+
+def test_extend_scores_like_a_fresh_build():
+    first, second = _cards(50, seed=1), _cards(20, seed=2, prefix="n")
+    grown = CardMatrix(first).extend(CardMatrix(second)).extend(CardMatrix([]))
+    assert np.allclose(grown.scores(PROFILE), CardMatrix(first + second).scores(PROFILE))
+
+
+def test_permuted_and_json_round_trip_keep_scores():
+    cards = _cards(40, seed=3)
+    rows = np.random.default_rng(4).permutation(len(cards))
+    matrix = CardMatrix.from_json(CardMatrix(cards).to_json()).permuted(rows)
+    assert np.allclose(matrix.scores(PROFILE), CardMatrix([cards[i] for i in rows]).scores(PROFILE))
+
+
+def test_matrix_scores_match_compute_score():
+    cards = _cards(30, seed=5)
+    expected = [compute_score(dict(card), PROFILE) for card in cards]
+    assert np.allclose(CardMatrix(cards).scores(PROFILE), expected)
+
+
+def test_default_weights_keep_the_original_score():
+    card = {"rating": 4.5, "user_ratings_total": 900, "description": "x" * 250, "highlight_tags": ["A", "B"]}
+    assert compute_score(card) == pytest.approx(4.5 * 1.5 + 2 + 2.5)
+
+
+def test_pool_pages_rescoring_and_growth_use_the_stored_scores():
+    cards = _cards(60, seed=6)
+    scored = score_cards(cards, limit=12)
+    token = recommend_pool.cache_card_pool(scored, ranked=12)
+    first_page = [card["id"] for card in scored[:12]]
+
+    assert recommend_pool.rescore_unranked(token, PROFILE) == 48
+    extra = score_cards(_cards(5, seed=7, prefix="n"), PROFILE)
+    assert recommend_pool.append_to_pool(token, extra + scored[:2]) == 5
+
+    pool = recommend_pool.get_next_batch(0, 100, token)
+    assert [card["id"] for card in pool[:12]] == first_page
+    rest = [(card["id"], card["score"]) for card in pool[12:]]
+    expected = sorted(((card["id"], compute_score(dict(card), PROFILE)) for card in scored[12:] + extra),
+                      key=lambda item: item[1], reverse=True)
+    assert [card_id for card_id, _ in rest] == [card_id for card_id, _ in expected]
+    assert np.allclose([score for _, score in rest], [score for _, score in expected])
+    assert recommend_pool.get_pois_by_ids(["n3"], token)[0]["score"] == pytest.approx(dict(rest)["n3"])
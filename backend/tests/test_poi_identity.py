@@ -0,0 +1,53 @@
+"""
+Name normalization, content-derived ids and co-located de-duplication across scripts.
+"""
+
+import pytest
+
+from maps.poi_identity import make_poi_id, normalize_name
+from maps.poi_cleaner import dedupe_pois
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Café de Flore, Paris!", "cafe de flore paris"),
+    ("Museum of Fine Arts — Boston", "museum of fine arts boston"),
+    ("Phở Hòa", "pho hoa"),
+    ("Straße", "strasse"),
+    ("故宫博物院", "故宫博物院"),
+    ("Государственный Эрмитаж", "государственный эрмитаж"),
+    ("متحف اللوفر", "متحف اللوفر"),
+    ("ＡＢＣ　１２", "abc 12"),
+    (None, "")
+])
+def test_normalize_name_keeps_letters_of_every_script(name, expected):
+    assert normalize_name(name) == expected
+
+
+def test_ids_keep_the_name_of_non_latin_pois():
+    a = make_poi_id({"name": "故宫博物院", "lat": 39.9163, "lng": 116.3972})
+    b = make_poi_id({"name": "天安门", "lat": 39.9163, "lng": 116.3972})
+    assert a != b
+
+
+def test_dedupe_keeps_different_non_latin_names_at_the_same_spot():
+    pois = [
+        {"id": "a", "name": "故宫博物院", "lat": 39.9163, "lng": 116.3972},
+        {"id": "b", "name": "天安门", "lat": 39.9164, "lng": 116.3973},
+        {"id": "c", "name": "Эрмитаж", "lat": 39.9163, "lng": 116.3974},
+        {"id": "d", "name": "", "lat": 39.9163, "lng": 116.3972},
+        {"id": "e", "name": "", "lat": 39.9163, "lng": 116.3972}
+    ]
+    unique, stats = dedupe_pois(pois)
+    assert [poi["id"] for poi in unique] == ["a", "b", "c", "d", "e"]
+    assert stats["colocated_duplicates"] == 0
+
+
+def test_dedupe_still_merges_the_same_name_across_scripts_and_accents():
+    pois = [
+        {"id": "a", "name": "故宫博物院", "lat": 39.9163, "lng": 116.3972},
+        {"id": "b", "name": "故宫博物院", "lat": 39.9164, "lng": 116.3972},
+        {"id": "c", "name": "Café de Flore", "lat": 48.8540, "lng": 2.3325},
+        {"id": "d", "name": "CAFE DE FLORE", "lat": 48.8541, "lng": 2.3325}
+    ]
+    unique, _ = dedupe_pois(pois)
+    assert [poi["id"] for poi in unique] == ["a", "c"]
@@ -0,0 +1,62 @@
+"""
+Meal blocks in the preview timeline when opening-hours waits and early finishes move the day around.
+"""
+
+import numpy as np
+
+from services.preview.builder import _build_day, LUNCH_MINUTE, DINNER_MINUTE
+from services.preview.opening_hours import build_opening_hours_index
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MEALS = {"include_breakfast": True, "include_lunch": True, "include_dinner": True}
+
+
+def _poi(poi_id, monday=None):
+    poi = {"id": poi_id, "name": poi_id, "lat": 42.36, "lng": -71.06}
+    if monday is not None:
+        poi["opening_hours"] = [f"Monday: {monday}"] + [f"{day}: 9:00 AM – 5:00 PM" for day in DAYS[1:]]
+    return poi
+
+
+def _schedule(pois, start_time, return_time="21:00", meals=MEALS):
+    """Plans the order (reorder pass), then builds the final timeline like `build_full_schedule`."""
+    matrix = np.full((len(pois), len(pois)), 10)
+    np.fill_diagonal(matrix, 0)
+    hours = build_opening_hours_index(pois)
+    _, order, _ = _build_day(pois, start_time, "2025-07-07", "Day 1", 90, None, None, meals, return_time,
+                             travel_matrix=matrix, opening_hours=hours, weekday=0, reorder=True)
+    schedule, _, _ = _build_day([pois[i] for i in order], start_time, "2025-07-07", "Day 1", 90, None, None,
+                                meals, return_time, travel_matrix=matrix[np.ix_(order, order)],
+                                opening_hours=[hours[i] for i in order], weekday=0)
+    return schedule
+
+
+def _meals(schedule):
+    return [(block["activity"], block["start_time"]) for block in schedule if block["type"] == "Meal"]
+
+
+def test_lunch_is_taken_inside_a_wait_that_crosses_lunch_time():
+    pois = [_poi("A", "2:00 – 5:00 PM"), _poi("B", "9:00 – 11:00 AM"), _poi("C", "Closed"), _poi("D")]
+    schedule = _schedule(pois, start_time=10 * 60 + 40)
+
+    assert _meals(schedule) == [("Lunch Break", LUNCH_MINUTE), ("Dinner Break", DINNER_MINUTE)]
+    types = [block["type"] for block in schedule]
+    assert types == ["Sightseeing", "Transportation", "Flexible", "Meal", "Flexible", "Sightseeing", "Meal", "Return"]
+    visit_a = next(block for block in schedule if block.get("id") == "A")
+    assert visit_a["start_time"] == 14 * 60 and visit_a["opening_status"] == "open"
+
+
+def test_timeline_stays_contiguous_and_ordered():
+    pois = [_poi("A", "2:00 – 5:00 PM"), _poi("B", "9:00 – 11:00 AM"), _poi("D")]
+    schedule = _schedule(pois, start_time=9 * 60)
+
+    for previous, block in zip(schedule, schedule[1:]):
+        assert block["start_time"] >= previous["end_time"]
+    assert [activity for activity, _ in _meals(schedule)] == ["Breakfast", "Lunch Break", "Dinner Break"]
+
+
+def test_no_dinner_after_the_return_time_and_meal_options_respected():
+    pois = [_poi("D")]
+    assert _meals(_schedule(pois, start_time=10 * 60, return_time="17:00")) == [("Lunch Break", LUNCH_MINUTE)]
+    no_meals = {"include_breakfast": False, "include_lunch": False, "include_dinner": False}
+    assert _meals(_schedule(pois, start_time=9 * 60, meals=no_meals)) == []
@@ -0,0 +1,65 @@
+"""
+SpatialIndex vs brute-force haversine on a pool spanning several cities.
+"""
+
+import numpy as np
+import pytest
+
+from services.utils.geo import haversine_km
+from services.utils.spatial_index import SpatialIndex
+
+CITIES = {"Boston": (42.3601, -71.0589), "New York": (40.7128, -74.0060), "Hartford": (41.7658, -72.6734)}
+
+
+def _pool(per_city: int = 300, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    pois = []
+    for city, (lat, lng) in CITIES.items():
+        # Dense core plus a sparse ring out to ~40 km
+        offsets = np.concatenate([rng.normal(0, 0.02, (per_city // 2, 2)), rng.uniform(-0.4, 0.4, (per_city - per_city // 2, 2))])
+        for i, (dlat, dlng) in enumerate(offsets):
+            pois.append({"id": f"{city}-{i}", "lat": lat + float(dlat), "lng": lng + float(dlng)})
+    return pois
+
+
+POOL = _pool()
+INDEX = SpatialIndex(POOL, leaf_size=8)
+LATS = np.array([poi["lat"] for poi in POOL])
+LNGS = np.array([poi["lng"] for poi in POOL])
+# Query points: every city center, points between cities, and a few pool members
+QUERIES = list(CITIES.values()) + [(41.5, -73.0), (42.0, -72.0), (POOL[10]["lat"], POOL[10]["lng"]),
+                                   (POOL[450]["lat"], POOL[450]["lng"]), (POOL[-1]["lat"], POOL[-1]["lng"])]
+
+
+@pytest.mark.parametrize("lat,lng", QUERIES)
+@pytest.mark.parametrize("radius_km", [0.5, 5.0, 60.0, 180.0, 400.0])
+def test_within_matches_brute_force(lat, lng, radius_km):
+    distances = haversine_km(lat, lng, LATS, LNGS)
+    expected = set(np.flatnonzero(distances <= radius_km).tolist())
+
+    result = INDEX.within(lat, lng, radius_km)
+
+    assert {i for i, _ in result} == expected
+    assert [d for _, d in result] == sorted(d for _, d in result)
+
+
+@pytest.mark.parametrize("lat,lng", QUERIES)
+@pytest.mark.parametrize("k", [1, 5, 50, 400])
+def test_nearest_matches_brute_force(lat, lng, k):
+    distances = haversine_km(lat, lng, LATS, LNGS)
+
+    result = INDEX.nearest(lat, lng, k=k)
+
+    assert len(result) == k
+    np.testing.assert_allclose([d for _, d in result], np.sort(distances)[:k])
+
+
+def test_queries_around_an_indexed_poi_exclude_it():
+    i = INDEX.position_of("Hartford-3")
+    lat, lng = POOL[i]["lat"], POOL[i]["lng"]
+    distances = haversine_km(lat, lng, LATS, LNGS)
+    distances[i] = np.inf
+
+    assert all(j != i for j, _ in INDEX.nearest_to(i, k=10))
+    np.testing.assert_allclose([d for _, d in INDEX.nearest_to(i, k=10)], np.sort(distances)[:10])
+    assert {j for j, _ in INDEX.within_of(i, 30.0)} == set(np.flatnonzero(distances <= 30.0).tolist())
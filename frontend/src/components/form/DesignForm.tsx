@@ -91,6 +91,7 @@ export default function DesignForm(): JSX.Element {
         formData: payload,
         cards: result.cards,
         all_pois: result.all_pois,
+        pool_token: result.pool_token,
       });
     } catch (err) {
       console.error("Submit failed:", err);
@@ -19,6 +19,7 @@ export default function PlanPage(): JSX.Element {
   const {
     accepted_pois = [],
     all_pois = [],
+    pool_token,
     formData = {},
   } = location.state || {};
 
@@ -38,6 +39,7 @@ export default function PlanPage(): JSX.Element {
           body: JSON.stringify({
             accepted_pois,
             all_pois,
+            pool_token,
             ...formData,
           }),
         });
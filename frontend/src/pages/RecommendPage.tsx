@@ -49,6 +49,7 @@ export default function RecommendPage(): JSX.Element {
       formData,
       accepted_pois: selectedIds, // ✅ ids for backend
       all_pois: cards, // full pool
+      pool_token: location.state?.pool_token, // ✅ server-side pool session
       min_required: minRequired, // optional meta
     });
   };
@@ -57,7 +58,10 @@ export default function RecommendPage(): JSX.Element {
   const loadMoreCards = async () => {
     setLoadingMore(true);
     try {
-      const res = await fetch(`/recommend/more?start=${cards.length}&size=6`);
+      const poolToken = location.state?.pool_token ?? "";
+      const res = await fetch(
+        `/recommend/more?start=${cards.length}&size=6&pool_token=${encodeURIComponent(poolToken)}`
+      );
       const data = await res.json();
       setCards((prev) => [...prev, ...(data.cards ?? [])]);
     } catch (err) {
@@ -20,6 +20,7 @@ export interface NavPayload {
   /* ↓↓↓ depending on the stage, only one或多字段会用到 ↓↓↓ */
   cards?: any[]; // /recommend response – small list
   all_pois?: any[]; // full POI pool – for /plan
+  pool_token?: string; // server-side pool session key – for /recommend/more and /plan
   accepted_pois?: string[]; // selected ids – for /plan
   plan?: any; // plan split by day – for /preview
   options?: any; // extra options – for /preview